@@ -1,6 +1,5 @@
 from aiwolfpy.tcpipclient_parsed import connect_parse
 from agents.agent_container import AgentContainer
-from agents.logger import Logger
 
 """
 Sample of an agent based on the aiwolfpy standards.
@@ -19,7 +18,8 @@ class Werewolf(object):
         """
         This function is called before the game starts.
         :param base_info: contains basic information available to your agent at the current state of the game.
-        :param diff_data: A pandas dataframe that contains every new information since last communication with server.
+        :param diff_data: A GameDiff (or a pandas dataframe with use_dataframe) that contains every new information since
+        last communication with server.
         :param game_setting:contains a number of settings related to the current came as specified the AIWolf server,
         such as number of players, how many times an agent can talk per day, etc.
         :return: None
@@ -58,4 +58,4 @@ if __name__=="__main__":
     # Sample code, how to connect to the server.
     my_agent = AgentContainer()
     connect_parse(my_agent)
-    Logger.instance.close()
+    my_agent.close()
@@ -4,20 +4,43 @@ from agents.uninformed.bodyguard import Bodyguard
 from agents.uninformed.medium import Medium
 from agents.informed.werewolf import Werewolf
 from agents.possessed import Possessed
+from agents.deadline import DeadlineRunner, DEADLINE_FRACTION
+from agents.speculation import Speculator, NEXT_DECISIONS, INVALIDATING_REQUESTS
+from agents.logger import console, INFO
+import time
 
 NO_ROLE = 'none'
 
+# Requests answered by a decision of the agent, the update before each of them has the same (upper case) name.
+DECISIONS = frozenset(["talk", "whisper", "vote", "attack", "divine", "guard"])
+
 class AgentContainer(object):
     """
     Because the agents role is decided in run time this class will contain an agent
     and this is the agent which will be passed to the tcp client created by AIWoof.
+    The calls of the agent run on a DeadlineRunner, a decision (talk, vote, divine...) that doesn't
+    finish within deadline_fraction of the timeLimit of the game is answered with the best answer the agent
+    has so far (see the fallback_* methods of Player) instead of risking the response. That answer is taken
+    right after the update of the request, so it's there even when the runner is still busy with earlier calls.
+    Only the decisions the agent can plan without changing its state (see the plan_* methods of Player) are
+    abandoned this way.
+    With speculate, the runner uses the time between the requests to compute the likely next answers (see the
+    speculate_* methods of Player), a request whose answer was computed since the last change is answered
+    without running the decision.
     """
 
-    def __init__(self, role=NO_ROLE, name='ROLTK'):
+    def __init__(self, role=NO_ROLE, name='ROLTK', deadline_fraction=DEADLINE_FRACTION, speculate=False):
         self._role = role
         self._agent = None
         self._name = name
         self.tasks = []
+        self._deadline_fraction = deadline_fraction
+        self._time_limit = None
+        self._request_start = None
+        self._runner = DeadlineRunner()
+        # Fallback answers of the next decision, taken after the update before it.
+        self._fallbacks = {}
+        self._speculator = Speculator() if speculate else None
 
     def getName(self):
         return self._name
@@ -26,11 +49,20 @@ class AgentContainer(object):
         """
         Initialization should be common between all players.
         :param base_info: Current state of the game.
-        :param diff_data: Pandas dataframe that holds difference since last update.
+        :param diff_data: GameDiff that holds difference since last update.
         :param game_setting: The game settings.
         :return:
         """
         self._role = base_info['myRole']
+        time_limit = game_setting.get('timeLimit')
+        self._time_limit = time_limit / 1000.0 if time_limit else None
+        self._runner.call(lambda: self._initialize(base_info, diff_data, game_setting))
+
+    def _initialize(self, base_info, diff_data, game_setting):
+        # The agent of the previous game is replaced, release its game context.
+        self.close()
+        if self._speculator is not None:
+            self._speculator.invalidate()
 
         if self._role == 'VILLAGER':
             self._agent = Villager()
@@ -48,49 +80,135 @@ class AgentContainer(object):
         self._agent.initialize(base_info, diff_data, game_setting)
 
     def update(self, base_info, diff_data, request):
+        # The decision requests come right after their update, their deadline is counted from here.
+        self._request_start = time.perf_counter()
+        self._runner.call(lambda: self._update(base_info, diff_data, request))
+        self._speculate(request)
+
+    def _update(self, base_info, diff_data, request):
+        # New diff rows change the inputs of the speculated answers, the invalidation runs on the runner so a
+        # speculation queued before the update can't compute an answer from the state before it.
+        if self._speculator is not None and \
+                ((diff_data is not None and len(diff_data) > 0) or request in INVALIDATING_REQUESTS):
+            self._speculator.invalidate()
+        state = self._agent.random_state() if self._speculator is not None else None
         self._agent.update(base_info, diff_data, request)
+        # The speculated answers drew their numbers from the state before the update.
+        if state is not None and self._agent.random_state() != state:
+            self._speculator.invalidate()
+        self._snapshot_fallback(request)
+
+    def _snapshot_fallback(self, request):
+        """
+        Take the fallback answer of the decision requested after the update, runs on the runner right after it.
+        :param request:
+        :return:
+        """
+        decision = request.lower() if request else None
+        if self._time_limit is None or decision not in DECISIONS:
+            self._fallbacks = {}
+            return
+        self._fallbacks = {decision: self._fallback(self._agent, decision)}
+
+    def _speculate(self, request):
+        """
+        Queue the computation of the answers likely to be requested after the given request, it runs on the
+        runner once the current calls are done.
+        :param request:
+        :return:
+        """
+        if self._speculator is None or request not in NEXT_DECISIONS:
+            return
+        agent = self._agent
+        self._runner.submit(lambda: self._speculator.speculate(agent, NEXT_DECISIONS[request]))
 
     def dayStart(self):
-        self._agent.dayStart()
+        self._runner.call(self._agent.dayStart)
 
-    def talk(self):
+    def _decide(self, request, default):
+        """
+        Run a decision of the agent under the deadline of the request.
+        :param request: Name of the decision, the agent's method and its fallback_ method.
+        :param default: Answer used when the agent has no better answer.
+        :return:
+        """
+        deadline = None
+        if self._time_limit is not None:
+            start = self._request_start if self._request_start is not None else time.perf_counter()
+            deadline = start + self._time_limit * self._deadline_fraction
+        self._request_start = None
+        agent = self._agent
+        result = self._runner.decide(request, lambda: self._plan(agent, request),
+                                     lambda: self._decision(agent, request), deadline,
+                                     self._fallbacks.get(request), default)
+        self._speculate(request)
+        return result
+
+    def _plan(self, agent, request):
+        """
+        Plan a decision, runs on the runner.
+        :param agent:
+        :param request:
+        :return: The speculated answer of the request and its commit if they are still valid, otherwise the plan of
+        the agent, None if the decision can't be split.
+        """
+        planned = self._speculator.take(request) if self._speculator is not None else None
+        if planned is None:
+            planned = agent.plan(request)
+        if planned is None or self._speculator is None or planned[1] is None:
+            return planned
+        result, commit = planned
+
+        def commit_and_invalidate():
+            commit()
+            # The decision changed the state the other answers were computed from.
+            self._speculator.invalidate()
+
+        return result, commit_and_invalidate
+
+    def _decision(self, agent, request):
+        result = getattr(agent, request)()
+        if self._speculator is not None:
+            # The decision may have changed the state the other answers were computed from.
+            self._speculator.invalidate()
+        return result
+
+    @staticmethod
+    def _fallback(agent, request):
         try:
-            return self._agent.talk()
+            return agent.fallback(request)
         except:
-            return "OVER"
+            return None
+
+    def talk(self):
+        return self._decide("talk", "OVER")
 
     def whisper(self):
-        try:
-            return self._agent.whisper()
-        except:
-            return "OVER"
+        return self._decide("whisper", "OVER")
 
     def vote(self):
-        try:
-            return self._agent.vote()
-        except:
-            return "1"
+        return self._decide("vote", "1")
 
     def attack(self):
-        try:
-            return self._agent.attack()
-        except:
-            return "1"
+        return self._decide("attack", "1")
 
     def divine(self):
-        try:
-            return self._agent.divine()
-        except:
-            return "1"
+        return self._decide("divine", "1")
 
     def guard(self):
-        try:
-            return self._agent.guard()
-        except:
-            return "1"
+        return self._decide("guard", "1")
 
     def finish(self):
         try:
-            return self._agent.finish()
+            result = self._runner.call(self._agent.finish)
         except:
-            return "1"
\ No newline at end of file
+            result = "1"
+        if self._runner.fallbacks() > 0:
+            console("%s decisions: %s", self._name, self._runner.stats, level=INFO)
+        if self._speculator is not None:
+            console("%s speculation: %s", self._name, self._speculator.stats, level=INFO)
+        return result
+
+    def close(self):
+        if self._agent is not None:
+            self._agent.close()
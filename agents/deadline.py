@@ -0,0 +1,148 @@
+from concurrent.futures import Future, TimeoutError
+import queue
+import threading
+import time
+
+# Part of the timeLimit of the game the decisions may use, the rest is left for the diff, the update
+# and sending the response.
+DEADLINE_FRACTION = 0.7
+
+
+class _Decision(object):
+    """
+    A decision handed to the worker. The caller and the worker agree under its lock on whether its answer is
+    sent: the worker claims it before applying the side effects of the decision, the caller abandons it at the
+    deadline, whichever comes first wins.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._claimed = False
+        self._abandoned = False
+        # Set by the worker once the decision starts, a decision abandoned before it means the worker was busy.
+        self.started = False
+
+    def claim(self):
+        with self._lock:
+            if not self._abandoned:
+                self._claimed = True
+            return self._claimed
+
+    def abandon(self):
+        with self._lock:
+            if not self._claimed:
+                self._abandoned = True
+            return self._abandoned
+
+
+
+class DeadlineRunner(object):
+    """
+    Runs all the calls of an agent on a single worker thread, so the calls stay serialized and a decision
+    that takes too long can be abandoned: the caller stops waiting for it at the deadline and answers with
+    the fallback answer it was given, which was computed before the decision was queued so it's available even
+    when the worker is still busy with earlier calls. The abandoned decision keeps running on the worker and the
+    following calls wait for it, but when it was planned its side effects are never applied.
+    Counts per request how many decisions were made, how many of them missed the deadline (and, as busy, how
+    many of those never started: the worker was busy with earlier calls until the deadline), how many failed with
+    an exception and how many of the missed or failed decisions had no fallback answer and got the default.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self.stats = {}
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name="DecisionWorker", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            func, future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func())
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, func):
+        if self._thread is None:
+            self._start()
+        future = Future()
+        self._queue.put((func, future))
+        return future
+
+    def call(self, func):
+        """
+        Run the function on the worker and wait for it as long as it takes.
+        :param func:
+        :return:
+        """
+        return self.submit(func).result()
+
+    def _count(self, request, outcome):
+        counts = self.stats.setdefault(request, {"calls": 0, "timeouts": 0, "busy": 0, "errors": 0, "defaults": 0})
+        counts[outcome] += 1
+
+    def decide(self, request, plan, decision, deadline, fallback, default):
+        """
+        Make a decision on the worker. A decision is split in its plan, which chooses the answer without changing
+        the state of the agent, and the commit of its side effects, which only runs once the answer is sure to
+        be sent. A decision that can't be split is waited for as long as it takes once it started, and is made
+        even if it was abandoned before, since its side effects may be bookkeeping the agent can't skip.
+        :param request: Name of the request, used for the statistics.
+        :param plan: Returns the answer and the function that commits it (None if there is nothing to commit), or
+        None if the decision can't be split.
+        :param decision: Makes the decision in a single call, used when plan returns None.
+        :param deadline: time.perf_counter() value the answer is due by, None to wait as long as it takes.
+        :param fallback: Answer used when the decision missed the deadline or failed, None if there is none. It
+        is computed by the caller ahead (see AgentContainer), nothing is computed for it once the worker is late.
+        :param default: Answer used when there is no fallback answer.
+        :return: The result of the decision, or the fallback answer.
+        """
+        self._count(request, "calls")
+        state = _Decision()
+
+        def fallback_answer():
+            if fallback is None:
+                self._count(request, "defaults")
+                return default
+            return fallback
+
+        def run():
+            state.started = True
+            planned = plan()
+            if planned is None:
+                state.claim()
+                return decision()
+            answer, commit = planned
+            if not state.claim():
+                return None
+            if commit is not None:
+                commit()
+            return answer
+
+        future = self.submit(run)
+        timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            if state.abandon():
+                self._count(request, "timeouts")
+                if not state.started:
+                    self._count(request, "busy")
+                return fallback_answer()
+        except Exception:
+            self._count(request, "errors")
+            return fallback_answer()
+        # The worker claimed the answer before the deadline, it is sent once its side effects are applied.
+        try:
+            return future.result()
+        except Exception:
+            self._count(request, "errors")
+            return fallback_answer()
+
+    def fallbacks(self):
+        return sum(counts["timeouts"] + counts["errors"] for counts in self.stats.values())
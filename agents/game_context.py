@@ -0,0 +1,96 @@
+import itertools
+import random
+from agents.logger import Logger
+from agents.information_processing.sentences_container import SentencesContainer
+from agents.information_processing.dissection.sentence_dissector import SentenceDissector
+from agents.strategies.player_evaluation import PlayerEvaluation, WolvesPlayerEvaluation
+from agents.strategies.role_estimations import RoleEstimations
+
+# Seeds of the seats of a game are randomSeed * SEAT_SEEDS + seat, so they differ between the seats and the games.
+SEAT_SEEDS = 100
+
+# Log file of a context, named by the agent index and the number of the context in the process, so every game of
+# every table hosted by the process writes its own file.
+LOG_FILE = "log{agent}_{context}.txt"
+
+# Numbers of the contexts created by the process.
+_context_numbers = itertools.count(1)
+
+
+def game_seed(random_seed, agent_index):
+    """
+    :param random_seed: randomSeed of the game setting.
+    :param agent_index:
+    :return: Seed of the random generator of the agent with the given index in that game.
+    """
+    return int(random_seed) * SEAT_SEEDS + agent_index
+
+
+class GameContext(object):
+    """
+    Holds the state that is shared between the different parts of a single agent in a single game:
+    the logger, the sentences container, the sentence dissector, the player evaluation and the role estimations.
+    Each seat creates its own context and passes it explicitly to its strategy, so several agents (or several
+    games) can run in the same process without affecting each other.
+    The context also holds the random generator of the game, every random choice of the agent is drawn from it
+    (never from the random or numpy.random modules), so a game can be played again decision for decision.
+    """
+
+    def __init__(self, logger, rng=None):
+        """
+        :param logger: Logger of the agent that owns this context.
+        :param rng: random.Random of the game, an unseeded one if not given.
+        """
+        self.logger = logger
+        self.rng = rng if rng is not None else random.Random()
+        self.sentences_container = SentencesContainer(logger)
+        self.sentence_dissector = None
+        self.player_evaluation = None
+        self.role_estimations = None
+
+    def setup(self, agent_indices, my_index, teammates_indices=None):
+        """
+        Create the per game state, called by the strategy once it knows the players of the game.
+        :param agent_indices: Indices of the other agents in the game.
+        :param my_index: Index of my agent.
+        :param teammates_indices: Indices of my teammates, only given when we are in the werewolves team.
+        :return:
+        """
+        self.sentences_container.clean()
+        self.sentence_dissector = SentenceDissector(my_index, self.sentences_container)
+        if teammates_indices:
+            self.player_evaluation = WolvesPlayerEvaluation(agent_indices, my_index, self.logger, teammates_indices,
+                                                            self.rng)
+        else:
+            self.player_evaluation = PlayerEvaluation(agent_indices, my_index, self.logger, self.rng)
+        self.role_estimations = RoleEstimations(agent_indices, my_index)
+
+    def reset(self, agent_indices, my_index):
+        """
+        Reset the per game state at the end of the game.
+        :param agent_indices:
+        :param my_index:
+        :return:
+        """
+        self.sentences_container.clean()
+        self.player_evaluation.reset(agent_indices, my_index)
+        self.role_estimations.reset(agent_indices, my_index)
+
+    def close(self):
+        self.logger.close()
+
+    @staticmethod
+    def create(agent_index, random_seed=None, log_file=None):
+        """
+        Create the context of the agent with the given index, with the log file used by our players.
+        :param agent_index:
+        :param random_seed: randomSeed of the game setting, the generator is seeded with it and the agent index.
+        :param log_file: Log file of the context, a new LOG_FILE of the process if not given.
+        :return:
+        """
+        if log_file is None:
+            log_file = LOG_FILE.format(agent=agent_index, context=next(_context_numbers))
+        logger = Logger(log_file)
+        logger.set_agent_index(agent_index)
+        rng = random.Random(game_seed(random_seed, agent_index)) if random_seed is not None else None
+        return GameContext(logger, rng)
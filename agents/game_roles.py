@@ -16,3 +16,32 @@ class GameRoles(Enum):
 # All the roles that only one agent can have.
 SPECIAL_ROLES = ['SEER', 'BODYGUARD', 'MEDIUM']
 
+
+
+# Bit of each role (or species) that can appear in an estimation, GameRoles values share the bit of their name.
+# Roles outside of the table (roles of other game variants) all share the OTHER bit, the table never changes.
+ROLE_BITS = {role: 1 << bit for bit, role in enumerate(["VILLAGER", "WEREWOLF", "SEER", "BODYGUARD", "POSSESSED",
+                                                        "MEDIUM", "HUMAN", "ANY", "OTHER"])}
+
+OTHER_BIT = ROLE_BITS["OTHER"]
+
+
+def role_bit(role):
+    if isinstance(role, GameRoles):
+        role = str(role)
+    return ROLE_BITS.get(role, OTHER_BIT)
+
+
+def estimation_mask(roles):
+    """
+    :param roles: Roles or species of an estimation.
+    :return: Bitmask of the estimation.
+    """
+    mask = 0
+    for role in roles:
+        mask |= role_bit(role)
+    return mask
+
+
+def estimation_roles(mask):
+    return {role for role, bit in ROLE_BITS.items() if mask & bit}
@@ -1,7 +1,7 @@
 from enum import Enum
-from agents.logger import Logger
-from agents.information_processing.dissection.sentence_dissector import SentenceDissector
 from agents.information_processing.dissection.player_representation import Cooperator, Enemy
+from agents.game_roles import estimation_roles
+from agents.information_processing.perspective_store import PerspectiveStore, NO_SIDE, COOPERATOR, ENEMY
 
 MIN_SEVERITY_VAL = 1
 MAX_SEVERITY_VAL = 3
@@ -26,22 +26,24 @@ class AgentPerspective(object):
     Likely Role: The role I think that player has based on what happened thus far.
     Status: Status of the agent, is he alive or dead, if he is dead, who killed him? The townsfolk or the
     werewolves.
+    The cooperators, enemies and estimations are held in the row of this agent in a PerspectiveStore.
     """
 
-    def __init__(self, agent_idx, my_idx, num_agents, role=None):
+    def __init__(self, agent_idx, my_idx, num_agents, context, role=None, store=None):
         """
         :param agent_idx: Index of this agent.
         :param my_idx: Index of our agent.
-        :param sentences_container Container that maps talk number to a processed sentence.
-        :param player_perspective
+        :param num_agents: Number of agents in the game.
+        :param context: GameContext of our agent, holds the sentence dissector and the logger.
         :param role Role of the player if we know it from the role_map.
+        :param store: PerspectiveStore shared by the perspectives of the strategy, a new one is created if not given.
         """
         self._index = agent_idx
         self.my_agent = my_idx
+        self._context = context
         self._liar_score = 0.0
-        self._cooperators = {}
-        self._noncooperators = {idx: Enemy(idx, {}, initial_hostility=0.1) for idx in range(1, num_agents + 1) if
-                                idx != agent_idx}
+        self._store = store if store is not None else PerspectiveStore(num_agents)
+        self._store.reset_subject(agent_idx)
         self._admitted_role = None
         self._likely_role = None
         self._status = AgentStatus.ALIVE
@@ -50,8 +52,8 @@ class AgentPerspective(object):
         # Messages ordered by day that are directed to me (think these are only inquire and request messages).
         self.messages_to_me = {}
 
-        # Map each agent index to a role or list of roles we estimate them to be in.
-        self._estimations = {idx: set() for idx in range(1, num_agents + 1) if idx != agent_idx}
+        # Set when the estimations changed since the group finder last compared them.
+        self._estimations_changed = False
 
     def get_status(self):
         return self._status
@@ -60,12 +62,10 @@ class AgentPerspective(object):
         return self._index
 
     def get_closest_cooperators(self,day):
-        cooperators_fondness = [(self._cooperators[coop].get_fondness(day),coop) for coop in self._cooperators.keys()]
-        #closest_cooperator = cooperators_fondness[np.argmax(cooperators_fondness)][1]
-        return cooperators_fondness#self._cooperators[closest_cooperator]
+        return [(fondness, idx) for idx, fondness in self.get_cooperators_fondness(day).items()]
 
     def get_non_coop_count(self):
-        return len(self._noncooperators)
+        return len(self._store.targets(self._index, ENEMY))
 
     def update_status(self, status):
         self._status = status
@@ -104,30 +104,14 @@ class AgentPerspective(object):
         :param day
         :return:
         """
-        to_be_removed = []
-        for index, cooperator in self._cooperators.items():
-            total_fondness = self._cooperators[index].get_fondness(day)
-            if total_fondness <= 0:
-                Logger.instance.write("Agent " + str(index) + " switch sides! Cooperator to enemy.")
-                self._noncooperators[index] = self._cooperators[index].convert_to_enemy()
-                to_be_removed.append(index)
-
-        for idx in to_be_removed:
-            self._cooperators.pop(idx, None)
-
-        to_be_removed = []
-        for index, enemy in self._noncooperators.items():
-            total_hostility = self._noncooperators[index].get_hostility(day)
-            if total_hostility <= 0:
-                Logger.instance.write("Agent " + str(index) + " switched sides! Enemy to cooperator.")
-                self._cooperators[index] = self._noncooperators[index].convert_to_cooperator()
-                to_be_removed.append(index)
-
-        for idx in to_be_removed:
-            self._noncooperators.pop(idx, None)
+        to_enemies, to_cooperators = self._store.switch_sides(self._index, day)
+        for index in to_enemies:
+            self._context.logger.write("Agent %s switch sides! Cooperator to enemy.", index)
+        for index in to_cooperators:
+            self._context.logger.write("Agent %s switched sides! Enemy to cooperator.", index)
 
     def has_cooperator(self, idx):
-        return idx in self._cooperators
+        return self._store.has_target(idx) and self._store.side[self._index, idx] == COOPERATOR
 
     def add_message_directed_to_me(self, dissected_sentence):
         """
@@ -144,7 +128,7 @@ class AgentPerspective(object):
             self.messages_to_me[dissected_sentence.day] = [dissected_sentence]
 
     def has_estimations(self):
-        return len(self._estimations) > 0 and self._admitted_role is not None
+        return self._store.num_agents > 1 and self._admitted_role is not None
 
     def update_perspective(self, message, talk_number, day,save_sen=True):
         """
@@ -155,10 +139,10 @@ class AgentPerspective(object):
         :return:
         """
 
-        Logger.instance.write("Dissecting Message: " + str(message.original_message))
+        self._context.logger.write("Dissecting Message: %s", message.original_message)
         #print("Dissecting Message: " + str(message.original_message))
 
-        result = SentenceDissector.instance.dissect_sentence(message, talk_number, day,save_dissection=save_sen)
+        result = self._context.sentence_dissector.dissect_sentence(message, talk_number, day,save_dissection=save_sen)
 
         if result.is_hostile():
             for enemy in result.get_enemies():
@@ -166,8 +150,8 @@ class AgentPerspective(object):
         elif result.cooperator is not None:
             self.update_cooperator(result.cooperator)
         else:
-            Logger.instance.write("[AGENT " + str(self._index) + "]: Got sentence " + str(message) + " but found" +
-                                  " nothing major while trying to dissect it.")
+            self._context.logger.write("[AGENT %s]: Got sentence %s but found nothing major while trying to "
+                                       "dissect it.", self._index, message)
 
         message_to_me = result.get_messages_to_me()
         for message in message_to_me:
@@ -179,8 +163,9 @@ class AgentPerspective(object):
         idx_to_estimations = result.get_estimations()
         if len(idx_to_estimations) != 0:
             for idx, estimation in idx_to_estimations.items():
-                if idx in self._estimations:
-                    self._estimations[idx] = self._estimations[idx].union(estimation)
+                if self._store.has_target(idx) and idx != self._index:
+                    if self._store.add_estimation(self._index, idx, estimation):
+                        self._estimations_changed = True
 
                     if "WEREWOLF" in estimation:
                         self.update_enemy(Enemy(idx, {}, initial_hostility=2))
@@ -189,27 +174,47 @@ class AgentPerspective(object):
 
 
     def get_estimations(self):
-        return self._estimations
+        """
+        :return: Dict of each other agent index to the set of roles this agent estimates he has.
+        """
+        masks = self._store.estimations[self._index]
+        return {idx: estimation_roles(int(masks[idx])) for idx in range(1, self._store.num_agents + 1)
+                if idx != self._index}
+
+    def get_estimation_masks(self):
+        """
+        :return: Row of the estimations of this agent as role bitmasks, indexed by agent index.
+        """
+        return self._store.estimations[self._index]
+
+    def pop_estimations_changed(self):
+        """
+        :return: Whether the estimations changed since the last call.
+        """
+        changed = self._estimations_changed
+        self._estimations_changed = False
+        return changed
 
     def update_cooperator(self, cooperator):
-        if cooperator.index in self._cooperators.keys():
-            # Logger.instance.write("[AGENT " + str(self._index) + "]: Updating cooperator: " + str(cooperator.index))
-            self._cooperators[cooperator.index].merge_cooperators(cooperator)
-        elif cooperator.index in self._noncooperators.keys():
-            self.update_enemy(cooperator.convert_to_enemy())
-        else:
-            Logger.instance.write("[AGENT " + str(self._index) + "]: Adding a new cooperator: " + str(cooperator.index))
-            self._cooperators[cooperator.index] = cooperator
+        """
+        Merge the cooperator into this perspective, if the agent is currently an enemy the fondness of the
+        cooperator is merged as negative hostility.
+        :param cooperator:
+        :return:
+        """
+        if not self._store.has_target(cooperator.index):
+            return
+        if self._store.side[self._index, cooperator.index] == NO_SIDE:
+            self._context.logger.write("[AGENT %s]: Adding a new cooperator: %s", self._index, cooperator.index)
+        self._store.update(self._index, cooperator.index, COOPERATOR, cooperator.get_history(),
+                           cooperator.get_initial_fondness())
 
     def update_enemy(self, enemy):
-        if enemy.index in self._noncooperators.keys():
-            # Logger.instance.write("[AGENT " + str(self._index) + "]: Updating enemy: " + str(enemy.index))
-            self._noncooperators[enemy.index].merge_enemies(enemy)
-        elif enemy.index in self._cooperators.keys():
-            self.update_cooperator(enemy.convert_to_cooperator())
-        else:
-            Logger.instance.write("[AGENT " + str(self._index) + "]: Adding a new enemy: " + str(enemy.index))
-            self._noncooperators[enemy.index] = enemy
+        if not self._store.has_target(enemy.index):
+            return
+        if self._store.side[self._index, enemy.index] == NO_SIDE:
+            self._context.logger.write("[AGENT %s]: Adding a new enemy: %s", self._index, enemy.index)
+        self._store.update(self._index, enemy.index, ENEMY, enemy.get_history(), enemy.get_initial_hostility())
 
     def update_vote(self, vote):
         """
@@ -222,16 +227,26 @@ class AgentPerspective(object):
         self.update_enemy(enemy)
 
     def get_cooperators_indices(self):
-        return list(self._cooperators.keys())
+        return self._store.targets(self._index, COOPERATOR).tolist()
 
     def get_enemies_indices(self):
-        return list(self._noncooperators.keys())
+        return self._store.targets(self._index, ENEMY).tolist()
 
-    def get_cooperators(self):
-        return self._cooperators
+    def get_cooperators_fondness(self, day):
+        """
+        :param day:
+        :return: Dict of each cooperator index to its discounted fondness on the given day.
+        """
+        fondness = self._store.values(self._index, COOPERATOR, day)
+        return {int(idx): float(fondness[idx]) for idx in self._store.targets(self._index, COOPERATOR)}
 
-    def get_enemies(self):
-        return self._noncooperators
+    def get_enemies_hostility(self, day):
+        """
+        :param day:
+        :return: Dict of each enemy index to its discounted hostility on the given day.
+        """
+        hostility = self._store.values(self._index, ENEMY, day)
+        return {int(idx): float(hostility[idx]) for idx in self._store.targets(self._index, ENEMY)}
 
     def lie_detected(self):
         """
@@ -239,19 +254,19 @@ class AgentPerspective(object):
         he is a liar.
         :return:
         """
-        Logger.instance.write("Detected lie for agent: " + str(self._index))
+        self._context.logger.write("Detected lie for agent: %s", self._index)
         self._liar_score += 1
 
     def get_liar_score(self):
         return self._liar_score
 
     def log_perspective(self):
-        Logger.instance.write("Logging perspective of agent: " + str(self._index))
-        for idx, cooperator in self._cooperators.items():
-            Logger.instance.write(str(cooperator))
+        self._context.logger.write("Logging perspective of agent: %s", self._index)
+        for idx, fondness in self.get_cooperators_fondness(None).items():
+            self._context.logger.write("Cooperator index: %s  total fondness %s", idx, fondness)
 
-        for idx, enemy in self._noncooperators.items():
-            Logger.instance.write(str(enemy))
+        for idx, hostility in self.get_enemies_hostility(None).items():
+            self._context.logger.write("Enemy index: %s  total hostility %s", idx, hostility)
 
     def update_vote_score(self, value):
         if abs(value) < MIN_SEVERITY_VAL or abs(value) > MAX_SEVERITY_VAL:
@@ -10,6 +10,41 @@ HOSTILITY_DISCOUNT_FACTOR = 0.9
 FONDNESS_DISCOUNT_FACTOR = 0.9
 
 
+def message_identity(message):
+    """
+    Two messages with the same identity are counted once when cooperators or enemies are merged.
+    :param message:
+    :return:
+    """
+    return message.day, message.type, message.subject, getattr(message, 'target', None)
+
+
+class DiscountedSum(object):
+    """
+    Running value of the sum of value * discount ^ (current_day - message_day) over all added values.
+    The sum is kept discounted to the last day it was read on, so when the day advances it is re-discounted
+    by a single multiplication instead of going over the whole history.
+    """
+
+    def __init__(self, discount):
+        self._discount = discount
+        self._day = None
+        self._total = 0.0
+
+    def add(self, value, day):
+        if self._day is None:
+            self._day = day
+        self._total += pow(self._discount, self._day - day) * value
+
+    def get(self, current_day):
+        if self._day is None:
+            return 0.0
+        if current_day != self._day:
+            self._total *= pow(self._discount, current_day - self._day)
+            self._day = current_day
+        return self._total
+
+
 class Cooperator(object):
     """
     Defines a cooperator that we have throughout the game. This is defined by several events that we find
@@ -24,9 +59,17 @@ class Cooperator(object):
     def __init__(self, index, history, initial_fondness = 0.0):
         self.index = index
         self._fondness_history = history
-        self._was_updated = False
         self._total_fondness = initial_fondness
         self._initial_fondness = initial_fondness
+        self._fondness = DiscountedSum(FONDNESS_DISCOUNT_FACTOR)
+        self._messages = set()
+        for messages_fondness in history.values():
+            for message_fondness in messages_fondness:
+                self._add(message_fondness)
+
+    def _add(self, message_fondness):
+        self._messages.add(message_identity(message_fondness.message))
+        self._fondness.add(message_fondness.fondness, message_fondness.message.day)
 
     def update_fondness(self, fondness, message):
         message_fondness = MessageFondness(message, fondness)
@@ -44,7 +87,7 @@ class Cooperator(object):
             self._fondness_history[message_fondness.message.day].append(message_fondness)
         else:
             self._fondness_history[message_fondness.message.day] = [message_fondness]
-        self._was_updated = True
+        self._add(message_fondness)
         return self
 
     def has_message_fondness(self, message_fondness):
@@ -53,16 +96,7 @@ class Cooperator(object):
         :param message_fondness:
         :return:
         """
-        message = message_fondness.message
-        if message.day in self._fondness_history.keys():
-            for curr_fondness in self._fondness_history[message_fondness.message.day]:
-                curr_message = curr_fondness.message
-
-                if message.type == curr_message.type and message.subject == curr_message.subject \
-                        and message.target == curr_message.target:
-                    return True
-
-        return False
+        return message_identity(message_fondness.message) in self._messages
 
 
     def merge_cooperators(self, cooperator):
@@ -82,17 +116,12 @@ class Cooperator(object):
     def get_history(self):
         return self._fondness_history
 
+    def get_initial_fondness(self):
+        return self._initial_fondness
+
     def get_fondness(self, current_day):
-        if not self._was_updated:
-            return self._total_fondness
-        else:
-            self._total_fondness = self._initial_fondness
-            for day, messages_fondness in self._fondness_history.items():
-                distance = current_day - day
-                for message_fondness in messages_fondness:
-                    self._total_fondness += pow(FONDNESS_DISCOUNT_FACTOR, distance) * message_fondness.fondness
-            self._was_updated = False
-            return self._total_fondness
+        self._total_fondness = self._initial_fondness + self._fondness.get(current_day)
+        return self._total_fondness
 
     def __eq__(self, other):
         return self.index == other.index
@@ -129,7 +158,15 @@ class Enemy(object):
         self._hostility_history = history
         self._initial_hostility = initial_hostility
         self._total_hostility = initial_hostility
-        self._was_updated = False
+        self._hostility = DiscountedSum(HOSTILITY_DISCOUNT_FACTOR)
+        self._messages = set()
+        for message_hostilities in history.values():
+            for message_hostility in message_hostilities:
+                self._add(message_hostility)
+
+    def _add(self, message_hostility):
+        self._messages.add(message_identity(message_hostility.message))
+        self._hostility.add(message_hostility.hostility, message_hostility.message.day)
 
     def update_hostility(self, hostility, message):
         message_hostility = MessageHostility(message, hostility)
@@ -141,7 +178,7 @@ class Enemy(object):
         else:
             self._hostility_history[message_hostility.message.day] = [message_hostility]
 
-        self._was_updated = True
+        self._add(message_hostility)
         return self
 
     def get_hostility(self, current_day):
@@ -149,16 +186,8 @@ class Enemy(object):
         Compute the total hostility based on  a discounted sum.
         :return:
         """
-        if not self._was_updated:
-            return self._total_hostility
-        else:
-            self._total_hostility = self._initial_hostility
-            for day, message_hostilities in self._hostility_history.items():
-                distance = current_day - day
-                for message_hostility in message_hostilities:
-                    self._total_hostility += pow(HOSTILITY_DISCOUNT_FACTOR, distance) * message_hostility.hostility
-            self._was_updated = False
-            return self._total_hostility
+        self._total_hostility = self._initial_hostility + self._hostility.get(current_day)
+        return self._total_hostility
 
     def has_message_hostility(self, message_hostility):
         """
@@ -166,20 +195,14 @@ class Enemy(object):
         :param message_hostility:
         :return:
         """
-        message = message_hostility.message
-        if message.day in self._hostility_history.keys():
-            for curr_hostility in self._hostility_history[message_hostility.message.day]:
-                curr_message = curr_hostility.message
-
-                if message.type == curr_message.type and message.subject == curr_message.subject \
-                    and message.target == curr_message.target:
-                    return True
-
-        return False
+        return message_identity(message_hostility.message) in self._messages
 
     def get_history(self):
         return self._hostility_history
 
+    def get_initial_hostility(self):
+        return self._initial_hostility
+
     def merge_enemies(self, enemy):
         """
         Merge two Enemy objects of agent with the same index to an enemy object
@@ -217,7 +240,6 @@ class Enemy(object):
         for day, message_hostilities in self._hostility_history.items():
             for message_hostility in message_hostilities:
                 message_hostility._replace(hostility=message_hostility.hostility * factor)
-        self._was_updated = True
         return self
 
 
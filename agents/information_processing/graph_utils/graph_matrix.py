@@ -0,0 +1,149 @@
+import numpy as np
+
+
+class GraphMatrix(object):
+    """
+    Dense representation of the game graph. Each player gets a row and a column, like[i, j] (hate[i, j]) holds
+    the weight of the LIKE (HATE) edge from the i'th player to the j'th player and the masks tell which edges exist.
+    An edge is mutual when the edge in the opposite direction exists with the same type, this is what the
+    undirected edges of the PlayerNode objects represent.
+    All the queries of the graph (evaluations, top cooperators, haters) are done with matrix operations against
+    the weight vector of the PlayerEvaluation.
+    """
+
+    def __init__(self, indices):
+        """
+        :param indices: Indices of all the players in the graph.
+        """
+        self.indices = sorted(indices)
+        self._positions = {idx: position for position, idx in enumerate(self.indices)}
+        num_players = len(self.indices)
+        self.like = np.zeros((num_players, num_players))
+        self.hate = np.zeros((num_players, num_players))
+        self.like_mask = np.zeros((num_players, num_players), dtype=bool)
+        self.hate_mask = np.zeros((num_players, num_players), dtype=bool)
+        self.mutual = np.zeros((num_players, num_players), dtype=bool)
+
+    def clean(self):
+        self.like.fill(0)
+        self.hate.fill(0)
+        self.like_mask.fill(False)
+        self.hate_mask.fill(False)
+        self.mutual.fill(False)
+
+    def has_player(self, idx):
+        return idx in self._positions
+
+    def position(self, idx):
+        return self._positions[idx]
+
+    def set_edge(self, from_index, to_index, weight, hostile):
+        """
+        Set the weight of the edge between two players, a player can have a single edge toward other player
+        so the edge of the other type is removed.
+        :param from_index:
+        :param to_index:
+        :param weight:
+        :param hostile: True for a HATE edge, False for a LIKE edge.
+        :return:
+        """
+        i = self._positions[from_index]
+        j = self._positions[to_index]
+        if hostile:
+            self.hate[i, j] = weight
+            self.hate_mask[i, j] = True
+            self.like[i, j] = 0
+            self.like_mask[i, j] = False
+        else:
+            self.like[i, j] = weight
+            self.like_mask[i, j] = True
+            self.hate[i, j] = 0
+            self.hate_mask[i, j] = False
+        self._update_mutual(i, j)
+
+    def remove_edge(self, from_index, to_index):
+        i = self._positions[from_index]
+        j = self._positions[to_index]
+        self.like[i, j] = 0
+        self.hate[i, j] = 0
+        self.like_mask[i, j] = False
+        self.hate_mask[i, j] = False
+        self._update_mutual(i, j)
+
+    def _update_mutual(self, i, j):
+        """
+        An edge is mutual if both players have an edge of the same type toward each other, only the pair
+        of the edge that was written can change.
+        :param i:
+        :param j:
+        :return:
+        """
+        mutual = (self.like_mask[i, j] and self.like_mask[j, i]) or (self.hate_mask[i, j] and self.hate_mask[j, i])
+        self.mutual[i, j] = mutual
+        self.mutual[j, i] = mutual
+
+    def has_edges(self, idx):
+        position = self._positions[idx]
+        return bool(self.like_mask[position].any() or self.hate_mask[position].any() or
+                    self.like_mask[:, position].any() or self.hate_mask[:, position].any())
+
+    def evaluations(self, factors, liked_scale, hate_scale):
+        """
+        Evaluate all the players at once. Edges in both directions count, so the score of a player is
+        the sum of the weights of his edges (scaled by the edge type) times the factor of the other player.
+        :param factors: Factor of each player (the weight vector or its inverse).
+        :param liked_scale: Scale of LIKE edges.
+        :param hate_scale: Scale of HATE edges.
+        :return: Array with the evaluation of each player.
+        """
+        scaled = liked_scale * (self.like + self.like.T) + hate_scale * (self.hate + self.hate.T)
+        return scaled.dot(factors)
+
+    def top_k_cooperators(self, idx, k, weights):
+        """
+        Score every player connected to the given player by the LIKE weight of the edge between them times his
+        weight in the evaluation. Mutual edges use the weight of both directions, otherwise the outgoing edge comes
+        before the incoming one.
+        :param idx:
+        :param k:
+        :param weights: Weight vector of the players.
+        :return: Indices of the k players with lowest score, players with score 0 are dropped.
+        """
+        position = self._positions[idx]
+        outgoing = self.like_mask[position] | self.hate_mask[position]
+        incoming = self.like_mask[:, position] | self.hate_mask[:, position]
+        connected = outgoing | incoming
+
+        scores = np.where(outgoing, self.like[position], self.like[:, position])
+        scores = np.where(self.mutual[position], self.like[position] + self.like[:, position], scores)
+        scores = scores * weights
+
+        candidates = np.flatnonzero(connected)
+        ordered = candidates[np.argsort(scores[candidates], kind='stable')][:k]
+        return [self.indices[position] for position in ordered if scores[position] != 0]
+
+    def count_edges(self, idx, hostile, min_weight):
+        """
+        Count incoming and mutual edges of the given type with weight above min_weight.
+        :param idx:
+        :param hostile:
+        :param min_weight:
+        :return:
+        """
+        position = self._positions[idx]
+        weights, mask = (self.hate, self.hate_mask) if hostile else (self.like, self.like_mask)
+        mutual = self.mutual[position] & mask[position]
+        incoming = mask[:, position] & ~self.mutual[:, position] & (weights[:, position] > min_weight)
+        mutual_weights = weights[position] + weights[:, position]
+        return int(np.count_nonzero(incoming) + np.count_nonzero(mutual & (mutual_weights > min_weight)))
+
+    def haters(self, idx):
+        """
+        :param idx:
+        :return: Dict of player index to the weight of his HATE edge toward the given player.
+        """
+        position = self._positions[idx]
+        mutual = self.mutual[position] & self.hate_mask[position]
+        incoming = self.hate_mask[:, position] & ~self.mutual[:, position]
+        weights = np.where(mutual, self.hate[position] + self.hate[:, position], self.hate[:, position])
+        return {self.indices[other]: weights[other] for other in np.flatnonzero(mutual | incoming)}
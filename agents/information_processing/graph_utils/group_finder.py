@@ -1,9 +1,9 @@
 from agents.logger import Logger
 from enum import Enum
-from agents.strategies.player_evaluation import PlayerEvaluation
 from agents.information_processing.dissection.player_representation import Cooperator, Enemy
-from agents.strategies.role_estimations import RoleEstimations
-from collections import Counter
+from agents.information_processing.graph_utils.graph_matrix import GraphMatrix
+from agents.game_roles import role_bit
+import numpy as np
 from operator import itemgetter
 
 
@@ -23,32 +23,60 @@ class PlayerNode(object):
     Class that holds connection of agents in the game.
     """
 
-    def __init__(self, idx):
+    def __init__(self, idx, context):
         self.index = idx
+        self._context = context
 
 
         # Use the role for visualization
         self.role = None
+        # GraphMatrix of the GroupFinder that built this node, the queries of the node are answered by it
+        # and the edge dicts are kept as a view of the same edges.
+        self.matrix = None
         self.clean()
 
-    def update_mutual_edges(self):
+    def add_directed_edge(self, from_index, to_index, weight, edge_type):
         """
-        Go over all of the outgoing and incoming edges and find undirected edges.
+        Add a directed edge that starts or ends in this node, replaces the previous weight of the edge.
+        :param from_index:
+        :param to_index:
+        :param weight:
+        :param edge_type:
         :return:
         """
-        common = []
-        for first_edge in self.outgoing_edges.keys():
-            for second_edge in self.incoming_edges.keys():
-                if first_edge[0] == second_edge[1] and first_edge[1] == second_edge[0] and \
-                        first_edge[3] == second_edge[3] and first_edge[4] == second_edge[4]:
-                    common.append((GameGraph.Edge(*first_edge), GameGraph.Edge(*second_edge)))
+        self.remove_directed_edge(from_index, to_index, edge_type)
+        edge = GameGraph.Edge(from_index, to_index, weight, edge_type).get_hashable_type()
+        if from_index == self.index:
+            self.outgoing_edges[edge] = weight
+        else:
+            self.incoming_edges[edge] = weight
+        self._directed_edges[(from_index, to_index, edge_type)] = edge
+
+    def remove_directed_edge(self, from_index, to_index, edge_type):
+        edge = self._directed_edges.pop((from_index, to_index, edge_type), None)
+        if edge is not None:
+            if from_index == self.index:
+                del self.outgoing_edges[edge]
+            else:
+                del self.incoming_edges[edge]
 
-        self.undirected_edges = set()
-        for edge_tuple in common:
-            del self.outgoing_edges[edge_tuple[0].get_hashable_type()]
-            del self.incoming_edges[edge_tuple[1].get_hashable_type()]
+    def set_undirected_edge(self, other_index, weight, edge_type):
+        """
+        Set the mutual edge between this node and other node, its weight is the sum of the weights of both edges.
+        :param other_index:
+        :param weight:
+        :param edge_type:
+        :return:
+        """
+        self.remove_undirected_edge(other_index, edge_type)
+        edge = GameGraph.Edge(self.index, other_index, weight, edge_type, True)
+        self.undirected_edges.add(edge)
+        self._undirected_edges[(other_index, edge_type)] = edge
 
-            self.undirected_edges.add(GameGraph.Edge.get_as_multi_directional(*edge_tuple))
+    def remove_undirected_edge(self, other_index, edge_type):
+        edge = self._undirected_edges.pop((other_index, edge_type), None)
+        if edge is not None:
+            self.undirected_edges.discard(edge)
 
     def set_up_references(self, player_nodes):
         for idx, node in player_nodes.items():
@@ -66,9 +94,13 @@ class PlayerNode(object):
         return cnt
 
     def num_cooperators(self):
+        if self.matrix is not None:
+            return self.matrix.count_edges(self.index, False, 2)
         return self._count_edges_of_type(EdgeType.LIKE)
 
     def num_haters(self):
+        if self.matrix is not None:
+            return self.matrix.count_edges(self.index, True, 2)
         return self._count_edges_of_type(EdgeType.HATE)
 
     def is_connected(self):
@@ -79,6 +111,9 @@ class PlayerNode(object):
         self.incoming_edges = {}
         self.undirected_edges = set()
         self.edges_references = {}
+        # Index of the edges above by (from_index, to_index, type) and by (other_index, type).
+        self._directed_edges = {}
+        self._undirected_edges = {}
 
     def get_incoming_edges(self):
         return self._convert_to_edges(self.incoming_edges)
@@ -93,6 +128,12 @@ class PlayerNode(object):
         return self._convert_to_edges(self.outgoing_edges)
 
     def get_top_k_cooperators(self, k):
+        if self.matrix is not None:
+            res = self.matrix.top_k_cooperators(self.index, k,
+                                                self._context.player_evaluation.get_weights(self.matrix.indices))
+            self._context.logger.write("top k: %s", res)
+            return res
+
         cooperators_weights = {}
 
         for edge in self.get_incoming_edges():
@@ -106,11 +147,11 @@ class PlayerNode(object):
             cooperators_weights[idx] = edge.weight if edge.type == EdgeType.LIKE else 0
 
         for idx in cooperators_weights.keys():
-            cooperators_weights[idx] *= PlayerEvaluation.instance.get_weight(idx)
+            cooperators_weights[idx] *= self._context.player_evaluation.get_weight(idx)
 
         res = [cooperator_weight[0] for cooperator_weight in sorted(cooperators_weights.items(), key=itemgetter(1))[:k]]
 
-        Logger.instance.write("top k: " + str(res))
+        self._context.logger.write("top k: %s", res)
         return [idx for idx in res if cooperators_weights[idx] != 0]
 
     def evaluate(self, reversed_context=False):
@@ -125,9 +166,17 @@ class PlayerNode(object):
         :return:
         """
 
+        if self.matrix is not None:
+            factors = self._context.player_evaluation.get_weights(self.matrix.indices)
+            if not reversed_context:
+                factors = 1 / factors
+            evaluation = float(self.matrix.evaluations(factors, LIKED_SCALE, HATE_SCALE)[self.matrix.position(self.index)])
+            self._context.logger.write("Evaluating node %d got evaluation score of %s", self.index, evaluation)
+            return evaluation
+
         evaluation = 0.0
 
-        factor_func = lambda agent_idx: 1 / PlayerEvaluation.instance.get_weight(agent_idx) if not reversed_context else PlayerEvaluation.instance.get_weight(agent_idx)
+        factor_func = lambda agent_idx: 1 / self._context.player_evaluation.get_weight(agent_idx) if not reversed_context else self._context.player_evaluation.get_weight(agent_idx)
 
         for edge in self.get_incoming_edges():
             if edge.type == EdgeType.LIKE:
@@ -149,7 +198,7 @@ class PlayerNode(object):
             else:
                 evaluation += HATE_SCALE * edge.weight * factor_func(edge.to_index)
 
-        Logger.instance.write("Evaluating node " + str(self.index) + " got evaluation score of " + str(evaluation))
+        self._context.logger.write("Evaluating node %d got evaluation score of %s", self.index, evaluation)
 
         return evaluation
 
@@ -160,6 +209,9 @@ class PlayerNode(object):
         :return:
         """
         # You know your agent is awesome when he has haters. Its a fact.
+        if self.matrix is not None:
+            return self.matrix.haters(self.index)
+
         haters = {}
 
         for edge in self.get_incoming_edges():
@@ -179,8 +231,10 @@ class GameGraph(object):
     Representation of the graph of the game.
     """
 
-    def __init__(self):
+    def __init__(self, context, matrix=None):
         self._nodes = {}
+        self._context = context
+        self._matrix = matrix
 
     def num_nodes(self):
         return len(self._nodes)
@@ -271,7 +325,15 @@ class GameGraph(object):
         :return:
         """
         evaluations = {}
-        relevant_players = PlayerEvaluation.instance.get_relevant_players()
+        relevant_players = self._context.player_evaluation.get_relevant_players()
+        if self._matrix is not None:
+            factors = 1 / self._context.player_evaluation.get_weights(self._matrix.indices)
+            scores = self._matrix.evaluations(factors, LIKED_SCALE, HATE_SCALE)
+            for idx in self._nodes.keys():
+                if idx in relevant_players:
+                    evaluations[idx] = float(scores[self._matrix.position(idx)])
+            return evaluations
+
         for idx, node in self._nodes.items():
             if idx in relevant_players:
                 evaluations[idx] = node.evaluate()
@@ -306,6 +368,9 @@ class GameGraph(object):
                             perspectives[cooperator_idx].update_cooperator(Cooperator(curr_idx, {}, cooperator_weight))
 
     def log(self):
+        self._context.logger.write(self._log_string)
+
+    def _log_string(self):
         repr_str = "<<<<<< GameGraph Log >>>>>>>>>" + '\n' * 2
         for idx, node in self._nodes.items():
             repr_str += '\t' + "<<<<<<< Graph Node " + str(idx) + " >>>>>" + '\n' * 2
@@ -321,7 +386,7 @@ class GameGraph(object):
             repr_str += '\t' + "<<<<<<< End Graph Node >>>" + '\n' * 2
 
         repr_str += "<<<<< End GameGraph Log >>>>" + '\n'
-        Logger.instance.write(repr_str)
+        return repr_str
 
 
 def get_edges(hashable_types):
@@ -333,8 +398,16 @@ def get_edges(hashable_types):
 
 class GroupFinder(object):
 
-    def __init__(self, indices, my_index):
-        self._agents_nodes = {idx: PlayerNode(idx) for idx in indices}
+    def __init__(self, indices, my_index, context):
+        self._agents_nodes = {idx: PlayerNode(idx, context) for idx in indices}
+        # Weight of every directed edge in the graph by (from_index, to_index, type).
+        self._edges = {}
+        self._matrix = GraphMatrix(indices)
+        for node in self._agents_nodes.values():
+            node.matrix = self._matrix
+        self._context = context
+        # Number of perspective pairs compared and skipped by compare_estimations.
+        self.estimation_pairs = {"skipped": 0, "executed": 0}
         self._player_roles = {}
         self.index = my_index
 
@@ -342,14 +415,60 @@ class GroupFinder(object):
         self._player_roles[idx] = role
 
 
-    def find_mutual_connections(self):
+    def _update_connection(self, first_index, second_index, edge_type):
+        """
+        Write the edges of the given type between two players to their nodes, the connection is mutual
+        if both agents have the same feelings toward each other.
+        :param first_index:
+        :param second_index:
+        :param edge_type:
+        :return:
+        """
+        first_node = self._agents_nodes[first_index]
+        second_node = self._agents_nodes[second_index]
+        for node in (first_node, second_node):
+            node.remove_directed_edge(first_index, second_index, edge_type)
+            node.remove_directed_edge(second_index, first_index, edge_type)
+        first_node.remove_undirected_edge(second_index, edge_type)
+        second_node.remove_undirected_edge(first_index, edge_type)
+
+        first_weight = self._edges.get((first_index, second_index, edge_type))
+        second_weight = self._edges.get((second_index, first_index, edge_type))
+        if first_weight is not None and second_weight is not None:
+            first_node.set_undirected_edge(second_index, first_weight + second_weight, edge_type)
+            second_node.set_undirected_edge(first_index, first_weight + second_weight, edge_type)
+        elif first_weight is not None:
+            first_node.add_directed_edge(first_index, second_index, first_weight, edge_type)
+            second_node.add_directed_edge(first_index, second_index, first_weight, edge_type)
+        elif second_weight is not None:
+            first_node.add_directed_edge(second_index, first_index, second_weight, edge_type)
+            second_node.add_directed_edge(second_index, first_index, second_weight, edge_type)
+
+    def set_edge(self, from_index, to_index, weight, edge_type):
         """
-        Given the fames of each agent, find connections which are mutual,  meaning that both
-        agents have the same feelings toward each other.
+        Set the edge between two players, an agent has at most one edge toward other agent so an edge of the
+        other type is removed. Only the nodes of the two players are touched.
+        :param from_index:
+        :param to_index:
+        :param weight:
+        :param edge_type:
         :return:
         """
-        for idx, node in self._agents_nodes.items():
-            node.update_mutual_edges()
+        if self._edges.get((from_index, to_index, edge_type)) == weight:
+            return
+
+        other_type = EdgeType.HATE if edge_type == EdgeType.LIKE else EdgeType.LIKE
+        if self._edges.pop((from_index, to_index, other_type), None) is not None:
+            self._update_connection(from_index, to_index, other_type)
+
+        self._edges[(from_index, to_index, edge_type)] = weight
+        self._update_connection(from_index, to_index, edge_type)
+        self._matrix.set_edge(from_index, to_index, weight, edge_type == EdgeType.HATE)
+
+    def remove_edge(self, from_index, to_index, edge_type):
+        if self._edges.pop((from_index, to_index, edge_type), None) is not None:
+            self._update_connection(from_index, to_index, edge_type)
+            self._matrix.remove_edge(from_index, to_index)
 
     def find_groups(self, perspectives, day):
         """
@@ -362,13 +481,15 @@ class GroupFinder(object):
         :return:
         """
         self.compare_estimations(perspectives)
+        edges = set()
         for index, perspective in perspectives.items():
-            self.update_edges(index, perspective.get_cooperators(), EdgeType.LIKE,
-                              lambda cooperator: cooperator.get_fondness(day))
-            self.update_edges(index, perspective.get_enemies(), EdgeType.HATE,
-                              lambda enemy: enemy.get_hostility(day))
+            edges.update(self.update_edges(index, perspective.get_cooperators_fondness(day), EdgeType.LIKE))
+            edges.update(self.update_edges(index, perspective.get_enemies_hostility(day), EdgeType.HATE))
+
+        # Edges of players that are no longer cooperators or enemies in the perspectives.
+        for edge in [edge for edge in self._edges.keys() if edge not in edges]:
+            self.remove_edge(*edge)
 
-        self.find_mutual_connections()
         return self.build_graph(perspectives)
 
 
@@ -376,58 +497,66 @@ class GroupFinder(object):
         """
         Compare estimations of roles based on the agent perspective and my estimation of roles
         and add new cooperators based on it.
+        Pairs of perspectives whose estimations didn't change since the last comparison already got their
+        cooperators, so only pairs with at least one changed perspective are compared again.
+        Estimations are held as role bitmasks, so all the pairs are compared at once with a single array equality.
         :param perspectives:
         :return:
         """
-        for idx, perspective in perspectives.items():
-            estimations = perspective.get_estimations()
-
-            for other_idx, other_perspective in perspectives.items():
-                if idx != other_idx:
-                    other_estimations = other_perspective.get_estimations()
-
-                    for estimation_idx, estimation in estimations.items():
-                        if len(estimation) != 0:
-                            if estimation_idx in other_estimations:
-
-                                if len(Counter(estimation)) != 0 and Counter(estimation) == Counter(other_estimations[estimation_idx]):
-                                    Logger.instance.write("Players: " + str(idx) + "," + str(other_idx) + " have similar"
-                                    " estimations for player " + str(estimation_idx) + ": "  + str(estimation))
-                                    perspective.update_cooperator(Cooperator(other_idx, {}, 2))
-                                    other_perspective.update_cooperator(Cooperator(other_idx, {}, 2))
-
-
-            # Also compare to my own estimations to find cooperators.
-            for estimation_idx, estimation in estimations.items():
-                if len(estimation) != 0:
-
-                    if estimation_idx == self.index:
-                        if "HUMAN" in estimation:
-                            PlayerEvaluation.instance.thinks_im_human(idx)
-                        elif "WEREWOLF" in estimation:
-                            PlayerEvaluation.instance.thinks_im_werewolf(idx)
-                    else:
-                        my_estimation = RoleEstimations.instance.get_estimations(estimation_idx)
-                        if len(my_estimation) != 0 and Counter(estimation) == Counter(my_estimation):
-                            Logger.instance.write("Me and player " + str(idx) + " have similar estimations regarding"
-                                                "agent " + str(estimation_idx) + " which are:" + str(my_estimation))
-                            perspective.update_cooperator(Cooperator(RoleEstimations.instance.get_my_index(), {}, 2))
-
-
-    def update_edges(self, from_index, nodes, edge_type, get_weight_func):
+        if len(perspectives) == 0:
+            return
+        indices = list(perspectives.keys())
+        changed = np.array([perspectives[idx].pop_estimations_changed() for idx in indices])
+        # Row i holds the estimations of the i'th perspective as role bitmasks, indexed by the estimated agent.
+        estimations = np.stack([perspectives[idx].get_estimation_masks() for idx in indices])
+
+        # similar[i, j, k] is set when players i and j have the same non empty estimation for player k.
+        similar = (estimations[:, None, :] == estimations[None, :, :]) & (estimations[:, None, :] != 0)
+        compared = (changed[:, None] | changed[None, :]) & ~np.eye(len(indices), dtype=bool)
+        self.estimation_pairs["executed"] += int(np.count_nonzero(compared))
+        self.estimation_pairs["skipped"] += len(indices) * (len(indices) - 1) - int(np.count_nonzero(compared))
+
+        for i, j in zip(*np.nonzero(compared & similar.any(axis=2))):
+            idx, other_idx = indices[i], indices[j]
+            self._context.logger.write(lambda: "Players: " + str(idx) + "," + str(other_idx) + " have similar "
+                                       "estimations for players " +
+                                       str([int(k) for k in np.flatnonzero(similar[i, j])]))
+            perspectives[idx].update_cooperator(Cooperator(other_idx, {}, 2))
+            perspectives[other_idx].update_cooperator(Cooperator(other_idx, {}, 2))
+
+        # Also compare to my own estimations to find cooperators.
+        my_estimations = self._context.role_estimations.get_estimation_masks(estimations.shape[1])
+        if self.index < estimations.shape[1]:
+            my_estimations[self.index] = 0
+            thinks_im_human = (estimations[:, self.index] & role_bit("HUMAN")) != 0
+            thinks_im_werewolf = ~thinks_im_human & ((estimations[:, self.index] & role_bit("WEREWOLF")) != 0)
+            for i in np.flatnonzero(thinks_im_human):
+                self._context.player_evaluation.thinks_im_human(indices[i])
+            for i in np.flatnonzero(thinks_im_werewolf):
+                self._context.player_evaluation.thinks_im_werewolf(indices[i])
+
+        similar_to_me = (estimations == my_estimations[None, :]) & (my_estimations[None, :] != 0)
+        for i in np.flatnonzero(similar_to_me.any(axis=1)):
+            self._context.logger.write(lambda: "Me and player " + str(indices[i]) + " have similar estimations "
+                                       "regarding agents " + str([int(k) for k in np.flatnonzero(similar_to_me[i])]))
+            perspectives[indices[i]].update_cooperator(Cooperator(self._context.role_estimations.get_my_index(), {}, 2))
+
+
+    def update_edges(self, from_index, weights, edge_type):
         """
         Update the edges of the player nodes in the game graph based on the results in the players perspectives.
+        Edges whose weight didn't change are left as is.
         :param from_index:
-        :param nodes:
+        :param weights: Dict of player index to the weight of the edge toward him.
         :param edge_type:
-        :param get_weight_func:
-        :return:
+        :return: Keys of the edges that were written.
         """
-        for to_index, node in nodes.items():
-            curr_edge = GameGraph.Edge(from_index, to_index, get_weight_func(node), edge_type)
-            if to_index in self._agents_nodes and from_index in self._agents_nodes and curr_edge.get_hashable_type() in self._agents_nodes[to_index].incoming_edges and curr_edge.get_hashable_type() in self._agents_nodes[from_index].outgoing_edges:
-                self._agents_nodes[to_index].incoming_edges[curr_edge.get_hashable_type()] = curr_edge.weight
-                self._agents_nodes[from_index].outgoing_edges[curr_edge.get_hashable_type()] = curr_edge.weight
+        edges = []
+        for to_index, weight in weights.items():
+            if to_index in self._agents_nodes and from_index in self._agents_nodes and to_index != from_index:
+                self.set_edge(from_index, to_index, weight, edge_type)
+                edges.append((from_index, to_index, edge_type))
+        return edges
 
     def build_graph(self, perspectives):
         """
@@ -435,7 +564,7 @@ class GroupFinder(object):
         :param perspectives
         :return:
         """
-        graph = GameGraph()
+        graph = GameGraph(self._context, self._matrix)
         for index, node in self._agents_nodes.items():
             if index in self._player_roles.keys():
                 node.role = self._player_roles[index]
@@ -444,4 +573,6 @@ class GroupFinder(object):
 
     def clean_groups(self):
         for node in self._agents_nodes.values():
-            node.clean()
\ No newline at end of file
+            node.clean()
+        self._edges = {}
+        self._matrix.clean()
\ No newline at end of file
@@ -1,6 +1,5 @@
 from agents.game_roles import *
 from agents.tasks.admitted_role_task import AdmittedRoleTask
-from agents.strategies.player_evaluation import PlayerEvaluation
 
 # Importance of the task of two lying agents detected.
 ADMITTED_ROLE_IMPORTANCE = 1.0
@@ -14,9 +13,10 @@ class LieDetector(object):
     one of the agents is lying. This will help us know the trustworthiness of other agents in the game.
     """
 
-    def __init__(self, my_index, agent_indices, role):
+    def __init__(self, my_index, agent_indices, role, context):
         self.index = my_index
         self.role = role
+        self._context = context
         self._agent_lies = {}
         for idx in agent_indices:
             self._agent_lies[idx] = []
@@ -59,13 +59,14 @@ class LieDetector(object):
                     agent_indices.append(player_index)
 
                 importance = MY_ADMITTED_ROLE_IMPORTANCE if self.index in agent_indices else ADMITTED_ROLE_IMPORTANCE
-                tasks.append(AdmittedRoleTask(importance, day, agent_indices, role, admitted_refs, self.index))
+                tasks.append(AdmittedRoleTask(importance, day, agent_indices, role, admitted_refs, self.index,
+                                              self._context.role_estimations))
 
                 # Update the perspectives of players, let them know we found a lie.
                 for idx in agent_indices:
                     if idx != self.index:
                         perspectives[idx].lie_detected()
-                        PlayerEvaluation.instance.player_lied(idx, agent_indices)
+                        self._context.player_evaluation.player_lied(idx, agent_indices)
 
         return tasks
 
@@ -73,18 +74,20 @@ if __name__ == "__main__":
     # Create two perspectives and check if the matching works
     from agents.logger import Logger
     from agents.game_roles import GameRoles
+    from agents.game_context import GameContext
     from agents.information_processing.agent_perspective import AgentPerspective
-    Logger("log.txt")
+    context = GameContext(Logger("log.txt"))
+    context.setup([1, 2], 10)
 
-    first_persp = AgentPerspective(1, 10)
+    first_persp = AgentPerspective(1, 10, 3, context)
     first_persp._admitted_role = {"role": GameRoles.SEER, "reason": "Lior is the king."}
 
-    second_persp = AgentPerspective(2, 10)
+    second_persp = AgentPerspective(2, 10, 3, context)
     second_persp._admitted_role = {"role": GameRoles.SEER, "reason": "Joseph is the king"}
 
     perspectives = {1: first_persp, 2: second_persp}
 
-    lie_detector = LieDetector(10, [1,2], str(GameRoles.SEER))
+    lie_detector = LieDetector(10, [1,2], str(GameRoles.SEER), context)
     tasks = lie_detector.find_matching_admitted_roles(perspectives, 1)
 
     print(tasks[0].handle_task())
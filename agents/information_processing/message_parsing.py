@@ -1,6 +1,8 @@
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from enum import Enum
 from math import ceil, floor
+import threading
+from agents.logger import console, ERROR
 
 class Species(Enum):
     HUMANS = 1,
@@ -9,6 +11,11 @@ class Species(Enum):
 # Just because we hate magic numbers
 DAY_STRING_LENGTH = len("Day")
 
+# Bits of the turn and of the index in a packed talk number, the day takes the bits above them.
+TALK_NUMBER_FIELD_BITS = 12
+
+TALK_NUMBER_FIELD_MASK = (1 << TALK_NUMBER_FIELD_BITS) - 1
+
 def append_zero(num, required_digits=2):
     """
     Given a number append a zero to it if it has a single digit, used for the talk number's
@@ -34,6 +41,29 @@ class TalkNumber(object):
     def get_next_talk_number(self):
         return TalkNumber(self.day, self.talk_turn, self.idx)
 
+    def pack(self):
+        """
+        :return: The talk number packed in a single integer, ordered like the talks of the game.
+        """
+        return TalkNumber.packed(self.day, self.talk_turn, self.idx)
+
+    @staticmethod
+    def packed(day, talk_turn, idx):
+        return (day << (2 * TALK_NUMBER_FIELD_BITS)) | (talk_turn << TALK_NUMBER_FIELD_BITS) | idx
+
+    @staticmethod
+    def unpack(key):
+        """
+        :param key: Talk number packed with pack().
+        :return: The TalkNumber.
+        """
+        return TalkNumber(key >> (2 * TALK_NUMBER_FIELD_BITS), (key >> TALK_NUMBER_FIELD_BITS) & TALK_NUMBER_FIELD_MASK,
+                          key & TALK_NUMBER_FIELD_MASK)
+
+    @staticmethod
+    def day_of(key):
+        return key >> (2 * TALK_NUMBER_FIELD_BITS)
+
     @staticmethod
     def is_on_day(talk_number, day):
         """
@@ -42,14 +72,14 @@ class TalkNumber(object):
         :param day:
         :return:
         """
-        return talk_number.split(' ', 1)[0][DAY_STRING_LENGTH:]
+        return int(talk_number.split(' ', 1)[0][DAY_STRING_LENGTH:]) == day
 
     def __eq__(self, other):
         return self.day == other.day and self.idx == other.idx and self.talk_turn == other.talk_turn
 
     @staticmethod
     def from_string(talk_num_str):
-        print(talk_num_str)
+        console(talk_num_str)
         day, idx_and_turn = talk_num_str.split(' ')
         day = int(day[DAY_STRING_LENGTH:])
         turn, idx = idx_and_turn.split('[')
@@ -156,10 +186,117 @@ def separate_sentences(total_sentence):
     return sentences
 
 
+# Placeholders for the speaker and the day of a sentence in the parse results held by the ParseCache.
+_SPEAKER = object()
+
+_DAY = object()
+
+_MISSING = object()
+
+
+class ParseCache(object):
+    """
+    Bounded LRU cache of parsed sentences keyed by the raw text, shared by all the parsers in the process.
+    A sentence is parsed once with placeholders instead of the speaker and the day, every read binds them to
+    the actual speaker and day. Parse results are hash-consed: identical (sub)sentences share one object.
+    """
+
+    def __init__(self, maxsize=4096):
+        """
+        :param maxsize: Maximal number of sentences held, the interning table is cleared when it holds
+        more than 4 * maxsize objects.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._templates = OrderedDict()
+        self._interned = {}
+        # Parsers of several seats can run in different threads of the same process.
+        self._lock = threading.Lock()
+
+    def get(self, sentence, parse_func, agent_index, day):
+        """
+        :param sentence: Raw text of the sentence.
+        :param parse_func: Parses the sentence given the text, speaker and day, called on a miss.
+        :param agent_index: Index of the speaker.
+        :param day:
+        :return: Parse result bound to the given speaker and day.
+        """
+        with self._lock:
+            template = self._templates.get(sentence, _MISSING)
+            if template is not _MISSING:
+                self._templates.move_to_end(sentence)
+                self.hits += 1
+        if template is _MISSING:
+            template = parse_func(sentence, _SPEAKER, _DAY)
+            with self._lock:
+                self.misses += 1
+                template = self._intern(self._bind(template, _SPEAKER, _DAY))
+                self._templates[sentence] = template
+                if len(self._templates) > self.maxsize:
+                    self._templates.popitem(last=False)
+        with self._lock:
+            return self._bind(template, agent_index, day)
+
+    def _bind(self, node, agent_index, day):
+        if node is _SPEAKER:
+            return agent_index
+        if node is _DAY:
+            return day
+        if isinstance(node, tuple) and hasattr(node, '_fields'):
+            return self._intern(type(node)._make(self._bind(value, agent_index, day) for value in node))
+        if isinstance(node, (list, tuple)):
+            return tuple(self._bind(value, agent_index, day) for value in node)
+        return node
+
+    def _intern(self, node):
+        if len(self._interned) > 4 * self.maxsize:
+            self._interned.clear()
+        try:
+            return self._interned.setdefault((type(node), node), node)
+        except TypeError:
+            # Holds an unhashable value, can't be shared.
+            return node
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._templates), "maxsize": self.maxsize}
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+            self._interned.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+PARSE_CACHE = ParseCache()
+
+
+def _parse_template(sentence, speaker, day):
+    """
+    Parse a sentence for the ParseCache with the ProtocolParser, the sentences it rejects are parsed by
+    MessageParser, which keeps whatever it understands of them.
+    :param sentence:
+    :param speaker:
+    :param day:
+    :return:
+    """
+    from agents.information_processing.protocol_parser import ProtocolParser
+    try:
+        return ProtocolParser().parse(sentence, speaker, day)
+    except ValueError:
+        return MessageParser(cache=None)._process_sentence(sentence, speaker, day, None)
+
+
 class MessageParser(object):
 
-    def __init__(self):
+    def __init__(self, cache=PARSE_CACHE):
+        """
+        :param cache: ParseCache used for the sentences of the players, None to parse every sentence.
+        Sentences missing from the cache are parsed by the ProtocolParser.
+        """
         self._talk_number_to_message = {}
+        self._cache = cache
 
     def add_my_sentence(self, my_index, sentence, day, talk_number):
         self.process_sentence(sentence, my_index, day, talk_number)
@@ -194,17 +331,36 @@ class MessageParser(object):
         for sentence_content in sentences_content:
             first_parantheses = sentence_content.find('(')
             last_parantheses = sentence_content.rfind(')')
-            processed_sentences.append(self.process_sentence(sentence_content[first_parantheses + 1:
+            processed_sentences.append(self._process_sentence(sentence_content[first_parantheses + 1:
                                                                               last_parantheses],
                                                              agent_index, day, talk_number, described_day))
 
-        return LogicStatement(subject=subject, type=operator_type, sentences=processed_sentences,
+        return LogicStatement(subject=subject, type=operator_type, sentences=tuple(processed_sentences),
                               reason=None, day=day, described_day=described_day, original_message=sentence)
 
     def process_sentence(self, sentence, agent_index, day, talk_number, described_day=None):
         """
         Given a sentence of a player decide it's type and parse it by creating a matching
         object (which is defined above using named tuples).
+        Sentences are read from the parse cache, except opinions (AGREE/DISAGREE) that refer to the
+        sentences this parser saw before.
+        :param sentence: Sentence that will be parsed.
+        :param agent_index: Index of the agent that said this sentence.
+        :param day Day of the message, if it's stated.
+        :param talk_number The talk number of this message, idx in the pandas dataframe.
+        :param described_day Day stated in the message (for example, on Day 1 agent x said ...).
+        :return: Object representing this sentence.
+        """
+        if self._cache is None or described_day is not None or "AGREE" in sentence:
+            return self._process_sentence(sentence, agent_index, day, talk_number, described_day)
+
+        result = self._cache.get(sentence, _parse_template, agent_index, day)
+        self._talk_number_to_message[str(talk_number)] = result
+        return result
+
+    def _process_sentence(self, sentence, agent_index, day, talk_number, described_day=None):
+        """
+        Parse the sentence without the cache.
         :param sentence: Sentence that will be parsed.
         :param agent_index: Index of the agent that said this sentence.
         :param day Day of the message, if it's stated.
@@ -222,7 +378,7 @@ class MessageParser(object):
             result = MessageParser.parse_request(sentence, agent_index,
                                                  lambda subject, target, content: Request(subject=subject,
                                                                                           target=target,
-                                                                                          content=self.process_sentence(
+                                                                                          content=self._process_sentence(
                                                                                               content.replace(')', ''),
                                                                                               subject, day,
                                                                                               talk_number,
@@ -236,7 +392,7 @@ class MessageParser(object):
             result = MessageParser.parse_request(sentence, agent_index,
                                                  lambda subject, target, content: Inquire(subject=subject,
                                                                                           target=target,
-                                                                                          content=self.process_sentence(
+                                                                                          content=self._process_sentence(
                                                                                               content.replace(')', ''),
                                                                                               subject, day,
                                                                                               talk_number,
@@ -308,7 +464,7 @@ class MessageParser(object):
             target = extract_agent_idx(request_parts[2])
 
         if not ("REQUEST" in request_parts or "INQUIRE" in request_parts):
-            print("ERROR: Cant parse sentence " + sentence + " cause it's not a request")
+            console("ERROR: Cant parse sentence %s cause it's not a request", sentence, level=ERROR)
 
         return object_builder(subject, target, content)
 
@@ -324,7 +480,7 @@ class MessageParser(object):
         """
         parts_of_sentence = sentence.split(' ')
         if not (len(parts_of_sentence) == 4 or len(parts_of_sentence) == 3):
-            print("Invalid number of words in sentence: " + sentence)
+            console("Invalid number of words in sentence: %s", sentence, level=ERROR)
 
         if len(parts_of_sentence) == 3:
             subject = agent_index
@@ -352,7 +508,7 @@ class MessageParser(object):
         """
         parts_of_sentence = sentence.split(' ')
         if not (len(parts_of_sentence) == 3 or len(parts_of_sentence) == 4):
-            print("ERROR: Invalid number of words in sentence:  " + sentence)
+            console("ERROR: Invalid number of words in sentence:  %s", sentence, level=ERROR)
 
         species = None
         if len(parts_of_sentence) == 3:
@@ -383,8 +539,8 @@ class MessageParser(object):
         """
         day_num, content = sentence.split('(', 1)
         described_day = int(day_num.split(' ')[1])
-        return self.process_sentence(content.replace(')', ''), agent_index, day, talk_number,
-                                     described_day=described_day)
+        return self._process_sentence(content.replace(')', ''), agent_index, day, talk_number,
+                                      described_day=described_day)
 
     @staticmethod
     def parse_action_sentence(sentence, agent_index, day, described_day):
@@ -398,7 +554,7 @@ class MessageParser(object):
         """
         parts_of_sentence = sentence.split(' ')
         if not (len(parts_of_sentence) == 2 or len(parts_of_sentence) == 3):
-            print("ERROR: Invalid number of words in sentence:  " + sentence)
+            console("ERROR: Invalid number of words in sentence:  %s", sentence, level=ERROR)
 
         if len(parts_of_sentence) == 2:
             subject = agent_index
@@ -0,0 +1,150 @@
+import numpy as np
+from agents.game_roles import estimation_mask
+from agents.information_processing.dissection.player_representation import message_identity, \
+    FONDNESS_DISCOUNT_FACTOR, HOSTILITY_DISCOUNT_FACTOR
+
+NO_SIDE = 0
+
+COOPERATOR = 1
+
+ENEMY = -1
+
+INITIAL_HOSTILITY = 0.1
+
+
+class PerspectiveStore(object):
+    """
+    Holds the perspectives of all the players in arrays indexed by [subject, target] (agent indices, row and
+    column 0 are unused): on which side the subject puts the target, the initial fondness/hostility and the
+    discounted sum of the messages, and the role estimations of the subject about the target as a bitmask.
+    An AgentPerspective is a view of a single row.
+    The discounted sums are kept discounted to the last day they were read on, so when the day advances
+    all of them are re-discounted with a single multiplication.
+    """
+
+    def __init__(self, num_agents):
+        """
+        :param num_agents: Number of agents in the game.
+        """
+        size = num_agents + 1
+        self.num_agents = num_agents
+        self.side = np.zeros((size, size), dtype=np.int8)
+        self.initial = np.zeros((size, size))
+        self.fondness = np.zeros((size, size))
+        self.hostility = np.zeros((size, size))
+        self.estimations = np.zeros((size, size), dtype=np.uint32)
+        self._day = None
+        # Identities of the messages merged into each [subject][target] cell, used to skip duplicates.
+        self._messages = [{} for _ in range(size)]
+
+    def has_target(self, target):
+        return isinstance(target, (int, np.integer)) and 0 < target <= self.num_agents
+
+    def reset_subject(self, subject):
+        """
+        A new perspective considers all the other players as enemies with a low initial hostility.
+        :param subject:
+        :return:
+        """
+        self.side[subject] = ENEMY
+        self.side[subject, 0] = NO_SIDE
+        self.side[subject, subject] = NO_SIDE
+        self.initial[subject] = np.where(self.side[subject] == ENEMY, INITIAL_HOSTILITY, 0.0)
+        self.fondness[subject] = 0
+        self.hostility[subject] = 0
+        self.estimations[subject] = 0
+        self._messages[subject] = {}
+
+    def _discount(self, day):
+        if day is None or self._day is None or day == self._day:
+            return
+        self.fondness *= pow(FONDNESS_DISCOUNT_FACTOR, day - self._day)
+        self.hostility *= pow(HOSTILITY_DISCOUNT_FACTOR, day - self._day)
+        self._day = day
+
+    def _add(self, subject, target, value, day):
+        if self._day is None:
+            self._day = day
+        if self.side[subject, target] == COOPERATOR:
+            self.fondness[subject, target] += pow(FONDNESS_DISCOUNT_FACTOR, self._day - day) * value
+        else:
+            self.hostility[subject, target] += pow(HOSTILITY_DISCOUNT_FACTOR, self._day - day) * value
+
+    def update(self, subject, target, side, history, initial):
+        """
+        Merge a Cooperator or an Enemy of the subject into the store. If the target has no side yet it is added
+        with the given side, initial value and all the messages. Otherwise only messages that weren't merged yet
+        are added, with their sign flipped if the target is on the other side.
+        :param subject:
+        :param target:
+        :param side: COOPERATOR or ENEMY.
+        :param history: History of the Cooperator/Enemy, day to list of (message, value).
+        :param initial: Initial fondness/hostility.
+        :return:
+        """
+        messages = self._messages[subject].setdefault(target, set())
+        current_side = self.side[subject, target]
+        if current_side == NO_SIDE:
+            self.side[subject, target] = side
+            self.initial[subject, target] = initial
+            for message_values in history.values():
+                for message, value in message_values:
+                    messages.add(message_identity(message))
+                    self._add(subject, target, value, message.day)
+        else:
+            sign = 1 if current_side == side else -1
+            for message_values in history.values():
+                for message, value in message_values:
+                    identity = message_identity(message)
+                    if identity not in messages:
+                        messages.add(identity)
+                        self._add(subject, target, sign * value, message.day)
+
+    def values(self, subject, side, day):
+        """
+        :param subject:
+        :param side:
+        :param day:
+        :return: Row of the current fondness (hostility) of the subject, zero for targets on the other side.
+        """
+        self._discount(day)
+        totals = self.fondness[subject] if side == COOPERATOR else self.hostility[subject]
+        return np.where(self.side[subject] == side, self.initial[subject] + totals, 0.0)
+
+    def targets(self, subject, side):
+        return np.flatnonzero(self.side[subject] == side)
+
+    def switch_sides(self, subject, day):
+        """
+        Cooperators with non positive fondness become enemies, then enemies with non positive hostility become
+        cooperators. A converted target keeps its messages with a flipped sign and loses its initial value.
+        :param subject:
+        :param day:
+        :return: Indices that switched from cooperators to enemies and indices that switched from enemies to
+        cooperators.
+        """
+        row = self.side[subject]
+        to_enemies = np.flatnonzero((row == COOPERATOR) & (self.values(subject, COOPERATOR, day) <= 0))
+        row[to_enemies] = ENEMY
+        self.hostility[subject, to_enemies] = -self.fondness[subject, to_enemies]
+        self.fondness[subject, to_enemies] = 0
+        self.initial[subject, to_enemies] = 0
+
+        to_cooperators = np.flatnonzero((row == ENEMY) & (self.values(subject, ENEMY, day) <= 0))
+        row[to_cooperators] = COOPERATOR
+        self.fondness[subject, to_cooperators] = -self.hostility[subject, to_cooperators]
+        self.hostility[subject, to_cooperators] = 0
+        self.initial[subject, to_cooperators] = 0
+        return to_enemies, to_cooperators
+
+    def add_estimation(self, subject, target, roles):
+        """
+        :param subject:
+        :param target:
+        :param roles: Roles (or species) the subject estimates the target has.
+        :return: True if the estimations of the subject about the target changed.
+        """
+        current = int(self.estimations[subject, target])
+        merged = current | estimation_mask(roles)
+        self.estimations[subject, target] = merged
+        return merged != current
@@ -0,0 +1,342 @@
+"""
+Single pass tokenizer and recursive-descent parser for the sentences of the AIWolf protocol.
+Builds the same objects as MessageParser (Knowledge, Action, ActionResult, Request, Inquire, Opinion
+and LogicStatement) but splits the sentence once, nested sentences are parsed from the words and the
+offsets of the parentheses instead of splitting and copying the substrings of every nesting level.
+The text of a sentence is only sliced once, for the original_message of the object built for it.
+MessageParser parses the sentences missing from its ParseCache with it.
+"""
+import time
+
+from agents.information_processing.message_parsing import Knowledge, Action, ActionResult, Request, Inquire, \
+    Opinion, LogicStatement, SentenceType, TalkNumber, KNOWLEDGE_TYPES, AVAILABLE_ACTIONS, \
+    AVAILABLE_ACTION_RESULTS, LOGIC_OPERATORS, MessageParser
+
+# Kind of sentence started by every keyword, the parser dispatches on a single lookup.
+_LOGIC, _DAY, _REQUEST, _INQUIRE, _KNOWLEDGE, _OPINION, _ACTION, _ACTION_RESULT = range(8)
+
+# MessageParser finds the kind of a sentence by the words it contains, the results whose word contains the word of
+# an action (VOTED, GUARDED, ATTACKED) are Actions of that result type, only DIVINED and IDENTIFIED give ActionResults.
+_ACTION_WORDS = [word for word in AVAILABLE_ACTION_RESULTS if any(action in word for action in AVAILABLE_ACTIONS)]
+
+# Keyword to (kind, SentenceType), the type of action results is kept as the word, like MessageParser does.
+_KEYWORDS = dict([(word, (_LOGIC, SentenceType[word])) for word in LOGIC_OPERATORS] +
+                 [(word, (_KNOWLEDGE, SentenceType[word])) for word in KNOWLEDGE_TYPES] +
+                 [(word, (_ACTION, SentenceType[word])) for word in AVAILABLE_ACTIONS + _ACTION_WORDS] +
+                 [(word, (_ACTION_RESULT, word)) for word in AVAILABLE_ACTION_RESULTS if word not in _ACTION_WORDS] +
+                 [("DAY", (_DAY, None)), ("REQUEST", (_REQUEST, SentenceType.REQUEST)),
+                  ("INQUIRE", (_INQUIRE, SentenceType.INQUIRE)), ("AGREE", (_OPINION, SentenceType.AGREE)),
+                  ("DISAGREE", (_OPINION, SentenceType.DISAGREE))])
+
+_PARENS = frozenset(("(", ")"))
+
+
+def tokenize(sentence):
+    """
+    Split a sentence to its words and parentheses.
+    :param sentence:
+    :return: List of the words and parentheses, followed by None.
+    """
+    if "(" in sentence or ")" in sentence:
+        sentence = sentence.replace("(", " ( ").replace(")", " ) ")
+    tokens = sentence.split()
+    tokens.append(None)
+    return tokens
+
+
+def _target(token):
+    """
+    :param token:
+    :return: Index of the agent of an Agent[xx] token, other targets (ANY) are kept as is.
+    """
+    if token is None or token in _PARENS:
+        raise ValueError("Expected a target but got " + repr(token))
+    if token[-1] == "]":
+        return int(token[token.index("[") + 1:-1])
+    return token
+
+
+def _word(token):
+    if token is None or token in _PARENS:
+        raise ValueError("Expected a word but got " + repr(token))
+    return token
+
+
+class ProtocolParser(object):
+    """
+    Recursive-descent parser of the protocol grammar:
+    sentence := [Agent] (KNOWLEDGE target role | ACTION target | VOTED/GUARDED/ATTACKED target |
+                         DIVINED/IDENTIFIED target species |
+                         REQUEST/INQUIRE target (sentence) | LOGIC (sentence)+ | DAY number (sentence) |
+                         AGREE/DISAGREE talk_number | Skip | Over)
+    A sentence without a subject gets the speaker as its subject, sentences nested in requests get the subject of
+    the request as their speaker.
+    The position in the tokens is passed along and returned by the parsing methods. The parentheses are read in
+    the order of the sentence, so the offset of the next one is found from the offset after the last one read,
+    a nested sentence is only known by the offset it starts at until its object is built.
+    """
+
+    def __init__(self, talk_number_to_message=None):
+        """
+        :param talk_number_to_message: Parsed sentences by talk number, used to resolve the sentences referenced
+        by AGREE and DISAGREE.
+        """
+        self._talk_number_to_message = talk_number_to_message if talk_number_to_message is not None else {}
+        self._sentence = None
+        self._tokens = None
+        self._offset = 0
+
+    def parse(self, sentence, agent_index, day, talk_number=None):
+        """
+        :param sentence: Sentence that will be parsed.
+        :param agent_index: Index of the agent that said this sentence.
+        :param day: Day of the message.
+        :param talk_number: Talk number of the message, the result is saved under it for later opinions.
+        :return: Object representing this sentence, None for sentences without content (Skip, Over).
+        """
+        self._sentence = sentence
+        self._tokens = tokenize(sentence)
+        self._offset = 0
+        result, position = self._parse_sentence(0, agent_index, day, None, -1)
+        if self._tokens[position] is not None:
+            raise ValueError("Unexpected " + self._tokens[position] + " in sentence: " + sentence)
+        if talk_number is not None:
+            self._talk_number_to_message[str(talk_number)] = result
+        return result
+
+    def _parse_group(self, position, agent_index, day, described_day):
+        """
+        Parse a sentence wrapped with parentheses.
+        :return: The parsed sentence and the position after its closing parenthesis.
+        """
+        if self._tokens[position] != "(":
+            raise ValueError("Expected ( in sentence: " + self._sentence)
+        start = self._offset = self._sentence.index("(", self._offset) + 1
+        result, position = self._parse_sentence(position + 1, agent_index, day, described_day, start)
+        if self._tokens[position] != ")":
+            raise ValueError("Expected ) in sentence: " + self._sentence)
+        self._offset = self._sentence.index(")", self._offset) + 1
+        return result, position + 1
+
+    def _text(self, start, position):
+        """
+        :param start: Offset of the current sentence, -1 for the whole sentence.
+        :param position: Position of the token after the current sentence, the parenthesis that closes it.
+        :return: Text of the current sentence.
+        """
+        if start < 0:
+            return self._sentence
+        if self._tokens[position] != ")":
+            raise ValueError("Expected ) in sentence: " + self._sentence)
+        # The parentheses nested in the sentence were read, the next one closes it.
+        return self._sentence[start:self._sentence.index(")", self._offset)]
+
+    def _parse_sentence(self, position, agent_index, day, described_day, start):
+        """
+        :return: The parsed sentence and the position of the token after it.
+        """
+        tokens = self._tokens
+        subject = agent_index
+        word = tokens[position]
+        keyword = _KEYWORDS.get(word)
+        if keyword is None and word is not None and word.startswith("Agent[") and tokens[position + 1] in _KEYWORDS:
+            subject = _target(word)
+            position += 1
+            word = tokens[position]
+            keyword = _KEYWORDS[word]
+        if keyword is None:
+            if word is None or word in _PARENS:
+                raise ValueError("Expected a sentence in: " + self._sentence)
+            # Skip, Over or anything we don't understand.
+            return None, position + 1
+        kind, sentence_type = keyword
+
+        if kind == _REQUEST or kind == _INQUIRE:
+            target = _target(tokens[position + 1])
+            content, position = self._parse_group(position + 2, subject, day, described_day)
+            builder = Request if kind == _REQUEST else Inquire
+            return builder(subject, target, content, sentence_type, None, day, described_day,
+                           self._text(start, position)), position
+
+        if kind == _KNOWLEDGE:
+            return Knowledge(subject, _target(tokens[position + 1]), _word(tokens[position + 2]), sentence_type,
+                             None, day, described_day, self._text(start, position + 3)), position + 3
+
+        if kind == _ACTION:
+            return Action(subject, _target(tokens[position + 1]), sentence_type, None, day, described_day,
+                          self._text(start, position + 2)), position + 2
+
+        if kind == _ACTION_RESULT:
+            return ActionResult(subject, _target(tokens[position + 1]), _word(tokens[position + 2]), sentence_type,
+                                None, day, described_day, self._text(start, position + 3)), position + 3
+
+        if kind == _LOGIC:
+            sentences = []
+            position += 1
+            while tokens[position] == "(":
+                sentence, position = self._parse_group(position, agent_index, day, described_day)
+                sentences.append(sentence)
+            return LogicStatement(subject, sentence_type, tuple(sentences), None, day, described_day,
+                                  self._text(start, position)), position
+
+        if kind == _DAY:
+            return self._parse_group(position + 2, subject, day, int(_word(tokens[position + 1])))
+
+        # AGREE or DISAGREE, the talk number is two words.
+        talk_number = TalkNumber.from_string(_word(tokens[position + 1]) + " " + _word(tokens[position + 2]))
+        return Opinion(subject, talk_number, sentence_type, self._talk_number_to_message.get(str(talk_number)),
+                       day, described_day, self._text(start, position + 3)), position + 3
+
+
+def _sample_sentences(num_players=15):
+    """
+    Build sentences with all the structures of the protocol, used when no logs are given.
+    :param num_players:
+    :return:
+    """
+    sentences = []
+    for agent in range(1, num_players + 1):
+        other = agent % num_players + 1
+        sentences += ["VOTE Agent[{0:02d}]".format(other),
+                      "ESTIMATE Agent[{0:02d}] WEREWOLF".format(other),
+                      "COMINGOUT Agent[{0:02d}] SEER".format(agent),
+                      "DIVINED Agent[{0:02d}] HUMAN".format(other),
+                      "Agent[{0:02d}] GUARD Agent[{1:02d}]".format(agent, other),
+                      "REQUEST ANY (VOTE Agent[{0:02d}])".format(other),
+                      "Agent[{0:02d}] INQUIRE Agent[{1:02d}] (ESTIMATE Agent[{0:02d}] POSSESSED)".format(agent, other),
+                      "DAY 1 (Agent[{0:02d}] DIVINED Agent[{1:02d}] WEREWOLF)".format(agent, other),
+                      "AND (DAY 1 (Agent[{0:02d}] DIVINED Agent[{1:02d}] HUMAN)) "
+                      "(DAY 2 (Agent[{0:02d}] DIVINED Agent[{1:02d}] WEREWOLF))".format(agent, other),
+                      "BECAUSE (DAY 2 (Agent[{0:02d}] DIVINED Agent[{1:02d}] WEREWOLF)) "
+                      "(REQUEST ANY (VOTE Agent[{1:02d}]))".format(agent, other),
+                      "XOR (ESTIMATE Agent[{0:02d}] WEREWOLF) (ESTIMATE Agent[{0:02d}] POSSESSED)".format(other),
+                      "Skip", "Over"]
+    return sentences
+
+
+def _keyword_sentences(target="Agent[03]", subject="Agent[02]"):
+    """
+    Build every form of every keyword: with and without a subject, on their own, described with DAY, requested,
+    inquired and nested in every logic operator. Used to check the parser against MessageParser.
+    :param target:
+    :param subject:
+    :return:
+    """
+    simple = []
+    for word in KNOWLEDGE_TYPES:
+        simple += [word + " " + target + " " + role for role in ("WEREWOLF", "SEER")]
+    simple += [word + " " + target for word in AVAILABLE_ACTIONS + AVAILABLE_ACTION_RESULTS]
+    simple += [word + " " + target + " " + species for word in AVAILABLE_ACTION_RESULTS
+               for species in ("HUMAN", "WEREWOLF")]
+    simple += [subject + " " + sentence for sentence in simple]
+    simple += ["VOTE ANY", "Skip", "Over"]
+
+    sentences = list(simple)
+    for sentence in simple:
+        sentences += ["DAY 2 (" + sentence + ")",
+                      "REQUEST ANY (" + sentence + ")",
+                      subject + " INQUIRE " + target + " (" + sentence + ")",
+                      "REQUEST " + target + " (DAY 1 (" + sentence + "))",
+                      "NOT (" + sentence + ")",
+                      "AND (" + sentence + ") (DAY 1 (" + sentence + "))",
+                      subject + " OR (" + sentence + ") (VOTE " + target + ")",
+                      "XOR (ESTIMATE " + target + " WEREWOLF) (" + sentence + ")",
+                      "BECAUSE (DAY 2 (" + sentence + ")) (REQUEST ANY (" + sentence + "))",
+                      "BECAUSE (AND (" + sentence + ") (COMINGOUT " + target + " SEER)) (XOR (" + sentence +
+                      ") (ESTIMATE " + target + " POSSESSED))"]
+    return sentences
+
+
+def _outcome(parse, sentence, speaker, day):
+    try:
+        return parse(sentence, speaker, day, 0)
+    except Exception as e:
+        return "raises " + type(e).__name__
+
+
+def check_equivalence(sentences, speaker=1, day=1):
+    """
+    Compare the sentences parsed through the ParseCache (ProtocolParser, with the fallback to the old code) with
+    MessageParser(cache=None), that parses every sentence with the old code.
+    :param sentences:
+    :param speaker:
+    :param day:
+    :return: List of the (sentence, expected, parsed) of the sentences that got a different result and the list of
+    the sentences MessageParser fails on (raises) but that are parsed now.
+    """
+    from agents.information_processing.message_parsing import ParseCache
+    different = []
+    recovered = []
+    for sentence in sentences:
+        expected = _outcome(MessageParser(cache=None).process_sentence, sentence, speaker, day)
+        parsed = _outcome(MessageParser(cache=ParseCache()).process_sentence, sentence, speaker, day)
+        if parsed == expected:
+            continue
+        if isinstance(expected, str) and not isinstance(parsed, str):
+            recovered.append(sentence)
+        else:
+            different.append((sentence, expected, parsed))
+    return different, recovered
+
+
+if __name__ == "__main__":
+    # Throughput benchmark against MessageParser,
+    # usage: python -m agents.information_processing.protocol_parser [log_file ...]
+    # or check that every form of every keyword is parsed like MessageParser does,
+    # usage: python -m agents.information_processing.protocol_parser --check
+    import sys
+
+    if sys.argv[1:] == ["--check"]:
+        from agents.logger import configure_console
+        # MessageParser reports the malformed forms on the console.
+        configure_console(silent=True)
+        sentences = _keyword_sentences()
+        different, recovered = check_equivalence(sentences)
+        for sentence, expected, parsed in different:
+            print("{0}\n    MessageParser:  {1}\n    ProtocolParser: {2}".format(sentence, expected, parsed))
+        for sentence in recovered:
+            print("{0}\n    MessageParser raises, ProtocolParser parses it".format(sentence))
+        print("sentences: {0}, different: {1}, parsed where MessageParser raises: {2}".format(
+            len(sentences), len(different), len(recovered)))
+        sys.exit(1 if different else 0)
+
+    if len(sys.argv) > 1:
+        from aiwolfpy.read_log import read_log
+        corpus = []
+        for log_path in sys.argv[1:]:
+            log = read_log(log_path)
+            corpus += list(log["text"][log["type"].isin(["talk", "whisper"])])
+    else:
+        corpus = _sample_sentences()
+
+    # Opinions depend on the sentences said before them, MessageParser doesn't return them.
+    corpus = [sentence for sentence in corpus if "AGREE" not in sentence]
+    repeat = 5
+
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        message_parser = MessageParser(cache=None)
+        expected = []
+        for sentence in corpus:
+            try:
+                expected.append(message_parser.process_sentence(sentence, 1, 1, 0))
+            except Exception:
+                expected.append(None)
+    message_parser_time = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        protocol_parser = ProtocolParser()
+        parsed = []
+        for sentence in corpus:
+            try:
+                parsed.append(protocol_parser.parse(sentence, 1, 1))
+            except ValueError:
+                parsed.append(None)
+    protocol_parser_time = time.perf_counter() - begin
+
+    same = sum(1 for first, second in zip(expected, parsed) if first == second)
+    num_sentences = len(corpus) * repeat
+    print("sentences: {0}, same result: {1}/{2}".format(len(corpus), same, len(corpus)))
+    print("MessageParser: {0:.0f} sentences/s, ProtocolParser: {1:.0f} sentences/s".format(
+        num_sentences / message_parser_time, num_sentences / protocol_parser_time))
@@ -1,61 +1,77 @@
-from agents.logger import Logger
-from agents.information_processing.message_parsing import TalkNumber
+from agents.information_processing.message_parsing import TalkNumber, DAY_STRING_LENGTH
+from agents.logger import console, ERROR
 
 class SentencesContainer(object):
     """
     Contains a mapping of talk number to dissected sentences. Used for recalls in cases of agreement or
     disagreement.
     Each talk number will map to a sentence which was said in this talk number.
+    Talk numbers are kept packed in integers (see TalkNumber.pack), the sentences are also indexed by
+    day and speaker so the useful sentences of a day are found without scanning the whole game.
     """
 
-    class __SentencesContainer(object):
+    def __init__(self, logger):
+        self._logger = logger
+        self.talk_number_to_sentences = {}
+        # Day to speaker to packed talk numbers of the useful sentences he said on this day.
+        self._useful_by_day = {}
 
-        def __init__(self):
-            self.talk_number_to_sentences = {}
+    def clean(self):
+        self._logger.write("Cleaned the Sentence container")
+        self.talk_number_to_sentences = {}
+        self._useful_by_day = {}
+        self._logger.write("Len: %s", len(self.talk_number_to_sentences))
 
-        def clean(self):
-            Logger.instance.write("Cleaned the Sentence container")
-            self.talk_number_to_sentences = {}
-            Logger.instance.write("Len: " + str(len(self.talk_number_to_sentences)))
+    @staticmethod
+    def _to_key(talk_number):
+        """
+        :param talk_number: TalkNumber, packed talk number or its string representation.
+        :return: The packed talk number.
+        """
+        if isinstance(talk_number, TalkNumber):
+            return talk_number.pack()
+        if isinstance(talk_number, int):
+            return talk_number
+        day, turn_and_idx = str(talk_number).split(' ')
+        turn, idx = turn_and_idx.rstrip(']').split('[')
+        return TalkNumber.packed(int(day[DAY_STRING_LENGTH:]), int(turn), int(idx))
 
-        def add_sentence(self, dissected_sentence):
-            key_val = str(dissected_sentence.talk_number)
-            Logger.instance.write(
-                "Adding sentence of TalkNumber: " + str(key_val) + " to the sentence container " + str(len(self.talk_number_to_sentences)))
-            if key_val not in self.talk_number_to_sentences.keys():
-                self.talk_number_to_sentences[key_val] = dissected_sentence
-            else:
-                raise Exception("Two sentences shouldn't be saved for the same talk number: " + key_val +
-                                "Message " + str(dissected_sentence.message) + " can't be saved because the message " +
-                                str(self.talk_number_to_sentences[key_val].message) + "  is already saved.")
+    def add_sentence(self, dissected_sentence):
+        key_val = self._to_key(dissected_sentence.talk_number)
+        self._logger.write("Adding sentence of TalkNumber: %s to the sentence container %d",
+                           dissected_sentence.talk_number, len(self.talk_number_to_sentences))
+        if key_val not in self.talk_number_to_sentences:
+            self.talk_number_to_sentences[key_val] = dissected_sentence
+            message = dissected_sentence.message
+            if message is not None:
+                speakers = self._useful_by_day.setdefault(TalkNumber.day_of(key_val), {})
+                speakers.setdefault(message.subject, []).append(key_val)
+        else:
+            raise Exception("Two sentences shouldn't be saved for the same talk number: " +
+                            str(dissected_sentence.talk_number) + "Message " + str(dissected_sentence.message) +
+                            " can't be saved because the message " +
+                            str(self.talk_number_to_sentences[key_val].message) + "  is already saved.")
 
-        def get_sentence(self, talk_number):
-            sentence = self.talk_number_to_sentences[str(talk_number)]
-            return sentence
-
-        def has_useful_sentence_on_day(self, day, target):
-            """
-            Checks whether a useful sentence was said on a given day,  useful
-            when we want to check agreement or disagreement.
-            A useful sentence is each sentence that is neither "skip" or "over"
-            :param day:
-            :param target
-            :return: List of all talk numbers of useful sentences said in the given day.
-            """
-            talk_numbers_on_day = []
-            try:
-                for talk_number, sentence in self.talk_number_to_sentences.items():
-                    if TalkNumber.is_on_day(talk_number, day) and sentence.message.subject != target:
-                        talk_numbers_on_day.append(talk_number)
-            except Exception as e:
-                print("EXCEPTION AT SENTENCE CONTAINER has_useful_sentence_on_day")
-                print(e)
-            return talk_numbers_on_day
-
-
-    instance = None
-
-    def __init__(self):
-        if not SentencesContainer.instance:
-            SentencesContainer.instance = SentencesContainer.__SentencesContainer()
+    def get_sentence(self, talk_number):
+        sentence = self.talk_number_to_sentences[self._to_key(talk_number)]
+        return sentence
 
+    def has_useful_sentence_on_day(self, day, target):
+        """
+        Checks whether a useful sentence was said on a given day,  useful
+        when we want to check agreement or disagreement.
+        A useful sentence is each sentence that is neither "skip" or "over"
+        :param day:
+        :param target
+        :return: List of all talk numbers of useful sentences said in the given day.
+        """
+        talk_numbers_on_day = []
+        try:
+            for speaker, keys in self._useful_by_day.get(day, {}).items():
+                if speaker != target:
+                    talk_numbers_on_day += keys
+            talk_numbers_on_day.sort()
+        except Exception as e:
+            console("EXCEPTION AT SENTENCE CONTAINER has_useful_sentence_on_day", level=ERROR)
+            console(e, level=ERROR)
+        return [str(TalkNumber.unpack(key)) for key in talk_numbers_on_day]
@@ -11,7 +11,7 @@ class Werewolf(Informed):
         self._strategy = WolfStrategy([i for i in range(1, self._game_settings._player_num)
                             if i != self._base_info._agentIndex],
                             self._base_info._agentIndex,
-                            self._base_info._role_map, self._player_perspective)
+                            self._base_info._role_map, self._player_perspective, self._context)
 
     def getName(self):
         return "Werewolf"
@@ -28,6 +28,12 @@ class Werewolf(Informed):
     def attack(self):
         return self._strategy.get_next_attck()
 
+    def fallback_attack(self):
+        return self._strategy.fallback_vote()
+
+    def plan_vote(self):
+        return self._strategy.plan_vote()
+
     def divine(self):
         pass
 
@@ -1,30 +1,238 @@
+import atexit
+import queue
+import sys
+import threading
+import traceback
+
+DEBUG = 10
+
+INFO = 20
+
+WARNING = 30
+
+ERROR = 40
+
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR", OFF: "OFF"}
+
+# Lines waiting for the writer thread, when the queue is full new lines are dropped instead of blocking the agent.
+QUEUE_SIZE = 10000
+
+
+def level_from_name(name):
+    """
+    :param name: Name of a level (case insensitive) or its number.
+    :return: The level.
+    """
+    if isinstance(name, int):
+        return name
+    for level, level_name in LEVEL_NAMES.items():
+        if level_name == name.upper():
+            return level
+    raise ValueError("Unknown log level: " + str(name))
+
+
+def format_message(message, args, exc_info=False):
+    """
+    Build the text of a message, this is only done once we know the message is going to be written.
+    :param message: String (formatted with % against args) or a callable returning the string.
+    :param args:
+    :param exc_info: Append the traceback of the exception being handled.
+    :return:
+    """
+    if callable(message):
+        message = message()
+    if args:
+        message = message % args
+    message = str(message)
+    if exc_info:
+        message += "\n" + traceback.format_exc().rstrip("\n")
+    return message
+
+
+class _LogWriter(object):
+    """
+    Writes the lines of all the loggers of the process in a single background thread, so writing a log line
+    costs the agent a queue insertion instead of a file write.
+    """
+
+    def __init__(self, queue_size=QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def put(self, output, line):
+        """
+        :param output: Open file the line is written to.
+        :param line: Line to write, None closes the file once the lines before it are written.
+        :return:
+        """
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait((output, line))
+        except queue.Full:
+            if line is None:
+                self._queue.put((output, line))
+            else:
+                self.dropped += 1
+
+    def flush(self):
+        """
+        Wait until all the queued lines are written.
+        :return:
+        """
+        if self._thread is not None:
+            self._queue.join()
+
+    def _run(self):
+        while True:
+            output, line = self._queue.get()
+            try:
+                if line is None:
+                    output.close()
+                else:
+                    output.write(line)
+                    # Flush when the queue drains, so a crash loses at most the lines that were still queued.
+                    if self._queue.empty():
+                        output.flush()
+            except Exception as e:
+                sys.__stderr__.write("LOG WRITER ERROR " + str(e) + '\n')
+            finally:
+                self._queue.task_done()
+
+
+_writer = _LogWriter()
+
 
 class Logger(object):
+    """
+    Log of a single agent, each agent (and game context) holds its own logger instead of sharing one
+    through the whole process.
+    Messages below the level of the logger are dropped before their text is built, pass the arguments of the
+    message separately (or a callable) so disabled messages cost a single comparison:
+        logger.write("Got sentence %s from agent %d", sentence, idx)
+    Enabled messages are formatted by the caller and written by a background thread.
+    """
+
+    # Level of new loggers, everything the agents write is DEBUG so by default nothing is written.
+    default_level = INFO
+
+    def __init__(self, file_name, level=None):
+        """
+        :param file_name: File of the log, it's only created once something is written to it.
+        :param level: Minimal level of written messages, the default level if not given.
+        """
+        self._file_name = file_name
+        self._file = None
+        self._index = None
+        self.level = Logger.default_level if level is None else level
+
+    def enabled(self, level=DEBUG):
+        return level >= self.level
 
-    class __Logger:
-        def __init__(self, file_name):
-            self._file = open(file_name, 'w')
-            self._index = None
+    def write(self, message, *args, level=DEBUG, exc_info=False):
+        """
+        :param message: Message, a string to format with args or a callable that builds it.
+        :param args: Arguments of the message, only formatted when the message is written.
+        :param level:
+        :param exc_info: Append the traceback of the exception being handled.
+        :return:
+        """
+        if level < self.level:
+            return
+        if self._file is None:
+            self._file = open(self._file_name, 'w')
+        _writer.put(self._file, "Agent[" + str(self._index) + "] " + LEVEL_NAMES.get(level, str(level)) + ": " +
+                    format_message(message, args, exc_info) + '\n')
 
-        def write(self, message):
-            temp = 1
-            #self._file.write("Agent[" + str(self._index) + "]: " + message + '\n')
+    def debug(self, message, *args):
+        self.write(message, *args, level=DEBUG)
 
-        def close(self):
-            self._file.close()
+    def info(self, message, *args):
+        self.write(message, *args, level=INFO)
 
-        def set_agent_index(self, index):
-            self._index = index
+    def warning(self, message, *args):
+        self.write(message, *args, level=WARNING)
 
-    instance = None
+    def error(self, message, *args):
+        self.write(message, *args, level=ERROR)
 
-    def __init__(self, file_name):
-        if not Logger.instance:
-            Logger.instance = Logger.__Logger(file_name)
+    def close(self):
+        if self._file is not None:
+            _writer.put(self._file, None)
+            self._file = None
+
+    def set_agent_index(self, index):
+        self._index = index
 
     @staticmethod
     def log_list(logged_list, prefix_tabs = 1):
         logged_string = ""
         for member in logged_list:
             logged_string += '\t' * prefix_tabs + str(member) + '\n'
-        return logged_string
\ No newline at end of file
+        return logged_string
+
+    @staticmethod
+    def flush():
+        _writer.flush()
+
+    @staticmethod
+    def dropped_lines():
+        return _writer.dropped
+
+
+class _Console(object):
+    """
+    Destination of the prints of the agents. By default they are printed as before, in silent mode they are
+    written to a log file (or dropped when there is no file) through the background writer, so stdout writes
+    don't add to the latency of the responses.
+    """
+
+    def __init__(self):
+        self.level = DEBUG
+        self.silent = False
+        self.logger = None
+
+
+_console = _Console()
+
+
+def configure_console(silent=False, level=DEBUG, file_name=None):
+    """
+    :param silent: Stop printing, write the messages to file_name instead.
+    :param level: Minimal level of printed messages.
+    :param file_name: Log file of the messages in silent mode, if None they are dropped.
+    :return:
+    """
+    if _console.logger is not None:
+        _console.logger.close()
+    _console.silent = silent
+    _console.level = level
+    _console.logger = Logger(file_name, level) if silent and file_name is not None else None
+
+
+def console(message, *args, level=DEBUG, exc_info=False):
+    """
+    Replacement of print for the agents, with the lazy arguments of Logger.write.
+    :param message:
+    :param args:
+    :param level:
+    :param exc_info: Append the traceback of the exception being handled.
+    :return:
+    """
+    if level < _console.level:
+        return
+    if not _console.silent:
+        print(format_message(message, args, exc_info))
+    elif _console.logger is not None:
+        _console.logger.write(message, *args, level=level, exc_info=exc_info)
@@ -3,7 +3,8 @@ from enum import Enum
 from agents.player_perspective import PlayerPerspective
 import numpy as np
 from enum import Enum
-from agents.logger import Logger
+from agents.game_context import GameContext
+from agents.logger import console
 
 REG_VOTE = 1
 RAND_VOTE = 2
@@ -91,12 +92,12 @@ class GameState(object):
         return self._status_map[str(index)] == 'ALIVE'
 
     def log(self):
-        print("Agent index is: " + str(self._agentIndex) + " his role: " + self._role)
-        print("Game role map: ", self._role_map)
-        print("Day in game: ", self._day)
-        print("Remain Talk Map: ", self._remain_talk_map)
-        print("Remain Whisper Map: ", self._remain_whisper_map)
-        print("Status map: ", self._status_map)
+        console("Agent index is: %s his role: %s", self._agentIndex, self._role)
+        console("Game role map:  %s", self._role_map)
+        console("Day in game:  %s", self._day)
+        console("Remain Talk Map:  %s", self._remain_talk_map)
+        console("Remain Whisper Map:  %s", self._remain_whisper_map)
+        console("Status map:  %s", self._status_map)
 
 
 class Task:
@@ -131,6 +132,7 @@ class Player(ABC):
         self._base_info = None
         self._phase = GamePhase.DAY #??????
         self._strategy = None
+        self._context = None
         self._tasks = {}
 
     @property
@@ -185,15 +187,16 @@ class Player(ABC):
         """
         Initialization should be common between all players.
         :param base_info: Current state of the game.
-        :param diff_data: Pandas dataframe that holds difference since last update.
+        :param diff_data: GameDiff that holds difference since last update.
         :param game_setting: The game settings.
         :return:
         """
         self._game_settings = GameSettings(game_setting)
         self._base_info = GameState(base_info)
         self.player_id = base_info['agentIdx']
-        Logger("log" + str(self.player_id) + ".txt")
-        Logger.instance.set_agent_index(self.player_id)
+        # Each game gets a fresh context, the context of the previous game is closed.
+        self.close()
+        self._context = GameContext.create(self.player_id, self._game_settings._random_seed)
         agents_idx = [i for i in range(1, self._game_settings._player_num+1)]
         # # Initialize the agent belief builder.
         # self._strategy = TownsFolkStrategy(agents_idx,
@@ -233,12 +236,139 @@ class Player(ABC):
     def finish(self):
         pass
 
+    def fallback(self, request):
+        """
+        The fallback_ answer of a decision, computed without advancing the random generator of the game.
+        :param request: Name of the decision.
+        :return:
+        """
+        rng = self._context.rng
+        state = rng.getstate()
+        try:
+            return getattr(self, "fallback_" + request)()
+        finally:
+            rng.setstate(state)
+
+    def plan(self, request):
+        """
+        The plan_ of a decision, made without advancing the random generator of the game: the numbers the plan drew
+        are only drawn by its commit, so a plan that isn't used leaves no trace at all.
+        :param request: Name of the decision.
+        :return: The answer and its commit, None if the decision can't be split.
+        """
+        return self._without_draws(getattr(self, "plan_" + request))
+
+    def speculate(self, request):
+        """
+        The speculate_ answer of a decision, isolated from the random generator of the game like plan, so a
+        speculated answer that is discarded doesn't shift the numbers drawn by the next decisions.
+        :param request: Name of the decision.
+        :return: The answer and its commit, None if it can't be computed ahead.
+        """
+        return self._without_draws(getattr(self, "speculate_" + request))
+
+    def random_state(self):
+        """
+        :return: State of the random generator of the game, answers computed ahead are only valid from it.
+        """
+        return self._context.rng.getstate()
+
+    def _without_draws(self, split_decision):
+        """
+        :param split_decision: Method returning an answer and its commit, or None.
+        :return: The result of the method, with the numbers it drew moved from the call to the commit.
+        """
+        rng = self._context.rng
+        state = rng.getstate()
+        try:
+            planned = split_decision()
+            drawn = rng.getstate()
+        finally:
+            rng.setstate(state)
+        if planned is None or drawn == state:
+            return planned
+        answer, commit = planned
+
+        def commit_draws():
+            rng.setstate(drawn)
+            if commit is not None:
+                commit()
+
+        return answer, commit_draws
+
+    # Answers used by the AgentContainer when a decision didn't finish before its deadline. They are computed
+    # on the decision thread before the decision starts, should be cheap and only read the current state, None
+    # means there is no better answer than the default.
+
+    def fallback_talk(self):
+        return self._strategy.fallback_talk()
+
+    def fallback_whisper(self):
+        return "Over"
+
+    def fallback_vote(self):
+        return self._strategy.fallback_vote()
+
+    def fallback_attack(self):
+        return None
+
+    def fallback_divine(self):
+        return None
+
+    def fallback_guard(self):
+        return None
+
+    # Decisions split for the AgentContainer: the plan must not change the state of the agent, instead it returns
+    # the answer and a function that applies the side effects of the decision once the answer is sent (None if
+    # there are none), so a plan that missed the deadline leaves no trace. None means the decision can't be split,
+    # it is then made by its own method and waited for.
+
+    def plan_talk(self):
+        return None
+
+    def plan_whisper(self):
+        return None
+
+    def plan_vote(self):
+        return None
+
+    def plan_attack(self):
+        return None
+
+    def plan_divine(self):
+        return None
+
+    def plan_guard(self):
+        return None
+
+    # Answers the AgentContainer computes ahead of the request when speculation is enabled, the plans of the
+    # decisions by default. None means the answer can't be computed ahead.
+
+    def speculate_talk(self):
+        return self.plan_talk()
+
+    def speculate_vote(self):
+        return self.plan_vote()
+
+    def speculate_guard(self):
+        return self.plan_guard()
+
+    def close(self):
+        """
+        Release the resources held by the context of the current game.
+        :return:
+        """
+        # The role agents don't call Player.__init__, so the context may not be set at all.
+        if getattr(self, '_context', None) is not None:
+            self._context.close()
+            self._context = None
+
     def update(self, base_info, diff_data, request):
-        print("Request type: ", request)
-        print("Received game diff:")
-        print(diff_data.to_string())
+        console("Request type:  %s", request)
+        console("Received game diff:")
+        console(diff_data.to_string)
         if request == Request.WHISPER:
-            print("Base info: ", base_info)
+            console("Base info:  %s", base_info)
         if request == Request.DAILY_FINISH:
             self._player_perspective.end_of_day()
         self._player_perspective.update(diff_data)
@@ -251,7 +381,7 @@ class Player(ABC):
         :return:
         '''
         epsilon = 0 if len(self._tasks) == 0 else 0.3
-        vote_type = np.random.choice([RAND_VOTE, REG_VOTE],p=[epsilon,1-epsilon])
+        vote_type = self._context.rng.choices([RAND_VOTE, REG_VOTE], weights=[epsilon, 1 - epsilon])[0]
         if vote_type == RAND_VOTE:
             return self.rand_vote()
         elif vote_type == REG_VOTE:
@@ -260,7 +390,7 @@ class Player(ABC):
     #should rename by implementation
     def rand_vote(self):
         #TODO: if tasks count is large, can try and increase max_depth
-        print("Tasks count: "+len(self._tasks))
+        console("Tasks count: %s", len(self._tasks))
         max_depth = 3
         tasks_to_handle = []
         for t_id, task in enumerate(self._tasks):
@@ -269,10 +399,10 @@ class Player(ABC):
             max_depth -= task.len()
             tasks_to_handle.append(t_id)
         # Draw task to handle
-        t_id = np.random.choice(tasks_to_handle, p=np.ones(len(tasks_to_handle))/len(tasks_to_handle))
+        t_id = self._context.rng.choice(tasks_to_handle)
         # Draw agent_id - currently assume a non recursive structure
-        np.random.choice([self._tasks[t_id].left, self._tasks[t_id].right],
-                         p=[self._tasks[t_id].lweight, self._tasks[t_id].rweight])
+        self._context.rng.choices([self._tasks[t_id].left, self._tasks[t_id].right],
+                                  weights=[self._tasks[t_id].lweight, self._tasks[t_id].rweight])
         self._tasks.pop(t_id)
 
     def get_best_vote_opt(self):
@@ -287,7 +417,7 @@ class Player(ABC):
                 agent_id = id
                 min = persp.vote_score
             elif persp.vote_score == min:
-                agent_id = np.random.choice([agent_id, id], p=[0.5,0.5])
+                agent_id = self._context.rng.choice([agent_id, id])
         return agent_id
 
     def add_task(self, task, priority):
@@ -1,5 +1,6 @@
 from agents.game_roles import GameRoles
 from agents.information_processing.agent_perspective import AgentStatus
+from agents.logger import console
 
 class PlayerPerspective(object):
 
@@ -45,8 +46,8 @@ class PlayerPerspective(object):
         prev_votes_val = sum([v / len(self.agent_2_prev_votes) for k, v in self.agent_2_prev_votes[agent_id].items()])
         curr_votes_val = sum([v / len(self.agent_2_agents_negative_talk) for id, v in self.agent_2_agents_negative_talk[agent_id].items()])
         if agent_id == self.my_index:
-            print("UPDATING MY INDEX")
-            print("PREV VOTE {0}, CURR {1}".format(prev_votes_val, curr_votes_val))
+            console("UPDATING MY INDEX")
+            console("PREV VOTE %s, CURR %s", prev_votes_val, curr_votes_val)
         self.under_heat_value[agent_id] = weights[0]*non_coop + weights[1]*prev_votes_val + weights[2]*curr_votes_val
         # self.under_heat_value[agent_id] = weights[0] * self.agent_enemies[agent_id] + weights[1] * prev_votes_val + weights[
         #     2] * curr_votes_val
@@ -56,12 +57,12 @@ class PlayerPerspective(object):
         '''
         Add votes to prev_votes_map and reset current turns potential votes
         '''
-        for line_num, txt in enumerate(diff_data["type"]):
-            if txt == "vote":
+        for row in diff_data:
+            if row.type == "vote":
                 up_total = True
                 try:
-                    voted_agent = int(diff_data.loc[line_num,"text"].split("[")[1][:-1])
-                    voting_agent = diff_data.loc[line_num,"agent"]
+                    voted_agent = int(row.text.split("[")[1][:-1])
+                    voting_agent = row.agent
                     self.agent_2_prev_votes[voted_agent][voting_agent] = self.agent_2_prev_votes[voted_agent].setdefault(voting_agent, 0) + 1
                     self.agent_2_agents_votes[voted_agent][voting_agent] = self.agent_2_agents_votes[voted_agent].setdefault(voting_agent, 0) + 1
 
@@ -121,6 +122,6 @@ class PlayerPerspective(object):
             return
         role = msg.role if 'role' in fields else None
         if target == self.my_index:
-            print("GOT MSG ABOUT MYSELF: {0}".format(msg))
+            console("GOT MSG ABOUT MYSELF: %s", msg)
         if role is None or role == GameRoles.WEREWOLF:
             self.update_potential_vote_data(subject, target, role, non_coop)
\ No newline at end of file
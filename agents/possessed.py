@@ -11,7 +11,7 @@ class Possessed(Villager):
         self._strategy = PossessedStrategy([i for i in range(1, self._game_settings._player_num + 1)
                                             if i != self._base_info._agentIndex],
                                            self._base_info._agentIndex,
-                                           self._base_info._role_map, self._player_perspective)
+                                           self._base_info._role_map, self._player_perspective, self._context)
 
     def getName(self):
         return "Possessed"
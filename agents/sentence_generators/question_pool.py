@@ -4,6 +4,8 @@ us questions.
 This will be used in cases we wish to generate a random question or ask
 a valid one.
 """
+from agents.logger import console
+
 INQUIRE = "INQUIRE"
 OPENING_PARENTHESIS = "("
 CLOSING_PARENTHESIS = ")"
@@ -83,7 +85,7 @@ def do_you_agree_with(**kwargs):
     return " ".join([INQUIRE, agent_str(subject), OPENING_PARENTHESIS + AGREE, talk_number + CLOSING_PARENTHESIS])
 
 def do_you_disagree_with(**kwargs):
-    print(kwargs)
+    console(kwargs)
     subject = kwargs["subject"]
     talk_number = kwargs["talk_number"]
 
@@ -0,0 +1,70 @@
+import threading
+
+from agents.logger import console, ERROR
+
+# Decisions that are likely to be requested after each request, computed ahead when speculation is enabled.
+NEXT_DECISIONS = {
+    "DAILY_INITIALIZE": ("talk",),
+    "talk": ("talk", "vote"),
+    "whisper": ("talk",),
+    "vote": ("vote", "guard"),
+}
+
+# Requests after which nothing computed before them is valid anymore, even without new diff rows.
+INVALIDATING_REQUESTS = frozenset(["INITIALIZE", "DAILY_INITIALIZE", "DAILY_FINISH", "FINISH"])
+
+
+class Speculator(object):
+    """
+    Answers of decisions computed between the requests, using the speculate method of the agent.
+    Every answer is stamped with the generation it was computed in, and the generation is advanced whenever
+    the inputs of the agent change (new diff rows, a new day or an answer that was used), so an answer is only
+    served when nothing changed since it was computed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._answers = {}
+        self.stats = {"hits": 0, "misses": 0, "invalidated": 0}
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            if self._answers:
+                self.stats["invalidated"] += len(self._answers)
+                self._answers = {}
+
+    def speculate(self, agent, requests):
+        """
+        Compute the answers of the given decisions, should run where the calls of the agent are serialized.
+        :param agent:
+        :param requests: Names of the decisions.
+        :return:
+        """
+        with self._lock:
+            generation = self._generation
+        for request in requests:
+            if request in self._answers:
+                continue
+            try:
+                answer = agent.speculate(request)
+            except Exception:
+                console("SPECULATION EXCEPTION IN " + request.upper() + ":", level=ERROR, exc_info=True)
+                answer = None
+            if answer is None:
+                continue
+            with self._lock:
+                if generation != self._generation:
+                    return
+                self._answers[request] = answer
+
+    def take(self, request):
+        """
+        :param request:
+        :return: The answer and its commit function computed for the request, None if there is no valid answer.
+        """
+        with self._lock:
+            answer = self._answers.pop(request, None)
+            self.stats["hits" if answer is not None else "misses"] += 1
+            return answer
@@ -1,7 +1,5 @@
 from abc import ABC, abstractmethod
-import random
 from agents.sentence_generators.question_pool import *
-from agents.information_processing.sentences_container import SentencesContainer
 from agents.game_roles import GameRoles
 
 """
@@ -33,19 +31,32 @@ BASE_QUESTIONS = [who_will_vote_for, do_you_estimate, do_you_comingout]
 
 class AgentState(ABC):
 
-    def __init__(self, my_agent, agent_indices):
+    def __init__(self, my_agent, agent_indices, context):
         self._index = my_agent
         self._agent_indices = agent_indices
+        self._context = context
         self._sentences_said = []
         self._day = 1
 
-    @abstractmethod
     def talk(self, task_manager):
         """
         Given the task manager that holds all the tasks at hand choose what to say next.
         :param task_manager:
         :return:
         """
+        sentence, task = self.plan_talk(task_manager)
+        if task is not None:
+            task_manager.remove_task(task)
+        return sentence
+
+    @abstractmethod
+    def plan_talk(self, task_manager):
+        """
+        Choose what to say next without changing the task manager, so the choice can be made ahead of time.
+        :param task_manager:
+        :return: The sentence and the task it resolves (None if it isn't a task), the task has to be removed
+        from the task manager once the sentence is said. None if the state doesn't plan its sentences.
+        """
         pass
 
     @abstractmethod
@@ -79,22 +90,22 @@ class AgentState(ABC):
         Ask a random question toward a random agent target.
         :return:
         """
-        random_subject = random.choice(self._agent_indices)
-        random_target = random.choice([x for x in self._agent_indices if x != random_subject])
+        random_subject = self._context.rng.choice(self._agent_indices)
+        random_target = self._context.rng.choice([x for x in self._agent_indices if x != random_subject])
         question_pool = BASE_QUESTIONS.copy()
         params = {}
 
         # If there is any useful sentence we can ask whether the agents agrees or disagrees.
-        useful_sentences = SentencesContainer.instance.has_useful_sentence_on_day(self._day, random_subject)
+        useful_sentences = self._context.sentences_container.has_useful_sentence_on_day(self._day, random_subject)
         if len(useful_sentences) != 0:
             question_pool += [do_you_agree_with, do_you_disagree_with]
-            params["talk_number"] = random.choice(useful_sentences)
+            params["talk_number"] = self._context.rng.choice(useful_sentences)
 
         params["subject"] = random_subject
         params["target"] = random_target
-        params["role"] = random.choice(list(GameRoles))
+        params["role"] = self._context.rng.choice(list(GameRoles))
 
-        return random.choice(question_pool)(**params)
+        return self._context.rng.choice(question_pool)(**params)
 
     def ask_unique_random_question(self):
         """
@@ -112,12 +123,17 @@ NIGHT_BASE_QUESTIONS = [do_you_comingout]
 
 class NightAgentState(AgentState):
 
-    def __init__(self, my_agent, agent_indices):
+    def __init__(self, my_agent, agent_indices, context):
         self._index = my_agent
         self._agent_indices = agent_indices
+        self._context = context
         self._sentences_said = []
         self._day = 0
 
+    def plan_talk(self, task_manager):
+        # Whispers aren't planned ahead, the night states only implement talk.
+        return None
+
     @abstractmethod
     def talk(self, task_manager):
         """
@@ -158,25 +174,25 @@ class NightAgentState(AgentState):
         Ask a random question toward a random agent target.
         :return:
         """
-        random_subject = random.choice(self._agent_indices)
-        random_target = random.choice([x for x in self._agent_indices if x != random_subject])
+        random_subject = self._context.rng.choice(self._agent_indices)
+        random_target = self._context.rng.choice([x for x in self._agent_indices if x != random_subject])
         question_pool = NIGHT_BASE_QUESTIONS.copy()
         params = {}
 
         # If there is any useful sentence we can ask whether the agents agrees or disagrees.
-        useful_sentences = SentencesContainer.instance.has_useful_sentence_on_day(self._day, random_subject)
+        useful_sentences = self._context.sentences_container.has_useful_sentence_on_day(self._day, random_subject)
         if len(useful_sentences) != 0:
             question_pool += [do_you_agree_with, do_you_disagree_with]
-            params["talk_number"] = random.choice(useful_sentences)
+            params["talk_number"] = self._context.rng.choice(useful_sentences)
 
         params["subject"] = random_subject
         params["target"] = random_target
-        temp = random.choice(list(GameRoles))
+        temp = self._context.rng.choice(list(GameRoles))
         while temp == GameRoles.WEREWOLF:
-            temp = random.choice(list(GameRoles))
+            temp = self._context.rng.choice(list(GameRoles))
         params["role"] = temp
 
-        return random.choice(question_pool)(**params)
+        return self._context.rng.choice(question_pool)(**params)
 
 
 
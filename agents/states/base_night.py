@@ -1,7 +1,6 @@
 from agents.states.agent_state import NightAgentState
 from agents.tasks.task_type import TaskType
 from agents.states.state_type import StateType
-import random
 
 BASE_STATE_PROB = 0.8
 
@@ -25,7 +24,7 @@ class BaseNight(NightAgentState):
         :return:
         """
         if task_manager.num_tasks() > 0:
-            coin_flip = random.random()
+            coin_flip = self._context.rng.random()
             if coin_flip > BASE_STATE_PROB:
                 return "REQUEST ANY((ATTACK Agent{})".format()
             else:
@@ -1,7 +1,6 @@
 from agents.states.agent_state import AgentState
 from agents.tasks.task_type import TaskType
 from agents.states.state_type import StateType
-import random
 
 BASE_STATE_PROB = 0.8
 
@@ -18,17 +17,18 @@ class BaseState(AgentState):
     def get_task_mask(self):
         return {val: 1 for val in list(TaskType)}
 
-    def talk(self, task_manager):
+    def plan_talk(self, task_manager):
         """
         Randomize between task of highest importance or random question.
         :param task_manager:
         :return:
         """
         if task_manager.num_tasks() > 0:
-            coin_flip = random.random()
+            coin_flip = self._context.rng.random()
             if coin_flip > BASE_STATE_PROB:
-                return self.ask_unique_random_question()
+                return self.ask_unique_random_question(), None
             else:
-                return task_manager.get_most_important_task().handle_task()
+                task = task_manager.peek_most_important_task()
+                return task.handle_task(), task
         else:
-            return self.ask_unique_random_question()
\ No newline at end of file
+            return self.ask_unique_random_question(), None
\ No newline at end of file
@@ -12,8 +12,8 @@ class DayOne(AgentState):
     def get_type(self):
         return StateType.DAY_ONE
 
-    def __init__(self, my_agent, agent_indices):
-        AgentState.__init__(self, my_agent, agent_indices)
+    def __init__(self, my_agent, agent_indices, context):
+        AgentState.__init__(self, my_agent, agent_indices, context)
 
     def get_task_mask(self):
         """
@@ -22,12 +22,12 @@ class DayOne(AgentState):
         """
         return {val: 0 for val in list(TaskType)}
 
-    def talk(self, task_manager):
+    def plan_talk(self, task_manager):
         """
         In the talk function in the first day we ask random questions.
         :return:
         """
-        return self.ask_unique_random_question()
+        return self.ask_unique_random_question(), None
 
 
 
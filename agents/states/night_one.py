@@ -1,7 +1,6 @@
 from agents.states.agent_state import NightAgentState
 from agents.tasks.task_type import TaskType
 from agents.states.state_type import StateType
-import random
 
 BASE_STATE_PROB = 0.5
 
@@ -15,8 +14,8 @@ class Night_one(NightAgentState):
     def get_type(self):
         return StateType.NIGHT_ONE
 
-    def __init__(self, my_agent, agent_indices):
-        NightAgentState.__init__(self, my_agent, agent_indices)
+    def __init__(self, my_agent, agent_indices, context):
+        NightAgentState.__init__(self, my_agent, agent_indices, context)
 
     def get_task_mask(self):
         """
@@ -1,26 +1,23 @@
 from agents.information_processing.agent_perspective import *
+from agents.information_processing.perspective_store import PerspectiveStore
 from agents.information_processing.message_parsing import *
-from agents.information_processing.sentences_container import SentencesContainer
 from agents.information_processing.graph_utils.group_finder import GroupFinder
 from agents.information_processing.graph_utils.visualization import visualize
 from agents.states.base_state import BaseState
-from agents.information_processing.dissection.sentence_dissector import SentenceDissector
 from agents.states.day_one import DayOne
 from agents.states.night_one import Night_one
 from agents.information_processing.lie_detector import LieDetector
 from agents.tasks.task_manager import TaskManager
 from agents.vote.wolf_vote_model import wolfVoteModel
 from agents.states.state_type import StateType
-from agents.strategies.player_evaluation import PlayerEvaluation
-from agents.strategies.role_estimations import RoleEstimations
 from agents.tasks.task_type import TaskType
 from agents.tasks.request_attack_task import RequestAttackTask
 from agents.tasks.fake_role_task import FakeRoleTask
-import numpy as np
 from agents.strategies.agent_strategy import TownsFolkStrategy
 from agents.game_roles import GameRoles
 import operator
 from agents.sentence_generators.logic_generators import *
+from agents.logger import console, INFO, ERROR
 
 # These sentences currently, don't help us much (maybe will be used in future dev).
 UNUSEFUL_SENTENCES = ['Skip', 'Over']
@@ -55,15 +52,15 @@ class WolfStrategy(TownsFolkStrategy):
     inspects moves of werewolves teammates through the night and day.
     """
 
-    def __init__(self, agent_indices, my_index, role_map, player_perspective):
+    def __init__(self, agent_indices, my_index, role_map, player_perspective, context):
         self._humans = [i for i in agent_indices if not str(i) in role_map.keys()]
         self._wolves = [i for i in role_map.keys()]
         self.fake_rol = None
         if len(agent_indices) > 5:
-            self._agent_night_state = Night_one(my_index, agent_indices)
+            self._agent_night_state = Night_one(my_index, agent_indices, context)
         else:
-            self.fake_rol = np.random.choice(['SEER', 'VILLAGER'])
-        self._agent_state = DayOne(my_index, agent_indices)
+            self.fake_rol = context.rng.choice(['SEER', 'VILLAGER'])
+        self._agent_state = DayOne(my_index, agent_indices, context)
         #self.fake_rol = None
         self.fake_role_tasks = agent_indices.copy()
         self._message_parser = MessageParser()
@@ -78,34 +75,37 @@ class WolfStrategy(TownsFolkStrategy):
         # Used for tasks that can be done only once per day.
         self._done_in_day = False
 
-        # Initialize the sentences container singleton
-        SentencesContainer()
-
-        # Initialize the singleton sentences dissector.
-        SentenceDissector(my_index) #TODO: check!
-
-        PlayerEvaluation(agent_indices, self._index, self._wolves)
-
-        RoleEstimations(self._agent_indices, self._index)
+        # Game state shared by all the parts of this agent, our evaluation knows who our teammates are.
+        self._context = context
+        self._context.setup(agent_indices, self._index, self._wolves)
 
         self._perspectives = {}
         self._teammates = {}
 
+        perspectives_store = PerspectiveStore(len(agent_indices) + 1)
+        teammates_store = PerspectiveStore(len(agent_indices) + 1)
         for idx in self._agent_indices:
-            self._perspectives[idx] = AgentPerspective(idx, my_index, len(agent_indices) + 1,
-                                                       None if idx not in role_map.keys() else role_map[idx])
+            self._perspectives[idx] = AgentPerspective(idx, my_index, len(agent_indices) + 1, context,
+                                                       None if idx not in role_map.keys() else role_map[idx],
+                                                       perspectives_store)
         for idx in self._agent_indices:
-            self._teammates[idx] = AgentPerspective(idx, my_index, len(agent_indices) + 1,
-                                                   None if idx not in role_map.keys() else role_map[idx])
+            self._teammates[idx] = AgentPerspective(idx, my_index, len(agent_indices) + 1, context,
+                                                   None if idx not in role_map.keys() else role_map[idx],
+                                                   teammates_store)
 
-        self._group_finder = GroupFinder(agent_indices + [my_index], my_index)
+        self._group_finder = GroupFinder(agent_indices + [my_index], my_index, context)
 
-        self._lie_detector = LieDetector(my_index, agent_indices, role_map[str(my_index)])
+        self._lie_detector = LieDetector(my_index, agent_indices, role_map[str(my_index)], context)
         self._night_task_manager = TaskManager()
         self._task_manager = TaskManager()
 
-        self._vote_model = wolfVoteModel(self._perspectives, self._wolves, my_index)
+        self._vote_model = wolfVoteModel(self._perspectives, self._wolves, my_index, context)
         self._special_roles = {}
+
+        # Game graph built in the last update and the day it was built for, reused while nothing changed.
+        self._game_graph = None
+        self._graph_day = None
+        self.graph_rebuilds = {"skipped": 0, "executed": 0}
         self._werewolf_accused_counter = 0
         self._enemies = {i: 0 for i in self._humans}
         self._enemies_quoats = {i: "" for i in self._humans}
@@ -118,7 +118,7 @@ class WolfStrategy(TownsFolkStrategy):
     def update(self, diff_data, request):
         """
         Given the diff_data received in the agent's update function update the perspective of the agent.
-        :param diff_data:
+        :param diff_data: GameDiff with the rows added since the last update.
         :return:
         """
         """
@@ -126,24 +126,25 @@ class WolfStrategy(TownsFolkStrategy):
                 :param diff_data:
                 :return:
                 """
-        self._group_finder.clean_groups()
         try:
             day = None
             message_type = None
-
-            for i in range(len(diff_data.index)):
-                curr_index = diff_data.loc[i, 'agent']
-                agent_sentence = diff_data.loc[i, 'text']
-                idx = diff_data.loc[i, 'idx']
-                turn = diff_data.loc[i, 'turn']
-                day = diff_data.loc[i, 'day']
-                message_type = MessageType[diff_data.loc[i, 'type'].upper()]
+            changed_perspectives = set()
+
+            for row in diff_data:
+                curr_index = row.agent
+                agent_sentence = row.text
+                idx = row.idx
+                turn = row.turn
+                day = row.day
+                message_type = MessageType[row.type.upper()]
                 talk_number = TalkNumber(day, turn, idx)
-                Logger.instance.write("Got sentence: " + str(agent_sentence) + " from agent " + str(curr_index) + '\n')
+                self._context.logger.write("Got sentence: %s from agent %s\n", agent_sentence, curr_index)
 
                 if curr_index in self._perspectives.keys():
+                    changed_perspectives.add(curr_index)
                     if agent_sentence not in UNUSEFUL_SENTENCES:
-                        Logger.instance.write("Got Sentence: " + agent_sentence + '\n')
+                        self._context.logger.write("Got Sentence: %s\n", agent_sentence)
                         parsed_sentence = self._message_parser.process_sentence(agent_sentence, curr_index, day,
                                                                                 talk_number)
                     if message_type == MessageType.TALK:
@@ -160,8 +161,8 @@ class WolfStrategy(TownsFolkStrategy):
                         self._perspectives[curr_index].update_status(AgentStatus.DEAD_TOWNSFOLK)
                         self._teammates[curr_index].update_status(AgentStatus.DEAD_TOWNSFOLK)
                         self._vote_model.update_dead_agent(curr_index)
-                        print("AGENT" + str(self._index) + " Player " + str(curr_index) + " died by villagers")
-                        PlayerEvaluation.instance.player_died(curr_index)
+                        console("AGENT%s Player %s died by villagers", self._index, curr_index)
+                        self._context.player_evaluation.player_died(curr_index)
                         if curr_index in self._enemies:
                             del self._enemies[curr_index]
                         if curr_index in self._accusing:
@@ -200,9 +201,9 @@ class WolfStrategy(TownsFolkStrategy):
                     self._message_parser.add_my_sentence(self._index, agent_sentence, day, talk_number)
 
 
-            game_graph = self._group_finder.find_groups(self._perspectives, day) #TODO
+            game_graph = self.build_game_graph(changed_perspectives, day) #TODO
             # If there is new data, check if new tasks can be created.
-            if len(diff_data.index) > 0:
+            if len(diff_data) > 0:
                 self.handle_estimations(game_graph)
                 tasks = self.generate_tasks(game_graph, day)
                 for t in tasks:
@@ -221,9 +222,9 @@ class WolfStrategy(TownsFolkStrategy):
             # Note: In case you try running several games together you cant use the visualization.
             if message_type == MessageType.FINISH:
                 # visualize(game_graph)
-                SentencesContainer.instance.clean()
-                PlayerEvaluation.instance.reset(self._agent_indices, self._index)
-                RoleEstimations.instance.reset(self._agent_indices, self._index)
+                self._context.reset(self._agent_indices, self._index)
+                console("AGENT%s game graph rebuilds: %s estimation pairs: %s parse cache: %s", self._index,
+                        self.graph_rebuilds, self._group_finder.estimation_pairs, PARSE_CACHE.info(), level=INFO)
 
             # At the end of the day reset the scores accumulated by the vote model.
             if request == "DAILY_FINISH":
@@ -231,12 +232,12 @@ class WolfStrategy(TownsFolkStrategy):
                 self._done_in_day = False
 
             elif request == "VOTE":
-                PlayerEvaluation.instance.log()
+                self._context.player_evaluation.log()
                 updated_scores = game_graph.get_players_voting_scores()
                 for agent_idx, score in updated_scores.items():
                     self._vote_model.update_vote(agent_idx, score)
         except:
-            print("ERROR WOLF STRATEGY UPDATE")
+            console("ERROR WOLF STRATEGY UPDATE", level=ERROR, exc_info=True)
 
 
 
@@ -256,7 +257,7 @@ class WolfStrategy(TownsFolkStrategy):
             if self._accusing[top_accusing]:
                 sentence = "BECAUSE ({accusing_sentence}) (REQUEST ANY (ESTIMATE Agent[{0:02d}] WEREWOLF))".\
                     format(top_accusing, accusing_sentence=self._accusing[top_accusing])
-                Logger.instance.write("I Said: " + sentence)
+                self._context.logger.write("I Said: %s", sentence)
                 self._accusing[top_accusing] = ""
                 self._werewolf_accused_counter = 0
                 return sentence
@@ -268,23 +269,23 @@ class WolfStrategy(TownsFolkStrategy):
                 self._player_perspective.under_heat_value[self._index] -= 8
                 sentence = "BECAUSE ({accusing_sentence}) (REQUEST ANY (VOTE Agent[{0:02d}]))".\
                     format(worst_enemy, accusing_sentence=self._enemies_quoats[worst_enemy])
-                Logger.instance.write("I Said: " + sentence)
+                self._context.logger.write("I Said: %s", sentence)
                 return sentence
 
         else:
             sentence = self._agent_state.talk(self._task_manager)
-            Logger.instance.write("I Said: " + sentence)
+            self._context.logger.write("I Said: %s", sentence)
             return sentence
 
     def digest_sentences(self, diff_data):
-        for i, row in diff_data.iterrows():
-            talking_agent_idx = row["agent"]
+        for row in diff_data:
+            talking_agent_idx = row.agent
             if talking_agent_idx != self._index and talking_agent_idx not in self._wolves:
                 # check if i'm under attack - agents are trying to vote me out
                 substr = self._enemies_substr
-                if "REQUEST" in row["text"] and substr in row["text"]:
-                    Logger.instance.write(str(talking_agent_idx) + "WANTED TO VOTE ME")
-                    print(talking_agent_idx, "WANTED TO VOTE ME")
+                if "REQUEST" in row.text and substr in row.text:
+                    self._context.logger.write("%sWANTED TO VOTE ME", talking_agent_idx)
+                    console("%s WANTED TO VOTE ME", talking_agent_idx)
                     self._player_perspective.under_heat_value[self._index] += 1
                     if talking_agent_idx in self._enemies.keys():
                         self._enemies[talking_agent_idx] += 1
@@ -295,13 +296,13 @@ class WolfStrategy(TownsFolkStrategy):
                 # if people view me as a werewolf
                 substrs = self._accusing_substrs
                 for substr in substrs:
-                    if substr in row["text"]:
-                        Logger.instance.write(str(talking_agent_idx) + "CALLED ME WOLF")
-                        print(talking_agent_idx, "CALLED ME WOLF")
+                    if substr in row.text:
+                        self._context.logger.write("%sCALLED ME WOLF", talking_agent_idx)
+                        console("%s CALLED ME WOLF", talking_agent_idx)
                         self._player_perspective.under_heat_value[self._index] += 1
                         self._werewolf_accused_counter += 1
                         if talking_agent_idx in self._enemies.keys():
-                            self._enemies[row["agent"]] += 1
+                            self._enemies[row.agent] += 1
                         if talking_agent_idx in self._accusing.keys():
                             self._accusing[talking_agent_idx] = "DAY {day} ({substr})".format(day=str(self._day),
                                                                                               substr=substr)
@@ -313,24 +314,25 @@ class WolfStrategy(TownsFolkStrategy):
             self._night_task_manager._pop_all()
             self._task_manager._pop_all()
             if self.come_out_role and (self.fake_rol == GameRoles.SEER or self.fake_rol == GameRoles.MEDIUM):
-                temp = np.random.choice(self.fake_role_tasks)
+                temp = self._context.rng.choice(self.fake_role_tasks)
                 self.fake_role_tasks.remove(temp)
                 if temp in self._wolves:
                     frind = True
                 else:
-                    frind = np.random.choice([False,True],p=[0.4,0.6])
+                    frind = self._context.rng.choices([False, True], weights=[0.4, 0.6])[0]
                 t = FakeRoleTask(temp,1000,self._day,[self._index],self._index,self.fake_rol,frind)
                 self._task_manager.add_task(t)
             team_attack = self.get_best_attak_for_team()
             team_risk = 0.5
-            my_attack = max(self._enemies.items(), key=operator.itemgetter(1))[0] if len(self._enemies.items()) >0 else np.random.choice(self._humans)
+            my_attack = max(self._enemies.items(), key=operator.itemgetter(1))[0] if len(self._enemies.items()) >0 else self._context.rng.choice(self._humans)
             my_risk = 0.35
-            spichel_attack = np.random.choice(self._humans)
+            spichel_attack = self._context.rng.choice(self._humans)
             random_risk = 0.15
-            vote = np.random.choice([my_attack, team_attack,spichel_attack], p=[my_risk, team_risk,random_risk])
+            vote = self._context.rng.choices([my_attack, team_attack, spichel_attack],
+                                             weights=[my_risk, team_risk, random_risk])[0]
         except:
             try:
-                return np.random.choice(self._humans)
+                return self._context.rng.choice(self._humans)
             except:
                 return "1"
         return vote
@@ -350,15 +352,15 @@ class WolfStrategy(TownsFolkStrategy):
         """
         try:
             if self.fake_rol == None:
-                self.fake_rol = np.random.choice(['SEER','VILLAGER','MEDIUM'])
+                self.fake_rol = self._context.rng.choice(['SEER', 'VILLAGER', 'MEDIUM'])
                 return "COMINGOUT Agent[{me}] {rol}".\
                         format(rol=self.fake_rol,me=str(self._index))
             new_kill_task = RequestAttackTask(max(self._enemies.items(), key=operator.itemgetter(1))[0],1000,self._day,[self._index],self._index)
             self._night_task_manager.add_task(new_kill_task)
             sentence = self._agent_night_state.talk(self._night_task_manager)
-            Logger.instance.write("I Said: " + sentence)
+            self._context.logger.write("I Said: %s", sentence)
         except:
-            print("WOLF WHISPER ERR ")
+            console("WOLF WHISPER ERR ", level=ERROR, exc_info=True)
             return "Skip"
         return sentence
 
@@ -370,19 +372,19 @@ class WolfStrategy(TownsFolkStrategy):
         """
         try:
             if self._day > 0 and self._agent_night_state.get_type() == StateType.NIGHT_ONE:
-                Logger.instance.write("Updated night state to Base State from Day One State")
-                self._agent_night_state = BaseState(self._index, self._agent_indices)
+                self._context.logger.write("Updated night state to Base State from Day One State")
+                self._agent_night_state = BaseState(self._index, self._agent_indices, self._context)
         except:
-            print("ER UPDATE WOLF NIGHT STATE ")
+            console("ER UPDATE WOLF NIGHT STATE ", level=ERROR, exc_info=True)
 
     def get_best_attak_for_team(self):
         try:
             eneamy = {}
             for cop,cop_persp in self._teammates.items():
-                temp = cop_persp.get_enemies()
-                for id,t_enemy in temp.items():
-                    eneamy[id] = eneamy.get(id,0) + t_enemy.get_hostility(self._day)
+                temp = cop_persp.get_enemies_hostility(self._day)
+                for id,hostility in temp.items():
+                    eneamy[id] = eneamy.get(id,0) + hostility
         except:
-            print("WOLF ")
+            console("WOLF ", level=ERROR, exc_info=True)
             return []
         return max(eneamy.items(), key=operator.itemgetter(1))[0]
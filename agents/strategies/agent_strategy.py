@@ -1,21 +1,19 @@
 from agents.information_processing.agent_perspective import *
+from agents.information_processing.perspective_store import PerspectiveStore
 from agents.information_processing.message_parsing import *
-from agents.information_processing.sentences_container import SentencesContainer
 from agents.information_processing.graph_utils.group_finder import  GroupFinder
 from agents.states.base_state import BaseState
-from agents.information_processing.dissection.sentence_dissector import SentenceDissector
 from agents.states.day_one import DayOne
 from agents.information_processing.lie_detector import LieDetector
 from agents.tasks.task_manager import TaskManager
 from agents.vote.townsfolk_vote_model import TownsfolkVoteModel
 from agents.states.state_type import StateType
-from agents.strategies.player_evaluation import PlayerEvaluation
-from agents.strategies.role_estimations import RoleEstimations
 from agents.tasks.guard_task import GuardTask
 from agents.tasks.vote_task import VoteTask
 from agents.tasks.divine_task import DivineTask
 from agents.tasks.identify_task import IdentifyTask
 import numpy as np
+from agents.logger import console, INFO, ERROR
 
 # These sentences currently, don't help us much (maybe will be used in future dev).
 UNUSEFUL_SENTENCES = ['Skip', 'Over']
@@ -51,7 +49,7 @@ class TownsFolkStrategy(object):
     inspects moves of werewolves teammates through the night and day.
     """
 
-    def __init__(self, agent_indices, my_index, role_map, player_perspective):
+    def __init__(self, agent_indices, my_index, role_map, player_perspective, context):
         self._perspectives = {}
         self._message_parser = MessageParser()
         self._index = my_index
@@ -63,31 +61,32 @@ class TownsFolkStrategy(object):
         # Used for tasks that can be done only once per day.
         self._done_in_day = False
 
-        # Initialize the sentences container singleton
-        SentencesContainer()
-
-        # Initialize the singleton sentences dissector.
-        SentenceDissector(my_index)
-
-        PlayerEvaluation(agent_indices, self._index)
-
-        RoleEstimations(self._agent_indices, self._index)
+        # Game state shared by all the parts of this agent (sentences, evaluation, estimations and the logger).
+        self._context = context
+        self._context.setup(agent_indices, self._index)
 
+        perspectives_store = PerspectiveStore(len(agent_indices) + 1)
         for idx in agent_indices:
-            self._perspectives[idx] = AgentPerspective(idx, my_index, len(agent_indices) + 1,
-                                                       None if idx not in role_map.keys() else role_map[idx])
+            self._perspectives[idx] = AgentPerspective(idx, my_index, len(agent_indices) + 1, context,
+                                                       None if idx not in role_map.keys() else role_map[idx],
+                                                       perspectives_store)
 
-        self._agent_state = DayOne(my_index, agent_indices)
-        self._group_finder = GroupFinder(agent_indices + [my_index], my_index)
+        self._agent_state = DayOne(my_index, agent_indices, context)
+        self._group_finder = GroupFinder(agent_indices + [my_index], my_index, context)
 
-        self._lie_detector = LieDetector(my_index, agent_indices, role_map[str(my_index)])
+        self._lie_detector = LieDetector(my_index, agent_indices, role_map[str(my_index)], context)
         self._task_manager = TaskManager()
 
-        self._vote_model = TownsfolkVoteModel(agent_indices, my_index)
+        self._vote_model = TownsfolkVoteModel(agent_indices, my_index, context)
 
         # Save here all players with special roles we currently trust.
         self._special_roles = {}
 
+        # Game graph built in the last update and the day it was built for, reused while nothing changed.
+        self._game_graph = None
+        self._graph_day = None
+        self.graph_rebuilds = {"skipped": 0, "executed": 0}
+
     def handle_message(self, message, game_graph):
         """
         Given a message directed towards our agent decide whether we should handle it in some form.
@@ -102,19 +101,19 @@ class TownsFolkStrategy(object):
         tasks = []
         try:
             if message.type == SentenceType.REQUEST:
-                Logger.instance.write("GOT REQUEST MESSAGE TO ME " + str(message.original_message))
+                self._context.logger.write("GOT REQUEST MESSAGE TO ME %s", message.original_message)
                 if message.content.type == SentenceType.VOTE:
                     self._vote_model.handle_vote_request(game_graph, message.subject, message.content.target)
 
 
             elif message.type == SentenceType.INQUIRE:
-                Logger.instance.write("GOT REQUEST MESSAGE TO ME " + str(message.original_message))
+                self._context.logger.write("GOT REQUEST MESSAGE TO ME %s", message.original_message)
                 if message.content.type == SentenceType.VOTE and message.content.target == "ANY":
                     if message.subject in game_graph.get_node(self._index).get_top_k_cooperators(k=3):
                         target = self._vote_model.get_vote()
                         tasks.append(VoteTask(1, self._day, [target], self._index, target))
         except:
-            print("VILLAGER HANDLE MESSAGE ERR ")
+            console("VILLAGER HANDLE MESSAGE ERR ", level=ERROR, exc_info=True)
         return tasks
 
 
@@ -133,41 +132,42 @@ class TownsFolkStrategy(object):
                 for message in messages_to_me:
                     tasks += self.handle_message(message, game_graph)
         except:
-            print("VILLAGER HANDLE MESSAGE ERR ")
+            console("VILLAGER HANDLE MESSAGE ERR ", level=ERROR, exc_info=True)
         return tasks
 
     def update(self, diff_data, request):
         """
         Given the diff_data received in the agent's update function update the perspective of the agent.
-        :param diff_data:
+        :param diff_data: GameDiff with the rows added since the last update.
         :return:
         """
         try:
-            self._group_finder.clean_groups()
             day = None
             message_type = None
-
-            for i in range(len(diff_data.index)):
-                curr_index = diff_data.loc[i, 'agent']
-                agent_sentence = diff_data.loc[i, 'text']
-                idx = diff_data.loc[i, 'idx']
-                turn = diff_data.loc[i, 'turn']
-                day = diff_data.loc[i, 'day']
-                message_type = MessageType[diff_data.loc[i, 'type'].upper()]
+            changed_perspectives = set()
+
+            for row in diff_data:
+                curr_index = row.agent
+                agent_sentence = row.text
+                idx = row.idx
+                turn = row.turn
+                day = row.day
+                message_type = MessageType[row.type.upper()]
                 talk_number = TalkNumber(day, turn, idx)
-                Logger.instance.write("Got sentence: " + str(agent_sentence) + " from agent " + str(curr_index)  + '\n')
+                self._context.logger.write("Got sentence: %s from agent %s\n", agent_sentence, curr_index)
 
                 #only seer and medium players will see
                 if message_type == MessageType.DIVINE or message_type == MessageType.IDENTIFY:
-                    print("DIVINE MESSAGE RECEIVED")
+                    console("DIVINE MESSAGE RECEIVED")
                     parsed_sentence = self._message_parser.process_sentence(agent_sentence, curr_index, day,
                                                                             talk_number)
                     # store divined results
                     self.update_divine_result(parsed_sentence.target, parsed_sentence.species)
 
                 if curr_index in self._perspectives.keys():
+                    changed_perspectives.add(curr_index)
                     if agent_sentence not in UNUSEFUL_SENTENCES:
-                        Logger.instance.write("Got Sentence: " + agent_sentence + '\n')
+                        self._context.logger.write("Got Sentence: %s\n", agent_sentence)
                         parsed_sentence = self._message_parser.process_sentence(agent_sentence, curr_index, day,
                                                                                 talk_number)
                     if message_type == MessageType.TALK:
@@ -203,17 +203,17 @@ class TownsFolkStrategy(object):
                             self._player_perspective.update_my_status(AgentStatus.DEAD_TOWNSFOLK)
                         self._perspectives[curr_index].update_status(AgentStatus.DEAD_TOWNSFOLK)
                         self._vote_model.update_dead_agent(curr_index)
-                        print("AGENT" + str(self._index) + " Player " + str(curr_index) + " died by villagers")
-                        PlayerEvaluation.instance.player_died(curr_index)
+                        console("AGENT%s Player %s died by villagers", self._index, curr_index)
+                        self._context.player_evaluation.player_died(curr_index)
                     elif message_type == MessageType.DEAD:
                         self._perspectives[curr_index].update_status(AgentStatus.DEAD_WEREWOLVES)
                         self._vote_model.update_dead_agent(curr_index)
                         self.update_votes_after_death(curr_index)
 
                     elif message_type == MessageType.ATTACK_VOTE:
-                        print("Got attack vote when I am in townsfolk, BUG.")
+                        console("Got attack vote when I am in townsfolk, BUG.", level=ERROR)
                     elif message_type == MessageType.WHISPER:
-                        print("Got whisper when I am in townsfolk, BUG.")
+                        console("Got whisper when I am in townsfolk, BUG.", level=ERROR)
                     elif message_type == MessageType.FINISH:
                         self._perspectives[curr_index].update_real_role(parsed_sentence.role)
                         self._group_finder.set_player_role(curr_index, parsed_sentence.role)
@@ -224,11 +224,11 @@ class TownsFolkStrategy(object):
                     self._message_parser.add_my_sentence(self._index, agent_sentence, day, talk_number)
 
 
-            game_graph = self._group_finder.find_groups(self._perspectives, day)
+            game_graph = self.build_game_graph(changed_perspectives, day)
             #self._player_perspective.update_relationships(game_graph)
 
             # If there is new data, check if new tasks can be created.
-            if len(diff_data.index) > 0:
+            if len(diff_data) > 0:
                 self.handle_estimations(game_graph)
                 tasks = self.generate_tasks(game_graph, day)
                 self._task_manager.add_tasks(tasks)
@@ -244,9 +244,9 @@ class TownsFolkStrategy(object):
             # Note: In case you try running several games together you cant use the visualization.
             if message_type == MessageType.FINISH:
                 # visualize(game_graph)
-                SentencesContainer.instance.clean()
-                PlayerEvaluation.instance.reset(self._agent_indices, self._index)
-                RoleEstimations.instance.reset(self._agent_indices, self._index)
+                self._context.reset(self._agent_indices, self._index)
+                console("AGENT%s game graph rebuilds: %s estimation pairs: %s parse cache: %s", self._index,
+                        self.graph_rebuilds, self._group_finder.estimation_pairs, PARSE_CACHE.info(), level=INFO)
 
             # At the end of the day reset the scores accumulated by the vote model.
             if request == "DAILY_FINISH":
@@ -254,13 +254,34 @@ class TownsFolkStrategy(object):
                 self._done_in_day = False
 
             elif request == "VOTE":
-                PlayerEvaluation.instance.log()
+                self._context.player_evaluation.log()
                 updated_scores = game_graph.get_players_voting_scores()
                 for agent_idx, score in updated_scores.items():
                     self._vote_model.update_vote(agent_idx, score)
         except:
-            print("AGENT STRATEGY EXCEPTION IN UPDATE:")
+            console("AGENT STRATEGY EXCEPTION IN UPDATE:", level=ERROR, exc_info=True)
+
+
+    def build_game_graph(self, changed_perspectives, day):
+        """
+        Build the game graph from the perspectives. The graph only depends on the perspectives and on the day
+        (used for discounting), so if no perspective was changed by the last diff and the day is the same the
+        graph of the previous update is returned as is. Otherwise the group finder updates its edges in place.
+        :param changed_perspectives: Indices of the perspectives that were updated by the last diff.
+        :param day: Day of the last diff, None if the diff was empty.
+        :return:
+        """
+        if day is None:
+            day = self._graph_day
+
+        if self._game_graph is not None and len(changed_perspectives) == 0 and day == self._graph_day:
+            self.graph_rebuilds["skipped"] += 1
+            return self._game_graph
 
+        self.graph_rebuilds["executed"] += 1
+        self._game_graph = self._group_finder.find_groups(self._perspectives, day)
+        self._graph_day = day
+        return self._game_graph
 
     def update_votes_after_death(self, idx):
         """
@@ -268,7 +289,7 @@ class TownsFolkStrategy(object):
         :param idx:
         :return:
         """
-        PlayerEvaluation.instance.player_died_werewolf(idx)
+        self._context.player_evaluation.player_died_werewolf(idx)
 
     def update_roles(self):
         """
@@ -284,7 +305,7 @@ class TownsFolkStrategy(object):
                 elif perspective.get_liar_score() > 0 and admitted_role["role"] in self._special_roles:
                     del self._special_roles[admitted_role["role"]]
         except:
-            print("VILLAGER HANDLE MESSAGE ERR ")
+            console("VILLAGER HANDLE MESSAGE ERR ", level=ERROR, exc_info=True)
 
 
 
@@ -303,16 +324,16 @@ class TownsFolkStrategy(object):
                         estimations = perspective.get_estimations()
 
 
-                        Logger.instance.write("Checking estimations of Agent" + str(idx))
+                        self._context.logger.write("Checking estimations of Agent%s", idx)
                         if idx in game_graph.get_node(self._index).get_top_k_cooperators(k=3):
-                            Logger.instance.write("Agent" + str(self._index) + " is a cooperator, listening to estimations: " + str(estimations))
+                            self._context.logger.write("Agent%s is a cooperator, listening to estimations: %s", self._index, estimations)
                             for agent_idx, estimation in estimations.items():
                                 if estimation == "WEREWOLF":
-                                    PlayerEvaluation.instance.player_is_werewolf(agent_idx)
+                                    self._context.player_evaluation.player_is_werewolf(agent_idx)
                                 elif estimation == "HUMAN":
-                                    PlayerEvaluation.instance.player_in_townsfolk(agent_idx)
+                                    self._context.player_evaluation.player_in_townsfolk(agent_idx)
         except:
-            print("VILLAGER HANDLE MESSAGE ERR ")
+            console("VILLAGER HANDLE MESSAGE ERR ", level=ERROR, exc_info=True)
 
     def talk(self):
         """
@@ -320,12 +341,55 @@ class TownsFolkStrategy(object):
         """
         try:
             sentence =  self._agent_state.talk(self._task_manager)
-            Logger.instance.write("I Said: " + sentence)
+            self._context.logger.write("I Said: %s", sentence)
             return sentence
         except:
-            print("VILLAGER HANDLE MESSAGE ERR ")
+            console("VILLAGER HANDLE MESSAGE ERR ", level=ERROR, exc_info=True)
             return "Skip"
 
+    def fallback_talk(self):
+        """
+        Used when talk didn't finish in time: the sentence of the most important task, without removing it.
+        :return:
+        """
+        if self._task_manager.num_tasks() > 0:
+            return self._task_manager.peek_most_important_task().handle_task()
+        return "Skip"
+
+    def fallback_vote(self):
+        return self._vote_model.get_top_vote()
+
+    def plan_talk(self):
+        """
+        Plan the next sentence without saying it, see Player.plan_talk.
+        :return: The sentence and the function that removes its task once it is said, None if the state doesn't
+        plan its sentences.
+        """
+        try:
+            planned = self._agent_state.plan_talk(self._task_manager)
+        except:
+            console("VILLAGER HANDLE MESSAGE ERR ", level=ERROR, exc_info=True)
+            return "Skip", None
+        if planned is None:
+            return None
+        sentence, task = planned
+
+        def commit():
+            if task is not None:
+                self._task_manager.remove_task(task)
+            self._context.logger.write("I Said: %s", sentence)
+
+        return sentence, commit
+
+    def plan_vote(self):
+        """
+        The vote of get_vote, only for strategies that vote with it.
+        :return:
+        """
+        if type(self).vote is not TownsFolkStrategy.vote:
+            return None
+        return self._vote_model.get_vote(), None
+
     def generate_tasks(self, game_graph, day):
         """
         This is the base method of generating tasks that will help us decide what to say in the next calls
@@ -343,31 +407,31 @@ class TownsFolkStrategy(object):
             tasks += self.handle_messages_to_me(game_graph)
 
             if not self._done_in_day:
-                request_vote_task = PlayerEvaluation.instance.update_evaluation(game_graph, day)
+                request_vote_task = self._context.player_evaluation.update_evaluation(game_graph, day)
 
                 if request_vote_task is not None:
                     tasks.append(request_vote_task)
 
                 if "BODYGUARD" in self._special_roles and self._role != "BODYGUARD":
-                    print("Creating bodyguard task")
+                    console("Creating bodyguard task")
 
                     tasks.append(GuardTask.generate_guard_task(game_graph, self._index, self._special_roles["BODYGUARD"],
-                                                               PlayerEvaluation.instance.players_alive(), 1, self._day))
+                                                               self._context.player_evaluation.players_alive(), 1, self._day))
 
                 if "SEER" in self._special_roles and self._role != "SEER":
-                    print("Creating seer task")
+                    console("Creating seer task")
 
-                    tasks.append(DivineTask.generate_divine_task(self._index, self._special_roles["SEER"], 1, self._day))
+                    tasks.append(DivineTask.generate_divine_task(self._context.player_evaluation, self._index, self._special_roles["SEER"], 1, self._day))
 
-                if "MEDIUM" in self._special_roles and self._role != "MEDIUM" and PlayerEvaluation.instance.get_last_dead() is not None:
-                    tasks.append(IdentifyTask(1, self._day, [self._special_roles["MEDIUM"], PlayerEvaluation.instance.get_last_dead()],
-                                              self._index, self._special_roles["MEDIUM"], PlayerEvaluation.instance.get_last_dead()))
+                if "MEDIUM" in self._special_roles and self._role != "MEDIUM" and self._context.player_evaluation.get_last_dead() is not None:
+                    tasks.append(IdentifyTask(1, self._day, [self._special_roles["MEDIUM"], self._context.player_evaluation.get_last_dead()],
+                                              self._index, self._special_roles["MEDIUM"], self._context.player_evaluation.get_last_dead()))
 
 
 
                 self._done_in_day = True
         except:
-            print("ERROR WOLF STRATEGY UPDATE")
+            console("ERROR WOLF STRATEGY UPDATE", level=ERROR, exc_info=True)
         return tasks
 
 
@@ -380,14 +444,14 @@ class TownsFolkStrategy(object):
         :return:
         """
         if self._day > 1 and self._agent_state.get_type() == StateType.DAY_ONE:
-            Logger.instance.write("Updated state to Base State from Day One State")
-            self._agent_state = BaseState(self._index, self._agent_indices)
+            self._context.logger.write("Updated state to Base State from Day One State")
+            self._agent_state = BaseState(self._index, self._agent_indices, self._context)
 
     def vote(self):
         try:
-            Logger.instance.write("Voting on day " + str(self._day))
+            self._context.logger.write("Voting on day %s", self._day)
             result = self._vote_model.get_vote()
-            Logger.instance.write("Voted for Agent" + str(result))
+            self._context.logger.write("Voted for Agent%s", result)
             return result
         except:
             try:
@@ -399,4 +463,4 @@ class TownsFolkStrategy(object):
                         min = v
                 return int(id)
             except:
-                return int(np.random.choice(self._vote_model._vote_scores.keys()))
\ No newline at end of file
+                return int(self._context.rng.choice(list(self._vote_model._vote_scores.keys())))
\ No newline at end of file
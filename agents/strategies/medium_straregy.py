@@ -5,8 +5,7 @@ from agents.game_roles import GameRoles
 from agents.information_processing.dissection.sentence_dissector import SentenceDissector
 from agents.strategies.agent_strategy import TownsFolkStrategy, MessageType
 from agents.tasks.medium_task import MediumTask
-import numpy as np 
-import pandas as pd
+from agents.logger import console
 
 class MediumStrategy(TownsFolkStrategy):
     HUMAN = "HUMAN"
@@ -17,8 +16,8 @@ class MediumStrategy(TownsFolkStrategy):
     PROB_OF_REVEAL_ALL = 0.4
     PROB_OF_COMINGOUT = 0.6
 
-    def __init__(self, agent_indices, my_index, role_map, statusMap, player_perspective):
-        super().__init__(agent_indices, my_index, role_map, player_perspective)
+    def __init__(self, agent_indices, my_index, role_map, statusMap, player_perspective, context):
+        super().__init__(agent_indices, my_index, role_map, player_perspective, context)
 
         self.my_index = my_index
         self._divined_agents = {}
@@ -39,15 +38,15 @@ class MediumStrategy(TownsFolkStrategy):
         self.print_divined_agents()
 
     def print_divined_agents(self):
-        print("DIVINED LIST:")
-        print(self._divined_agents)
+        console("DIVINED LIST:")
+        console(self._divined_agents)
 
     def generate_talk(self):
         try:
             importance = 1000
             heat_comingout = 12
 
-            print("UNDER HEAT {}".format(self._player_perspective.under_heat_value[self.my_index]))
+            console("UNDER HEAT %s", self._player_perspective.under_heat_value[self.my_index])
             if (self._player_perspective.under_heat_value[self.my_index] > heat_comingout):
                 # comingout as seer
                 task = MediumTask(importance, self.day_num, [self.my_index], self.my_index, comingout=True)
@@ -59,7 +58,7 @@ class MediumStrategy(TownsFolkStrategy):
                 #return "COMINGOUT Agent[{0:02d}] SEER".format(self.my_index)
 
             # consider to out myself if someone is comingout as seer
-            coin = np.random.rand()
+            coin = self._context.rng.random()
             if (coin > MediumStrategy.PROB_OF_COMINGOUT and self.count_medium_comingout > 0):
                 task = MediumTask(importance, self.day_num, [self.my_index], self.my_index, comingout=True)
                 self._medium_tasks.append(task)
@@ -68,14 +67,15 @@ class MediumStrategy(TownsFolkStrategy):
 
             # identified
             if (len(self._divined_agents) > 0):
-                coin = np.random.rand()
+                coin = self._context.rng.random()
 
                 if (coin < MediumStrategy.PROB_OF_REVEAL):
                     if (self.is_werewolf_in_divined()):
                         werewolves = list(filter(lambda agent: self._divined_agents[agent] == MediumStrategy.WEREWOLF, self._divined_agents.keys()))
-                        print("identified task")
-                        identified = np.random.choice(werewolves)
-                        task = MediumTask(importance, self.day_num, [self.my_index], self.my_index, (identified, MediumStrategy.WEREWOLF))
+                        console("identified task")
+                        identified = self._context.rng.choice(werewolves)
+                        task = MediumTask(importance, self.day_num, [self.my_index], self.my_index, (identified, MediumStrategy.WEREWOLF),
+                                          rng=self._context.rng)
 
                         self._medium_tasks.append(task)
         except:
@@ -92,7 +92,7 @@ class MediumStrategy(TownsFolkStrategy):
 
     def vote(self):
         try:
-            print("****** GOT VOTE REQUEST *******")
+            console("****** GOT VOTE REQUEST *******")
             if (self.is_werewolf_in_divined()):
                 werewolves = []
                 for agent in self._divined_agents:
@@ -101,8 +101,8 @@ class MediumStrategy(TownsFolkStrategy):
 
                 # for each werewolf find its cooperators
                 for werewolf in werewolves:
-                    if (len(self._perspectives[werewolf]._cooperators) > 0):
-                        cooperators = self._perspectives[werewolf]._cooperators.keys()
+                    if (len(self._perspectives[werewolf].get_cooperators_indices()) > 0):
+                        cooperators = self._perspectives[werewolf].get_cooperators_indices()
 
                         coop_with_heat = max(cooperators, key=lambda c: 
                                                             self._player_perspective.under_heat_value[c])
@@ -110,37 +110,37 @@ class MediumStrategy(TownsFolkStrategy):
                 return super().vote()
             else:
                 v = super().vote()
-                print("v is {}".format(v))
+                console("v is %s", v)
                 return v
         except:
             return "1"
 
     def digest_sentences(self, diff_data):
         try:
-            for i, row in diff_data.iterrows():
+            for row in diff_data:
                 # look for liars / agents that pretend to be me
-                if (len(row["text"].split()) == 3 and "COMINGOUT" in row["text"] and "MEDIUM" in row["text"]):
-                    agent = int(row['agent'])
-                    tmp_str = row["text"]
+                if (len(row.text.split()) == 3 and "COMINGOUT" in row.text and "MEDIUM" in row.text):
+                    agent = int(row.agent)
+                    tmp_str = row.text
                     start = "COMINGOUT Agent["
                     end = "]"
                     pretender = int(tmp_str[tmp_str.find(start) + len(start):tmp_str.rfind(end)])
 
                     if (agent == pretender and agent != self.my_index):
-                        print("PRETENDER {} {}".format(agent, pretender))
+                        console("PRETENDER %s %s", agent, pretender)
                         self._perspectives[agent].lie_detected()
                         self.count_medium_comingout += 1
 
                 # check if i'm under attack - agents are trying to vote me out
                 substr = "VOTE Agent[{0:02d}]".format(self.my_index)
-                if ("REQUEST" in row["text"] and substr in row["text"]):
-                    print("WANTED TO VOTE ME")
+                if ("REQUEST" in row.text and substr in row.text):
+                    console("WANTED TO VOTE ME")
                     self._player_perspective.under_heat_value[self.my_index] += 1
                 
                 # if people view me as a werewolf
                 substr = "Agent[{0:02d}] WEREWOLF"
-                if (substr in row["text"]):
-                    print("CALLED ME WOLF")
+                if (substr in row.text):
+                    console("CALLED ME WOLF")
                     self._player_perspective.under_heat_value[self.my_index] += 1
                     self.werewolf_accused_counter += 1
         except:
@@ -2,6 +2,6 @@ from agents.strategies.agent_strategy import TownsFolkStrategy
 from agents.vote.townsfolk_vote_model import PossessedVoteModel
 
 class PossessedStrategy(TownsFolkStrategy):
-    def __init__(self, agent_indices, my_index, role_map, player_perspective):
-        super().__init__(agent_indices, my_index, role_map, player_perspective)
-        self._vote_model = PossessedVoteModel(agent_indices, my_index)
\ No newline at end of file
+    def __init__(self, agent_indices, my_index, role_map, player_perspective, context):
+        super().__init__(agent_indices, my_index, role_map, player_perspective, context)
+        self._vote_model = PossessedVoteModel(agent_indices, my_index, context)
\ No newline at end of file
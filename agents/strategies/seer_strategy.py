@@ -6,7 +6,7 @@ from agents.information_processing.dissection.sentence_dissector import Sentence
 from agents.strategies.agent_strategy import TownsFolkStrategy, MessageType
 from agents.tasks.seer_task import SeerTask
 import numpy as np 
-import pandas as pd
+from agents.logger import console, ERROR
 
 class SeerStrategy(TownsFolkStrategy):
     weights_dict = {
@@ -37,8 +37,8 @@ class SeerStrategy(TownsFolkStrategy):
     PROB_OF_REVEAL_ALL = 0.4
     PROB_OF_COMINGOUT = 0.6
 
-    def __init__(self, agent_indices, my_index, role_map, statusMap, player_perspective):
-        super().__init__(agent_indices, my_index, role_map, player_perspective)
+    def __init__(self, agent_indices, my_index, role_map, statusMap, player_perspective, context):
+        super().__init__(agent_indices, my_index, role_map, player_perspective, context)
 
         self.my_index = my_index
         self._divined_agents = {}
@@ -70,25 +70,25 @@ class SeerStrategy(TownsFolkStrategy):
         # no longer a prospect
         try:
             del self._divine_prospects[str(agent)]
-            print("PROSPECTS")
-            print(self._divine_prospects)
+            console("PROSPECTS")
+            console(self._divine_prospects)
         except Exception as e:
-            print("ERRRORRRRR {}".format(e))
+            console("ERRRORRRRR %s", e, level=ERROR)
 
         self._divined_agents[str(agent)] = species
         self.print_divined_agents()
 
     def print_divined_agents(self):
-        print("DIVINED LIST:")
-        print(self._divined_agents)
+        console("DIVINED LIST:")
+        console(self._divined_agents)
 
     def get_next_divine(self):
         try:
-            print("****** GOT DIVINE REQUEST *******")
+            console("****** GOT DIVINE REQUEST *******")
             # if first day no prior knowledge -> random divine
             if self.is_first_day:
                 ls = list(self._divine_prospects.keys())
-                idx = np.random.randint(0, len(ls))
+                idx = self._context.rng.randrange(len(ls))
                 self.is_first_day = False
                 self.day_num += 1
 
@@ -131,7 +131,7 @@ class SeerStrategy(TownsFolkStrategy):
                 feature_vec[12] = self._player_perspective.agent_2_total_votes_curr_turn[agent_idx]
                 if (agent_idx in self.requested_divine):
                     feature_vec[13] = 1
-                print("agent {}  {}".format(agent_idx, feature_vec))
+                console("agent %s  %s", agent_idx, feature_vec)
                 # calculate the suspicious score
                 score = feature_vec.dot(SeerStrategy.weights)
 
@@ -158,18 +158,28 @@ class SeerStrategy(TownsFolkStrategy):
             except:
                 # if somehow the prospect list is empty
                 return str(1)
-            print("****** END DIVINE REQUEST *******")
+            console("****** END DIVINE REQUEST *******")
             return str(agent_to_divine)
         except:
             return "1"
 
+    def fallback_divine(self):
+        """
+        Used when get_next_divine didn't finish in time: the prospect with the highest score so far.
+        :return:
+        """
+        prospects = dict(self._divine_prospects)
+        if not prospects:
+            return None
+        return max(prospects.keys(), key=(lambda key: prospects[key]))
+
     def get_cooperators_non_cooperators_features(self, perspective, feature_vec):
         try:
             known_werewolves_in_cooperators = 0
             known_humans_in_cooperators = 0
             likely_werewolves_in_cooperators = 0
             likely_humans_in_cooperators = 0
-            for coop in perspective._cooperators:
+            for coop in perspective.get_cooperators_indices():
                 # if i'm a cooperator
                 if (coop == self.my_index):
                     known_humans_in_cooperators += 1
@@ -190,7 +200,7 @@ class SeerStrategy(TownsFolkStrategy):
             known_humans_in_non_cooperators = 0
             likely_werewolves_in_non_cooperators = 0
             likely_humans_in_non_cooperators = 0
-            for noncoop in perspective._noncooperators:
+            for noncoop in perspective.get_enemies_indices():
                 # if i'm a noncooperator
                 if (noncoop == self.my_index):
                     known_humans_in_non_cooperators += 1
@@ -230,7 +240,7 @@ class SeerStrategy(TownsFolkStrategy):
             importance = 1000
             heat_comingout = 12
 
-            print("UNDER HEAT {}".format(self._player_perspective.under_heat_value[self.my_index]))
+            console("UNDER HEAT %s", self._player_perspective.under_heat_value[self.my_index])
             if (self._player_perspective.under_heat_value[self.my_index] > heat_comingout):
                 # comingout as seer
                 task = SeerTask(importance, self.day_num, [self.my_index], self.my_index, comingout=True)
@@ -248,13 +258,13 @@ class SeerStrategy(TownsFolkStrategy):
                 #return "COMINGOUT Agent[{0:02d}] SEER".format(self.my_index)
 
             # consider to out myself if someone is comingout as seer
-            coin = np.random.rand()
+            coin = self._context.rng.random()
             if (coin > SeerStrategy.PROB_OF_COMINGOUT and self.count_seer_comingout > 0):
                 task = SeerTask(importance, self.day_num, [self.my_index], self.my_index, comingout=True)
                 self._seer_tasks.append(task)
                 return
 
-            coin = np.random.rand()        
+            coin = self._context.rng.random()        
             is_werewolf_detected = SeerStrategy.WEREWOLF in self._divined_agents.values()
             # whether to reveal info
             if (coin < SeerStrategy.PROB_OF_REVEAL and is_werewolf_detected):
@@ -269,7 +279,7 @@ class SeerStrategy(TownsFolkStrategy):
 
                 prospect = int(prospect)
 
-                coin = np.random.rand()
+                coin = self._context.rng.random()
 
                 # convince a known human to believe that prospect is a werewolf
                 if (coin > SeerStrategy.PROB_OF_REVEAL_ALL):
@@ -277,35 +287,35 @@ class SeerStrategy(TownsFolkStrategy):
                         humans = [key for key, value in self._divined_agents.items() if value == SeerStrategy.HUMAN]
                         
                         # check if one of the humans is in prospect's non cooperators
-                        target = self.get_target(prospect, humans, self._perspectives[prospect]._noncooperators)
+                        target = self.get_target(prospect, humans, self._perspectives[prospect].get_enemies_indices())
 
                         if (target is not None):
-                            print("chose non cooperator")
+                            console("chose non cooperator")
                             task = SeerTask(importance, self.day_num, [target, prospect], self.my_index, target=target, prospect=prospect)
                             self._seer_tasks.append(task)
                             return
                             #return "REQUEST Agent[{0:02d}] ".format(target) + "(ESTIMATE Agent[{0:02d}] WEREWOLF)".format(prospect)
 
                         # check if one of the humans is in prospect's cooperators
-                        target = self.get_target(prospect, humans, self._perspectives[prospect]._cooperators)
+                        target = self.get_target(prospect, humans, self._perspectives[prospect].get_cooperators_indices())
 
                         if (target is not None):
-                            print("chose cooperator")
+                            console("chose cooperator")
                             task = SeerTask(importance, self.day_num, [target, prospect], self.my_index, target=target, prospect=prospect)
                             self._seer_tasks.append(task)
                             return
                             #return "REQUEST Agent[{0:02d}] ".format(target) + "(ESTIMATE Agent[{0:02d}] WEREWOLF)".format(prospect)
 
                         # else - send to random human
-                        target = str(np.random.choice(humans))
-                        print("chose random")
+                        target = str(self._context.rng.choice(humans))
+                        console("chose random")
                         task = SeerTask(importance, self.day_num, [target, prospect], self.my_index, target=target, prospect=prospect)
                         self._seer_tasks.append(task)
                         return
                         #return "REQUEST Agent[{0:02d}] ".format(target) + "(ESTIMATE Agent[{0:02d}] WEREWOLF)".format(prospect)
                     else:
                         # no humans
-                        print("chose everybody")
+                        console("chose everybody")
                         target = "ANY"
                         task = SeerTask(importance, self.day_num, [target, prospect], self.my_index, target=target, prospect=prospect)
                         self._seer_tasks.append(task)
@@ -313,7 +323,7 @@ class SeerStrategy(TownsFolkStrategy):
                         #return "REQUEST ANY (ESTIMATE Agent[{0:02d}] WEREWOLF)".format(prospect)
                 else:
                     # tell everybody about prospect
-                    print("chose everybody")
+                    console("chose everybody")
                     target = "ANY"
                     task = SeerTask(importance, self.day_num, [target, prospect], self.my_index, target=target, prospect=prospect)
                     self._seer_tasks.append(task)
@@ -330,7 +340,7 @@ class SeerStrategy(TownsFolkStrategy):
             if (int(human) in agent_dict):
                 ls.append(int(human))
         
-        return int(np.random.choice(ls))
+        return int(self._context.rng.choice(ls))
 
     def get_likely_to_be_voted(self, agents_list):
         try:
@@ -350,14 +360,14 @@ class SeerStrategy(TownsFolkStrategy):
                     highest_score = score
                     vote_id = agent
 
-            print("****** vote to {} *******".format(vote_id))
+            console("****** vote to %s *******", vote_id)
             return str(vote_id)
         except:
             return "1"
 
     def vote(self):
         try:
-            print("****** GOT VOTE REQUEST *******")
+            console("****** GOT VOTE REQUEST *******")
             real_wolves = []
             # check for actual wolves
             for agent in self._divined_agents:
@@ -366,17 +376,17 @@ class SeerStrategy(TownsFolkStrategy):
             
             # if we divined some wolves, pick the one with the highest score to be out
             if (len(real_wolves) > 0):
-                print("*****real wolves.********")
+                console("*****real wolves.********")
                 v = self.get_likely_to_be_voted(real_wolves)
                 if (v is not None):
                     return v
             else:
                 # no divined wolves
-                print("*****no divined wolves.********")
+                console("*****no divined wolves.********")
                 from collections import Counter
                 counter = Counter(self._divine_prospects)
                 top_3_suspects = counter.most_common(3)
-                print("SUSPECTS {}".format(top_3_suspects))
+                console("SUSPECTS %s", top_3_suspects)
                 top_3_suspects = [agent for agent, score in top_3_suspects]
 
                 v = self.get_likely_to_be_voted(top_3_suspects)
@@ -389,41 +399,41 @@ class SeerStrategy(TownsFolkStrategy):
 
     def digest_sentences(self, diff_data):
         try:
-            for i, row in diff_data.iterrows():
+            for row in diff_data:
                 # look for requests
-                if ("REQUEST" in row["text"] and "DIVINATION" in row["text"]):
-                    agent_to_divine = row["text"].split("DIVINATION")[1]
+                if ("REQUEST" in row.text and "DIVINATION" in row.text):
+                    agent_to_divine = row.text.split("DIVINATION")[1]
                     start = "Agent["
                     end = "]"
                     agent_to_divine = int(agent_to_divine[agent_to_divine.find(start) + len(start):agent_to_divine.rfind(end)])
 
-                    print("request for divine agent {}".format(agent_to_divine))
+                    console("request for divine agent %s", agent_to_divine)
 
                     self.requested_divine[agent_to_divine] = None
 
                 # look for liars / agents that pretend to be me
-                if (len(row["text"].split()) == 3 and "COMINGOUT" in row["text"] and "SEER" in row["text"]):
-                    agent = int(row['agent'])
-                    tmp_str = row["text"]
+                if (len(row.text.split()) == 3 and "COMINGOUT" in row.text and "SEER" in row.text):
+                    agent = int(row.agent)
+                    tmp_str = row.text
                     start = "COMINGOUT Agent["
                     end = "]"
                     pretender = int(tmp_str[tmp_str.find(start) + len(start):tmp_str.rfind(end)])
 
                     if (agent == pretender and agent != self.my_index):
-                        print("PRETENDER {} {}".format(agent, pretender))
+                        console("PRETENDER %s %s", agent, pretender)
                         self._perspectives[agent].lie_detected()
                         self.count_seer_comingout += 1
 
                 # check if i'm under attack - agents are trying to vote me out
                 substr = "VOTE Agent[{0:02d}]".format(self.my_index)
-                if ("REQUEST" in row["text"] and substr in row["text"]):
-                    print("WANTED TO VOTE ME")
+                if ("REQUEST" in row.text and substr in row.text):
+                    console("WANTED TO VOTE ME")
                     self._player_perspective.under_heat_value[self.my_index] += 1
                 
                 # if people view me as a werewolf
                 substr = "Agent[{0:02d}] WEREWOLF"
-                if (substr in row["text"]):
-                    print("CALLED ME WOLF")
+                if (substr in row.text):
+                    console("CALLED ME WOLF")
                     self._player_perspective.under_heat_value[self.my_index] += 1
                     self.werewolf_accused_counter += 1
         except:
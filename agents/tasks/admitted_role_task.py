@@ -1,7 +1,6 @@
 from agents.tasks.base_task import BaseTask
 from agents.sentence_generators.logic_generators import *
 from agents.tasks.task_type import TaskType
-from agents.strategies.role_estimations import RoleEstimations
 
 DISCOUNT_FACTOR = 0.9
 
@@ -12,7 +11,7 @@ class AdmittedRoleTask(BaseTask):
     """
 
     def __init__(self, importance, day, relevant_agents, admitted_role, reference_sentences,
-                 my_index):
+                 my_index, role_estimations):
         """
         :param admitted_role: Role admitted
         :param relevant_agents: Players admitted to these roles.
@@ -20,10 +19,12 @@ class AdmittedRoleTask(BaseTask):
         :param  importance: Importance of this task
         :param day: Day in which it happened.
         :param my_index: index of my agent.
+        :param role_estimations: RoleEstimations of my agent, updated with the accused agents.
         """
         BaseTask.__init__(self, importance, day, relevant_agents, my_index)
         self._admitted_role = admitted_role
         self._referenced_sentences = reference_sentences
+        self._role_estimations = role_estimations
 
     def get_type(self):
         return TaskType.SAME_ADMITTED_ROLE_WITH_ME if self.is_included() else TaskType.SAME_ADMITTED_ROLE
@@ -45,7 +46,7 @@ class AdmittedRoleTask(BaseTask):
 
         for sentence in self._referenced_sentences:
             if sentence.subject != self.index:
-                RoleEstimations.instance.add_estimations(sentence.subject, [GameRoles.POSSESSED, GameRoles.WEREWOLF])
+                self._role_estimations.add_estimations(sentence.subject, [GameRoles.POSSESSED, GameRoles.WEREWOLF])
 
 
 
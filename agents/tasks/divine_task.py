@@ -1,4 +1,3 @@
-from agents.strategies.player_evaluation import PlayerEvaluation
 from agents.tasks.base_task import BaseTask
 from agents.tasks.task_type import TaskType
 from agents.sentence_generators.logic_generators import *
@@ -24,8 +23,8 @@ class DivineTask(BaseTask):
         return request_sentence(self._seer, wrap(divination(self._target)))
 
     @staticmethod
-    def generate_divine_task(my_index, seer_idx, importance,
+    def generate_divine_task(player_evaluation, my_index, seer_idx, importance,
                             day):
-        target = PlayerEvaluation.instance.get_divine_target()
+        target = player_evaluation.get_divine_target()
         return DivineTask(importance, day, [seer_idx, target],  my_index, seer_idx
                           ,target)
\ No newline at end of file
@@ -1,7 +1,6 @@
 from agents.tasks.base_task import BaseTask
 from agents.tasks.task_type import TaskType
 from agents.sentence_generators.logic_generators import *
-import numpy as np
 
 DISCOUNT = 0.9
 
@@ -12,10 +11,14 @@ class MediumTask(BaseTask):
     With this task the medium can prioritize its knowledge
     """
 
-    def __init__(self, importance, day, relevant_agents, my_index, agent_tuple=None, comingout=False):
+    def __init__(self, importance, day, relevant_agents, my_index, agent_tuple=None, comingout=False, rng=None):
+        """
+        :param rng: Random generator of the game (see GameContext), needed unless comingout.
+        """
         BaseTask.__init__(self, importance, day, relevant_agents, my_index)
         self._agent_tuple = agent_tuple
         self._comingout = comingout
+        self._rng = rng
 
     def update_importance_based_on_day(self, day):
         self._importance *= DISCOUNT * (day - self._day)
@@ -27,7 +30,7 @@ class MediumTask(BaseTask):
         if (self._comingout):
             return comingout(self.index, "MEDIUM")
         else:
-            coin = np.random.rand()
+            coin = self._rng.random()
 
             if (coin > IDENTIFIED_PROB):
                 return request_sentence("ALL",
@@ -30,6 +30,16 @@ class PriorityQueue(object):
 
             value, key = self.items[0]
 
+    def remove(self, key):
+        """
+        Remove a key, its entry in the heap is dropped lazily once it reaches the top.
+        :param key:
+        :return:
+        """
+        del self.dict[key]
+        if len(self.dict) > 0:
+            self._clear()
+
     def pop(self):
         if len(self.dict) == 0:
             raise IndexError("No values in the priority queue left to pop.")
@@ -80,6 +90,10 @@ class TaskManager(object):
     def peek_most_important_task(self):
         return self._tasks.peek()[0]
 
+    def remove_task(self, task):
+        if task in self._tasks:
+            self._tasks.remove(task)
+
     def _pop_all(self):
         tasks = []
         for _ in range(len(self._tasks)):
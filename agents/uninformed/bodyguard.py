@@ -4,6 +4,7 @@ import aiwolfpy.contentbuilder as cb
 from agents.game_roles import GameRoles
 import numpy as np
 from agents.strategies.agent_strategy import TownsFolkStrategy
+from agents.logger import console
 
 DEFAULT_MODE = 0
 RISK_MODE = 1
@@ -22,7 +23,7 @@ class Bodyguard(Villager):
         self._strategy = TownsFolkStrategy([i for i in range(1, self._game_settings._player_num)
                             if i != self._base_info._agentIndex],
                             self._base_info._agentIndex,
-                            self._base_info._role_map, self._player_perspective)
+                            self._base_info._role_map, self._player_perspective, self._context)
 
     def vote(self):
         return self._strategy.vote()
@@ -31,15 +32,35 @@ class Bodyguard(Villager):
         return "Bodyguard"
 
     def talk(self):
+        self.update_risk_mode()
+        return Villager.talk(self)
+
+    def plan_talk(self):
+        planned = Villager.plan_talk(self)
+        if planned is None:
+            return None
+        sentence, commit = planned
+
+        def commit_talk():
+            self.update_risk_mode()
+            if commit is not None:
+                commit()
+
+        return sentence, commit_talk
+
+    def update_risk_mode(self):
+        """
+        Enter the risk mode once half of the players voted against us, done whenever we talk.
+        :return:
+        """
         try:
-            msg = ""
             if self.last_guarded is not None:
                 self.last_guarded = int(self.last_guarded)
             self._player_perspective.update_total_vote_count()
             if self._player_perspective.agent_2_total_votes[self.player_id] >= self._game_settings._player_num/2 and self.mode == DEFAULT_MODE:
                 self.mode = RISK_MODE
                 self.self_guard_score = np.inf
-                print("BODYGUARDMSG:Risk Mode")
+                console("BODYGUARDMSG:Risk Mode")
             if self.mode == RISK_MODE:
                 msg1 = self.get_agent_string(self.player_id) + " " + "AND (" + cb.comingout(self.player_id, "BODYGUARD") + ")"
                 for agent, voting_agents in self.succ_guarded:
@@ -63,23 +84,48 @@ class Bodyguard(Villager):
             #TODO:
             # pick most aggressive voter or one that was in most of other votes or union
         except:
-            return Villager.talk(self)
+            pass
                 # set special mode in order to prevent coming out multiple times ?
-        return Villager.talk(self) if msg == "" else msg
         #TODO: IF GUARDED DID NOT DIE SAY HE IS HUMAN BECAUSE THEY ATTACKED HIM and then guardmyself and raise my risk function
 
     def guard(self):
         return self.non_tested_guard()
 
+    def fallback_guard(self):
+        return self.last_guarded
+
+    def speculate_talk(self):
+        # talk changes the risk mode of the bodyguard, it isn't computed ahead.
+        return None
+
+    def plan_guard(self):
+        return self.choose_guard()
+
     def non_tested_guard(self):
+        guarded, commit = self.choose_guard()
+        if commit is not None:
+            commit()
+        return guarded
+
+    def commit_guard(self, guarded):
+        self.last_guarded = guarded
+        if self.mode == POST_RISK_MODE:
+            self.self_guard_score = None
+            self.mode = DEFAULT_MODE
+
+    def choose_guard(self):
+        """
+        Choose whom to guard without changing the state of the bodyguard.
+        :return: The agent to guard and the function that records the choice (None if there is nothing to record).
+        """
         try:
             if self._player_perspective.agent_2_total_votes[self.player_id] >= self._game_settings._player_num / 2:
-                return self.player_id
+                return self.player_id, None
             guard_score = np.inf if self.self_guard_score is None else self.self_guard_score
-            print("BODYGUARDMSG:Initial Guard Score "+str(guard_score))
+            console("BODYGUARDMSG:Initial Guard Score %s", guard_score)
             my_risk_val = self._player_perspective.under_heat_value[self.player_id]
             guard_risk = my_risk_val
-            print("my risk val: "+str(guard_risk))
+            console("my risk val: %s", guard_risk)
             guarding_list = []
 
             for id,agent_persp in self._strategy._perspectives.items():
@@ -89,18 +135,18 @@ class Bodyguard(Villager):
 
                 agent_vote_score = self.get_vote_score(id)
                 risk_val = self._player_perspective.under_heat_value[id]
-                print("agent {0}, risk {1}, vote score {2}".format(id, risk_val, agent_vote_score))
+                console("agent %s, risk %s, vote score %s", id, risk_val, agent_vote_score)
                 guarding_list.append([id, agent_vote_score, risk_val])
 
 
             if len(guarding_list) == 0:
-                self.last_guarded = self.player_id
+                guarded = self.player_id
             else:
                 guarding_list = np.asarray(guarding_list)
                 max_vote_score = np.max(guarding_list.T[1])
                 # get max risk val
                 guard_risk = np.max(guarding_list.T[2].astype(float))
-                print("guarding list {0} max vs {1} risk {2}".format(str(guarding_list), max_vote_score, guard_risk))
+                console("guarding list %s max vs %s risk %s", str(guarding_list), max_vote_score, guard_risk)
                 # Decrease voting score in guarding list for agents who are far less "votable" - so that when we reverse
                 # the scoring we will prefer to guard them
                 # sorted_vote_score = np.sort(guarding_list.T, axis=1)[1]
@@ -112,7 +158,7 @@ class Bodyguard(Villager):
                 # for idx, [id, vs, rv] in enumerate(guarding_list):
                 #     if (max_vote_score - vs) % 100 >= 2:
                 #         guarding_list[idx] = [id, max(0, max_vote_score - vs), rv]
-                print("guarding list {0} max vs {1} risk {2}".format(str(guarding_list), max_vote_score, guard_risk))
+                console("guarding list %s max vs %s risk %s", str(guarding_list), max_vote_score, guard_risk)
                 # Weight guarding between vote score and risk value - prefer players who have both high risk value and low voting score
                 # and try to prefer players with lower guarding score
                 scores = np.asarray([-1*vs + rv for _, vs, rv in guarding_list])
@@ -121,21 +167,19 @@ class Bodyguard(Villager):
                 probabilities = np.exp(scores) / sum(np.exp(scores))
                 # Get agent ids as the new guarding list
                 guarding_list = np.asarray(guarding_list).T[0]
-                print("gl {0}, scores {1}".format(guarding_list, scores))
+                console("gl %s, scores %s", guarding_list, scores)
 
                 if guard_risk <= my_risk_val:  # Guarding myself is a better option
                     epsilon = 0.3
                 else:  # guard score is equal to mine
                     epsilon = 0.7
-                agent_2_guard = np.random.choice(guarding_list, p=probabilities) if len(guarding_list) > 1 else guarding_list[0]
-                self.last_guarded = np.random.choice([self.player_id, agent_2_guard], p=[1-epsilon, epsilon])
-                print("BODYGUARDMSG:GUARD EPS " + str(epsilon))
-                print(probabilities)
-
-            print(self.last_guarded)
-            if self.mode == POST_RISK_MODE:
-                self.self_guard_score = None
-                self.mode = DEFAULT_MODE
+                agent_2_guard = self._context.rng.choices(list(guarding_list), weights=probabilities)[0] \
+                    if len(guarding_list) > 1 else guarding_list[0]
+                guarded = self._context.rng.choices([self.player_id, agent_2_guard], weights=[1 - epsilon, epsilon])[0]
+                console("BODYGUARDMSG:GUARD EPS %s", epsilon)
+                console(probabilities)
+
+            console(guarded)
         except:
             try:
                 min = np.inf
@@ -144,11 +188,11 @@ class Bodyguard(Villager):
                     if v < min:
                         id = k
                         min = v
-                return int(id)
+                return int(id), None
             except:
-                return self.player_id
+                return self.player_id, None
 
-        return self.last_guarded
+        return guarded, lambda: self.commit_guard(guarded)
 
     # def non_tested_guard(self):
     #     if self._player_perspective.agent_2_total_votes[self.player_id] >= self._game_settings._player_num / 2:
@@ -196,7 +240,7 @@ class Bodyguard(Villager):
     def get_agent_id_2_guard(self, agent_ids):
         if len(agent_ids) == 1:
             return agent_ids[0]
-        return np.random.choice(agent_ids, p=np.ones(len(agent_ids))/len(agent_ids))
+        return self._context.rng.choice(agent_ids)
 
 
     def extract_state_info(self, base_info, diff_data, request):
@@ -204,26 +248,26 @@ class Bodyguard(Villager):
         voted_agents = {}
         if request == "DAILY_INITIALIZE":
             self.last_attacked = None
-            for line_num, txt in enumerate(diff_data["type"]):
-                print(line_num,txt)
+            for line_num, row in enumerate(diff_data):
+                console("%s %s", line_num, row.type)
                 # Update attacked agent
-                if txt == "dead":
-                    self.last_attacked = diff_data.loc[line_num,"agent"]
-                elif txt == "vote":
+                if row.type == "dead":
+                    self.last_attacked = row.agent
+                elif row.type == "vote":
                     try:
-                        voted_agent = int(diff_data.loc[line_num,"text"].split("[")[1][:-1])
-                        voted_agents.setdefault(voted_agent, []).append(diff_data.loc[line_num,"agent"])
+                        voted_agent = int(row.text.split("[")[1][:-1])
+                        voted_agents.setdefault(voted_agent, []).append(row.agent)
                     except ValueError:
                         continue
 
             voted_agents[self.last_guarded] = []
             if self.last_attacked is not None:
-                print("BODYGUARDMSG: LAST ATTACKED "+str(self.last_attacked)+" voters "+str(voted_agents))
+                console("BODYGUARDMSG: LAST ATTACKED %s voters %s", self.last_attacked, voted_agents)
             else:
-                print("BODYGUARDMSG: LAST ATTACKED IS NONE")
-            print("lst attacked {0}, last guarded {1} voters {2}".format(self.last_attacked, self.last_guarded, voted_agents))
+                console("BODYGUARDMSG: LAST ATTACKED IS NONE")
+            console("lst attacked %s, last guarded %s voters %s", self.last_attacked, self.last_guarded, voted_agents)
             if self.last_attacked is None and self.last_guarded is not None:
-                print("BODYGUARDMSG: SUCCESS IN GUARD!")
+                console("BODYGUARDMSG: SUCCESS IN GUARD!")
                 self.succ_guarded.append((self.last_guarded,voted_agents[self.last_guarded]))
                 #TODO: do something with voters(against guarded) score
 
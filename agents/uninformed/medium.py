@@ -13,7 +13,7 @@ class Medium(Villager):
                                 if i != self._base_info._agentIndex],
                                 self._base_info._agentIndex,
                                 self._base_info._role_map,
-                                base_info["statusMap"], self._player_perspective)
+                                base_info["statusMap"], self._player_perspective, self._context)
 
     def getName(self):
         return "Medium"
@@ -11,7 +11,7 @@ class Seer(Villager):
                                 if i != self._base_info._agentIndex],
                                 self._base_info._agentIndex,
                                 self._base_info._role_map,
-                                base_info["statusMap"], self._player_perspective)
+                                base_info["statusMap"], self._player_perspective, self._context)
 
     def whisper(self):
         return ""
@@ -25,6 +25,9 @@ class Seer(Villager):
     def divine(self):
         return self._strategy.get_next_divine()
 
+    def fallback_divine(self):
+        return self._strategy.fallback_divine()
+
     def guard(self):
         pass
 
@@ -11,7 +11,7 @@ class Villager(Uninformed):
         self._strategy = TownsFolkStrategy([i for i in range(1, self._game_settings._player_num + 1)
                                             if i != self._base_info._agentIndex],
                                            self._base_info._agentIndex,
-                                           self._base_info._role_map, self._player_perspective)
+                                           self._base_info._role_map, self._player_perspective, self._context)
 
     def getName(self):
         return "Villager"
@@ -25,6 +25,12 @@ class Villager(Uninformed):
     def vote(self):
         return self._strategy.vote()
 
+    def plan_talk(self):
+        return self._strategy.plan_talk()
+
+    def plan_vote(self):
+        return self._strategy.plan_vote()
+
     def attack(self):
         pass
 
@@ -1,5 +1,3 @@
-import random
-from agents.logger import Logger
 from operator import itemgetter
 
 class TownsfolkVoteModel(object):
@@ -15,8 +13,9 @@ class TownsfolkVoteModel(object):
     for him we will waste our vote and probably put us in danger for nothing.
     """
 
-    def __init__(self, agent_indices, my_idx):
+    def __init__(self, agent_indices, my_idx, context):
         self.index = my_idx
+        self._context = context
         self._vote_scores = {idx:0 for idx in agent_indices}
 
     def update_vote(self, agent_idx, score):
@@ -43,14 +42,24 @@ class TownsfolkVoteModel(object):
         return list(self._vote_scores.keys())
 
     def get_vote(self):
-        Logger.instance.write("Current voting scores: " + str(self._vote_scores))
+        self._context.logger.write("Current voting scores: %s", self._vote_scores)
         max_idx, max_vote_score = max(self._vote_scores.items(), key=itemgetter(1))
 
-        Logger.instance.write("Max vote score " + str(max_vote_score) + " for index: " + str(max_idx))
+        self._context.logger.write("Max vote score %s for index: %s", max_vote_score, max_idx)
         if max_vote_score == 0:
-            return random.choice(self.get_vottable_agents())
+            return self._context.rng.choice(self.get_vottable_agents())
         return max_idx
 
+    def get_top_vote(self):
+        """
+        The agent with the highest score so far, without the random choice of get_vote.
+        :return: None if there is no agent to vote for.
+        """
+        scores = dict(self._vote_scores)
+        if not scores:
+            return None
+        return max(scores.items(), key=itemgetter(1))[0]
+
     def handle_vote_request(self, game_graph, requested_from, target):
         """
         Handle a request from some agent to vote to a given agent.
@@ -60,16 +69,22 @@ class TownsfolkVoteModel(object):
         :param target
         :return:
         """
-        Logger.instance.write("Agent" + str(requested_from) + " requested from us to vote for Agent" + str(target))
+        self._context.logger.write("Agent%s requested from us to vote for Agent%s", requested_from, target)
 
         top_cooperators = game_graph.get_node(self.index).get_top_k_cooperators(k=3)
         if requested_from in top_cooperators:
-            Logger.instance.write("Requesting agent is a cooperator, maxing out his vote request")
+            self._context.logger.write("Requesting agent is a cooperator, maxing out his vote request")
             self.set_to_max_score(target)
 
 class PossessedVoteModel(TownsfolkVoteModel):
+    def get_top_vote(self):
+        scores = dict(self._vote_scores)
+        if not scores:
+            return None
+        return min(scores.items(), key=itemgetter(1))[0]
+
     def get_vote(self):
         min_idx, min_vote_score = min(self._vote_scores.items(), key=itemgetter(1))
         if min_vote_score == 0:
-            return random.choice(self.get_vottable_agents())
+            return self._context.rng.choice(self.get_vottable_agents())
         return min_idx
\ No newline at end of file
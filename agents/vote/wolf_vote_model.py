@@ -1,5 +1,3 @@
-import random
-from agents.logger import Logger
 from operator import itemgetter
 
 class wolfVoteModel(object):
@@ -15,8 +13,9 @@ class wolfVoteModel(object):
     for him we will waste our vote and probably put us in danger for nothing.
     """
 
-    def __init__(self, agent_indices, teammates_indices, my_idx):
+    def __init__(self, agent_indices, teammates_indices, my_idx, context):
         self.index = my_idx
+        self._context = context
         self._vote_scores = {idx: 1.0 for idx in agent_indices}
         self._teammates_indices = teammates_indices
 
@@ -48,14 +47,25 @@ class wolfVoteModel(object):
         return [idx for idx in self._vote_scores.keys() if idx not in self._teammates_indices]
 
     def get_vote(self):
-        Logger.instance.write("Current voting scores: " + str(self._vote_scores))
+        self._context.logger.write("Current voting scores: %s", self._vote_scores)
         max_idx, max_vote_score = max(self._vote_scores.items(), key=itemgetter(1))
         #print("voting scores are:", self._vote_scores)
-        Logger.instance.write("Max vote score " + str(max_vote_score) + " for index: " + str(max_idx))
+        self._context.logger.write("Max vote score %s for index: %s", max_vote_score, max_idx)
         if max_vote_score == 1.0:
-            return random.choice(self.get_vottable_agents())
+            return self._context.rng.choice(self.get_vottable_agents())
         return max_idx
 
+    def get_top_vote(self):
+        """
+        The human with the highest score so far, without the random choice of get_vote.
+        :return: None if there is no agent to vote for.
+        """
+        scores = [(idx, score) for idx, score in list(self._vote_scores.items())
+                  if idx not in self._teammates_indices]
+        if not scores:
+            return None
+        return max(scores, key=itemgetter(1))[0]
+
     def handle_vote_request(self, game_graph, requested_from, target):
         """
         Handle a request from some agent to vote to a given agent.
@@ -65,11 +75,11 @@ class wolfVoteModel(object):
         :param target
         :return:
         """
-        Logger.instance.write("Agent" + str(requested_from) + " requested from us to vote for Agent" + str(target))
+        self._context.logger.write("Agent%s requested from us to vote for Agent%s", requested_from, target)
 
         top_cooperators = game_graph.get_node(self.index).get_top_k_cooperators(k=3)
         if requested_from in top_cooperators:
-            Logger.instance.write("Requesting agent is a cooperator, maxing out his vote request")
+            self._context.logger.write("Requesting agent is a cooperator, maxing out his vote request")
             self.set_to_max_score(target)
 
 
@@ -4,7 +4,7 @@ from .tcpipclient_parsed import connect_parse
 from . import templatetalkfactory 
 from . import templatewhisperfactory 
 from . import contentbuilder 
-from .gameinfoparser import GameInfoParser
+from .gameinfoparser import GameInfoParser, GameDiff
 from .read_log import read_log
 
 
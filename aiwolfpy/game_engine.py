@@ -0,0 +1,473 @@
+# -*- coding: utf-8 -*-
+"""
+GameEngine
+
+In-process replacement of aiwolf-server.jar for self-play. A game runs the
+AIWolf rules (talk and whisper turns, votes and revotes, divine, guard,
+attack votes, medium results) and hands every agent the packets the server
+would send it through a ParsedSession, so the agents get the same gameInfo
+and talkHistory dicts GameInfoParser.update gets from the real server,
+without the JVM and the sockets.
+"""
+
+from __future__ import print_function, division
+import json
+import random
+from .tcpipclient_parsed import ParsedSession
+from .latency import LatencyRecorder
+
+ROLES = ("VILLAGER", "SEER", "MEDIUM", "BODYGUARD", "POSSESSED", "WEREWOLF", "FOX", "FREEMASON")
+
+# Roles of the villager team, the possessed and the werewolves are the werewolf team.
+VILLAGER_TEAM = ("VILLAGER", "SEER", "MEDIUM", "BODYGUARD", "FREEMASON")
+
+ROLE_NUM_MAPS = {
+    5: {"VILLAGER": 2, "SEER": 1, "POSSESSED": 1, "WEREWOLF": 1},
+    15: {"VILLAGER": 8, "SEER": 1, "MEDIUM": 1, "BODYGUARD": 1, "POSSESSED": 1, "WEREWOLF": 3},
+}
+
+OVER = "Over"
+
+SKIP = "Skip"
+
+# A game that didn't end by this day is stopped without a winner.
+MAX_DAYS = 30
+
+
+def game_setting(player_num=5, seed=0, **overrides):
+    """
+    :param player_num: Number of players, 5 and 15 have a default roleNumMap, other sizes have to override it.
+    :param seed: randomSeed of the setting.
+    :param overrides: Values replacing the defaults, by their gameSetting keys (timeLimit=...).
+    :return: gameSetting dict, as sent by the server with INITIALIZE.
+    """
+    role_num_map = dict.fromkeys(ROLES, 0)
+    role_num_map.update(ROLE_NUM_MAPS.get(player_num, {}))
+    setting = {'enableNoAttack': False, 'enableNoExecution': False, 'enableRoleRequest': False,
+               'maxAttackRevote': 1, 'maxRevote': 1, 'maxSkip': 2, 'maxTalk': 10, 'maxTalkTurn': 20,
+               'maxWhisper': 10, 'maxWhisperTurn': 20, 'playerNum': player_num, 'randomSeed': seed,
+               'roleNumMap': role_num_map, 'talkOnFirstDay': False, 'timeLimit': 1000,
+               'validateUtterance': True, 'votableInFirstDay': False, 'voteVisible': True,
+               'whisperBeforeRevote': False}
+    setting.update(overrides)
+    return setting
+
+
+def _discard(summary):
+    pass
+
+
+def team_of(role):
+    return "VILLAGER" if role in VILLAGER_TEAM else "WEREWOLF"
+
+
+def _parse_target(response):
+    """
+    :param response: Response line of a VOTE/ATTACK/DIVINE/GUARD request.
+    :return: The agent index in it, None if it has none.
+    """
+    try:
+        return int(json.loads(response)['agentIdx'])
+    except Exception:
+        return None
+
+
+def _candidates(votes):
+    """
+    :param votes: List of vote dicts.
+    :return: The targets with the most votes, sorted.
+    """
+    counts = {}
+    for vote in votes:
+        counts[vote['target']] = counts.get(vote['target'], 0) + 1
+    if not counts:
+        return []
+    most = max(counts.values())
+    return sorted(target for target, count in counts.items() if count == most)
+
+
+class GameEngine(object):
+    """
+    A single game between the given agents, agent i sits in seat i + 1.
+    Every agent gets its own ParsedSession and all the requests of the server, including the
+    DAILY_INITIALIZE/DAILY_FINISH/FINISH ones dead agents get too. Invalid targets are replaced by random
+    valid ones and utterances beyond the talk limits by Over, as the server does.
+    """
+
+    def __init__(self, agents=None, setting=None, roles=None, seed=None, log_path=None, measure=False,
+                 sessions=None):
+        """
+        :param agents: Agents of the game, AgentContainer instances or anything with the same interface.
+        :param setting: gameSetting, game_setting(len(agents), seed) if not given.
+        :param roles: Role of every seat, shuffled from the roleNumMap of the setting if not given.
+        :param seed: Seed of the engine's choices (roles, talk order, ties), randomSeed of the setting if None.
+        :param log_path: If given the game is written there in the log format of the server (see read_log).
+        :param measure: Time the requests of every seat, the result holds the timings of all the seats.
+        :param sessions: Instead of agents, the seats of the game: anything with a handle(packet) method that
+        returns the response line of the packet, like a ParsedSession or a remote client (see mock_server).
+        """
+        if sessions is None:
+            self.recorders = {idx: LatencyRecorder(idx, output=_discard) for idx in range(1, len(agents) + 1)} \
+                if measure else {}
+            sessions = [ParsedSession(agent, latency=self.recorders.get(idx)) for idx, agent in enumerate(agents, 1)]
+        else:
+            self.recorders = {}
+        self.sessions = {idx: session for idx, session in enumerate(sessions, 1)}
+        self.seats = sorted(self.sessions)
+        self.names = {}
+        self.setting = setting if setting is not None else game_setting(len(self.seats), seed or 0)
+        if seed is None:
+            seed = self.setting.get('randomSeed')
+        self.rng = random.Random(seed)
+        self._roles_given = roles is not None
+        if roles is None:
+            roles = [role for role, num in sorted(self.setting['roleNumMap'].items()) for _ in range(num)]
+            self.rng.shuffle(roles)
+        if len(roles) != len(self.seats):
+            raise ValueError("Got " + str(len(self.seats)) + " seats for " + str(len(roles)) + " roles")
+        self.roles = {idx: role for idx, role in enumerate(roles, 1)}
+        self.alive = set(self.seats)
+        # Seat to the day it was executed or attacked on.
+        self.deaths = {}
+        self.day = 0
+        self.winner = None
+        self._log_path = log_path
+        self._log_lines = []
+
+        # State of the current day, reset by _start_day.
+        self._talks = []
+        self._whispers = []
+        self._talk_seen = {}
+        self._whisper_seen = {}
+        self._remain_talk = {}
+        self._remain_whisper = {}
+        self._latest_votes = []
+        self._latest_executed = None
+
+        # Results of the previous night, given with the next DAILY_INITIALIZE.
+        self._last_votes = []
+        self._last_executed = None
+        self._last_attack_votes = []
+        self._attacked = None
+        self._guarded = None
+        self._divine_result = None
+        self._medium_result = None
+        self._dead = []
+
+    def wolves(self):
+        return sorted(idx for idx in self.alive if self.roles[idx] == "WEREWOLF")
+
+    def _alive_with(self, role):
+        return [idx for idx in sorted(self.alive) if self.roles[idx] == role]
+
+    def _log(self, *fields):
+        if self._log_path is not None:
+            self._log_lines.append(",".join(str(field) for field in fields))
+
+    def _role_map(self, idx):
+        if self.roles[idx] == "WEREWOLF":
+            return {str(wolf): "WEREWOLF" for wolf in self.seats if self.roles[wolf] == "WEREWOLF"}
+        return {str(idx): self.roles[idx]}
+
+    def _game_info(self, idx, **extra):
+        """
+        gameInfo of the given agent, the view of the game the server sends with every request.
+        :param idx:
+        :param extra: Request specific keys.
+        :return:
+        """
+        is_wolf = self.roles[idx] == "WEREWOLF"
+        info = {'agent': idx, 'day': self.day, 'roleMap': self._role_map(idx),
+                'statusMap': {str(i): "ALIVE" if i in self.alive else "DEAD" for i in self.seats},
+                'remainTalkMap': {str(i): count for i, count in self._remain_talk.items()},
+                'remainWhisperMap': {str(i): count for i, count in self._remain_whisper.items()} if is_wolf else {},
+                'talkList': list(self._talks), 'whisperList': list(self._whispers) if is_wolf else [],
+                'voteList': [], 'attackVoteList': [], 'latestVoteList': self._latest_votes,
+                'latestAttackVoteList': [], 'executedAgent': -1,
+                'latestExecutedAgent': self._latest_executed if self._latest_executed is not None else -1, 'attackedAgent': -1, 'guardedAgent': -1,
+                'divineResult': None, 'mediumResult': None, 'lastDeadAgentList': [],
+                'existingRoleList': sorted(role for role, num in self.setting['roleNumMap'].items() if num > 0)}
+        info.update(extra)
+        return info
+
+    def _send(self, idx, request, game_info=None, setting=None):
+        """
+        Hand a request to an agent.
+        :return: The response of the agent, None if the request has none.
+        """
+        talk_history = self._talks[self._talk_seen.get(idx, 0):]
+        whisper_history = self._whispers[self._whisper_seen.get(idx, 0):] if self.roles[idx] == "WEREWOLF" else []
+        if request in ('TALK', 'DAILY_FINISH'):
+            self._talk_seen[idx] = len(self._talks)
+        if request in ('WHISPER', 'ATTACK', 'DAILY_FINISH'):
+            self._whisper_seen[idx] = len(self._whispers)
+        packet = {'request': request, 'gameInfo': game_info, 'gameSetting': setting,
+                  'talkHistory': talk_history, 'whisperHistory': whisper_history}
+        response = self.sessions[idx].handle(packet)
+        if response is not None and idx in self.recorders:
+            # The response is "sent" right away, the request ends here.
+            self.recorders[idx].finish()
+        return response
+
+    def _random_other(self, idx, choices):
+        choices = [choice for choice in choices if choice != idx]
+        return self.rng.choice(choices) if choices else idx
+
+    def run(self):
+        """
+        Play the game to its end.
+        :return: The result of the game, see result().
+        """
+        for idx in self.seats:
+            self.names[idx] = self._send(idx, 'NAME')
+        if self.setting['enableRoleRequest'] and not self._roles_given:
+            self._request_roles()
+        for idx in self.seats:
+            self._send(idx, 'INITIALIZE', self._game_info(idx), self.setting)
+
+        while True:
+            self._day_phase()
+            self._night_phase()
+            self.winner = self._check_winner()
+            if self.winner is not None or self.day + 1 >= MAX_DAYS:
+                break
+            self.day += 1
+
+        roles = {str(idx): role for idx, role in self.roles.items()}
+        for idx in self.seats:
+            self._send(idx, 'FINISH', self._game_info(idx, roleMap=roles))
+        villagers = len([idx for idx in self.alive if team_of(self.roles[idx]) == "VILLAGER"])
+        self._log(self.day, "result", villagers, len(self.wolves()), self.winner)
+        if self._log_path is not None:
+            with open(self._log_path, 'w') as log_file:
+                log_file.write("\n".join(self._log_lines) + "\n")
+        return self.result()
+
+    def _request_roles(self):
+        """
+        Ask every seat for the role it wants, the requested roles are given while the roleNumMap allows it and
+        the other seats share the remaining roles randomly.
+        :return:
+        """
+        remaining = list(self.roles.values())
+        requested = {}
+        for idx in self.seats:
+            role = self._send(idx, 'ROLE')
+            role = role.upper() if role else None
+            if role in remaining:
+                remaining.remove(role)
+                requested[idx] = role
+        self.rng.shuffle(remaining)
+        for idx in self.seats:
+            self.roles[idx] = requested[idx] if idx in requested else remaining.pop()
+
+    def result(self):
+        """
+        :return: Dict with the winning team (None if there is none yet), the number of days, the roles of the
+        seats, the seats still alive, the day every dead seat died on and when measured the timings of all
+        the seats in a single LatencyRecorder.
+        """
+        latency = None
+        if self.recorders:
+            latency = LatencyRecorder("game")
+            for recorder in self.recorders.values():
+                latency.merge(recorder)
+            latency.games = 1
+        return {'winner': self.winner, 'days': self.day, 'roles': dict(self.roles), 'alive': sorted(self.alive),
+                'deaths': dict(self.deaths), 'latency': latency}
+
+    def _check_winner(self):
+        wolves = len(self.wolves())
+        if wolves == 0:
+            return "VILLAGER"
+        if wolves >= len(self.alive) - wolves:
+            return "WEREWOLF"
+        return None
+
+    def _start_day(self):
+        self._talks = []
+        self._whispers = []
+        self._talk_seen = {}
+        self._whisper_seen = {}
+        self._remain_talk = {idx: self.setting['maxTalk'] for idx in self.alive}
+        self._remain_whisper = {idx: self.setting['maxWhisper'] for idx in self.wolves()}
+        self._latest_votes = []
+        self._latest_executed = None
+
+    def _day_phase(self):
+        """
+        DAILY_INITIALIZE with the results of the previous night, then the talks of the day.
+        :return:
+        """
+        self._start_day()
+        self._daily_initialize()
+        if self.day > 0 or self.setting['talkOnFirstDay']:
+            if self.day == 0:
+                self._conversation('WHISPER')
+            self._conversation('TALK')
+
+    def _daily_initialize(self):
+        """
+        Log the status of the day and hand every seat the results of the previous night.
+        :return:
+        """
+        for idx in self.seats:
+            self._log(self.day, "status", idx, self.roles[idx], "ALIVE" if idx in self.alive else "DEAD",
+                      self.names[idx])
+        for idx in self.seats:
+            extra = {'voteList': self._last_votes,
+                     'executedAgent': self._last_executed if self._last_executed is not None else -1,
+                     'lastDeadAgentList': list(self._dead)}
+            role = self.roles[idx]
+            if role == "WEREWOLF":
+                extra['attackVoteList'] = self._last_attack_votes
+                extra['attackedAgent'] = self._attacked if self._attacked is not None else -1
+            elif role == "SEER" and self._divine_result is not None:
+                extra['divineResult'] = self._divine_result
+            elif role == "MEDIUM" and self._medium_result is not None and idx in self.alive:
+                extra['mediumResult'] = self._medium_result
+            elif role == "BODYGUARD" and self._guarded is not None:
+                extra['guardedAgent'] = self._guarded
+            self._send(idx, 'DAILY_INITIALIZE', self._game_info(idx, **extra))
+        self._divine_result = self._medium_result = None
+        self._guarded = self._attacked = None
+        self._dead = []
+
+    def _conversation(self, request):
+        """
+        Talk (or whisper) turns until every speaker said Over or the turns run out.
+        :param request: 'TALK' or 'WHISPER'.
+        :return:
+        """
+        is_talk = request == 'TALK'
+        speakers = sorted(self.alive) if is_talk else self.wolves()
+        if not is_talk and len(speakers) < 2:
+            return
+        utterances = self._talks if is_talk else self._whispers
+        remain = self._remain_talk if is_talk else self._remain_whisper
+        max_turn = self.setting['maxTalkTurn' if is_talk else 'maxWhisperTurn']
+        skips = dict.fromkeys(speakers, 0)
+        over = set()
+        for turn in range(max_turn):
+            order = list(speakers)
+            self.rng.shuffle(order)
+            for idx in order:
+                if idx in over:
+                    continue
+                text = self._send(idx, request, self._game_info(idx)) if remain[idx] > 0 else OVER
+                text = OVER if not text or text.upper() == "OVER" else text
+                if text.upper() == "SKIP":
+                    text = SKIP
+                    skips[idx] += 1
+                    if skips[idx] > self.setting['maxSkip']:
+                        text = OVER
+                elif text != OVER:
+                    skips[idx] = 0
+                if text == OVER:
+                    over.add(idx)
+                else:
+                    remain[idx] -= 1
+                utterance = {'idx': len(utterances), 'day': self.day, 'turn': turn, 'agent': idx, 'text': text}
+                utterances.append(utterance)
+                self._log(self.day, "talk" if is_talk else "whisper", utterance['idx'], turn, idx, text)
+            if len(over) == len(speakers):
+                break
+
+    def _vote(self, request, voters, targets, latest):
+        """
+        One round of votes.
+        :param request: 'VOTE' or 'ATTACK'.
+        :param voters:
+        :param targets: Valid targets, a vote for anyone else is replaced by a random valid target.
+        :param latest: Votes of the previous round, given to the voters as the latest vote list.
+        :return: The votes.
+        """
+        key = 'latestVoteList' if request == 'VOTE' else 'latestAttackVoteList'
+        votes = []
+        for idx in voters:
+            target = _parse_target(self._send(idx, request, self._game_info(idx, **{key: latest})))
+            if target not in targets or target == idx:
+                target = self._random_other(idx, targets)
+            votes.append({'day': self.day, 'agent': idx, 'target': target})
+        return votes
+
+    def _decide(self, request, voters, targets, max_revote, log_type):
+        """
+        Votes and revotes until a single target has the most votes, a random one of the leading targets is
+        chosen if the revotes run out.
+        :return: The chosen target and the votes of the last round.
+        """
+        votes = []
+        candidates = []
+        for round_num in range(max_revote + 1):
+            votes = self._vote(request, voters, targets, votes)
+            for vote in votes:
+                self._log(self.day, log_type, vote['agent'], vote['target'])
+            candidates = _candidates(votes)
+            if len(candidates) == 1:
+                return candidates[0], votes
+            if request == 'ATTACK' and self.setting['whisperBeforeRevote']:
+                self._conversation('WHISPER')
+        return (self.rng.choice(candidates) if candidates else None), votes
+
+    def _night_phase(self):
+        """
+        DAILY_FINISH, the execution of the day and the actions of the night.
+        :return:
+        """
+        for idx in self.seats:
+            self._send(idx, 'DAILY_FINISH', self._game_info(idx))
+
+        executed = None
+        votes = []
+        if self.day > 0:
+            executed, votes = self._decide('VOTE', sorted(self.alive), sorted(self.alive),
+                                           self.setting['maxRevote'], "vote")
+            if executed is not None:
+                self.alive.discard(executed)
+                self.deaths[executed] = self.day
+                self._log(self.day, "execute", executed, self.roles[executed])
+        self._last_votes = self._latest_votes = votes
+        self._last_executed = self._latest_executed = executed
+        if executed is not None:
+            medium = self._alive_with("MEDIUM")
+            if medium:
+                self._medium_result = {'day': self.day, 'agent': medium[0], 'target': executed,
+                                       'result': "WEREWOLF" if self.roles[executed] == "WEREWOLF" else "HUMAN"}
+        if self._check_winner() is not None:
+            return
+
+        for seer in self._alive_with("SEER"):
+            target = _parse_target(self._send(seer, 'DIVINE', self._game_info(seer)))
+            if target not in self.alive or target == seer:
+                target = self._random_other(seer, sorted(self.alive))
+            result = "WEREWOLF" if self.roles[target] == "WEREWOLF" else "HUMAN"
+            self._divine_result = {'day': self.day, 'agent': seer, 'target': target, 'result': result}
+            self._log(self.day, "divine", seer, target, result)
+
+        if self.day == 0 and not self.setting['talkOnFirstDay']:
+            self._conversation('WHISPER')
+        if self.day == 0:
+            return
+
+        for guard in self._alive_with("BODYGUARD"):
+            target = _parse_target(self._send(guard, 'GUARD', self._game_info(guard)))
+            if target not in self.alive or target == guard:
+                target = self._random_other(guard, sorted(self.alive))
+            self._guarded = target
+            self._log(self.day, "guard", guard, target, self.roles[target])
+
+        wolves = self.wolves()
+        self._conversation('WHISPER')
+        humans = [idx for idx in sorted(self.alive) if idx not in wolves]
+        attacked, attack_votes = self._decide('ATTACK', wolves, humans, self.setting['maxAttackRevote'],
+                                              "attackVote")
+        self._last_attack_votes = attack_votes
+        self._attacked = attacked
+        if attacked is not None:
+            killed = attacked != self._guarded
+            self._log(self.day, "attack", attacked, "true" if killed else "false")
+            if killed:
+                self.alive.discard(attacked)
+                self.deaths[attacked] = self.day
+                self._dead = [attacked]
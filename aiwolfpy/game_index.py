@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+GameIndex
+
+Random access to the games of a directory of AIWolf logs. build_index
+scans the logs once and records for every game its file, byte range,
+roles, agent names and outcome in a small index (games.npy and
+files.json). GameIndex finds games by role, seat, name or winner and
+decodes only the requested games, row types and days straight from the
+memory mapped log files, into the rows of read_log.
+"""
+
+from __future__ import print_function, division
+import csv
+import json
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .game_engine import ROLES
+from .log_cache import log_files
+from .read_log import log_rows, LOG_COLUMNS
+
+INDEX_VERSION = 1
+
+FILES_NAME = "files.json"
+
+GAMES_NAME = "games.npy"
+
+MAX_PLAYERS = 15
+
+WINNERS = ("VILLAGER", "WEREWOLF", "FOX")
+
+# roles holds 1 + the index of the role in ROLES (0 for no seat), winner 1 + the index in WINNERS (0 for no result),
+# names the ids of the names in files.json (-1 for no seat).
+GAME_DTYPE = np.dtype([("file", np.int32), ("start", np.int64), ("stop", np.int64), ("players", np.uint8),
+                       ("days", np.int16), ("winner", np.uint8), ("roles", np.uint8, (MAX_PLAYERS,)),
+                       ("names", np.int32, (MAX_PLAYERS,))])
+
+# Types of the lines of the log each row type of read_log is made of.
+RAW_TYPES = {"initialize": (b"status",), "talk": (b"talk",), "whisper": (b"whisper",), "vote": (b"vote",),
+             "attack_vote": (b"attackVote",), "divine": (b"divine",), "execute": (b"execute",),
+             "identify": (b"execute", b"status"), "guard": (b"guard",), "attack": (b"attack",),
+             "dead": (b"attack",)}
+
+
+def _new_game(start):
+    return {"start": start, "stop": start, "days": 0, "winner": None, "roles": {}, "names": {}, "started": False}
+
+
+def scan_log(path):
+    """
+    Find the games of a log file, runs in the worker processes. A file usually holds one game, a status line of day 0
+    after the game has started (or finished) begins the next one.
+    :param path:
+    :return: Path, mtime and the list of games (dicts of start, stop, days, winner, roles and names).
+    """
+    mtime = os.stat(path).st_mtime_ns
+    games = []
+    game = None
+    offset = 0
+    with open(path, 'rb') as log_file:
+        for line in log_file:
+            length = len(line)
+            line = line.rstrip(b"\r\n")
+            if not line:
+                offset += length
+                continue
+            fields = line.split(b",", 5)
+            day = int(fields[0])
+            row_type = fields[1]
+            if game is None or (game["started"] and day == 0 and row_type == b"status"):
+                if game is not None:
+                    game["stop"] = offset
+                    games.append(game)
+                game = _new_game(offset)
+            if day > 0:
+                game["started"] = True
+                game["days"] = max(game["days"], day)
+            if row_type == b"status" and day == 0:
+                seat = int(fields[2])
+                game["roles"][seat] = fields[3].decode('utf-8')
+                if len(fields) > 5:
+                    game["names"][seat] = fields[5].decode('utf-8')
+            elif row_type == b"result":
+                game["started"] = True
+                game["winner"] = fields[4].decode('utf-8')
+            offset += length
+    if game is not None:
+        game["stop"] = offset
+        games.append(game)
+    for game in games:
+        del game["started"]
+    return path, mtime, games
+
+
+def build_index(paths, index_dir, workers=None, chunksize=8):
+    """
+    Scan the logs and write the index.
+    :param paths: Log files and directories (see log_files).
+    :param index_dir: Directory of the index, created if needed.
+    :param workers: Number of scanning processes, 1 scans in this process.
+    :param chunksize: Files handed to a worker at a time.
+    :return: The GameIndex.
+    """
+    if not os.path.isdir(index_dir):
+        os.makedirs(index_dir)
+    files = log_files(paths)
+    if workers == 1 or len(files) < 2:
+        results = list(map(scan_log, files))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(scan_log, files, chunksize=chunksize))
+
+    names = []
+    name_ids = {}
+    file_entries = []
+    rows = []
+    for file_id, (path, mtime, games) in enumerate(results):
+        file_entries.append({"path": path, "mtime": mtime})
+        for game in games:
+            roles = [0] * MAX_PLAYERS
+            seat_names = [-1] * MAX_PLAYERS
+            for seat, role in game["roles"].items():
+                roles[seat - 1] = ROLES.index(role) + 1
+            for seat, name in game["names"].items():
+                if name not in name_ids:
+                    name_ids[name] = len(names)
+                    names.append(name)
+                seat_names[seat - 1] = name_ids[name]
+            winner = 0 if game["winner"] is None else WINNERS.index(game["winner"]) + 1
+            rows.append((file_id, game["start"], game["stop"], len(game["roles"]), game["days"], winner, roles,
+                         seat_names))
+
+    np.save(os.path.join(index_dir, GAMES_NAME), np.array(rows, dtype=GAME_DTYPE))
+    with open(os.path.join(index_dir, FILES_NAME), 'w') as files_file:
+        json.dump({"version": INDEX_VERSION, "files": file_entries, "names": names}, files_file)
+    return GameIndex(index_dir)
+
+
+class GameIndex(object):
+    """
+    A loaded index. Games are numbered in the order of their files (sorted by path) and of their place in the file.
+    """
+
+    def __init__(self, index_dir):
+        with open(os.path.join(index_dir, FILES_NAME)) as files_file:
+            meta = json.load(files_file)
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError("Unsupported index version: " + str(meta.get("version")))
+        self.files = meta["files"]
+        self.names = meta["names"]
+        self.name_ids = {name: i for i, name in enumerate(self.names)}
+        self.games = np.load(os.path.join(index_dir, GAMES_NAME), mmap_mode='r')
+        self._maps = {}
+
+    def __len__(self):
+        return len(self.games)
+
+    def game(self, number):
+        """
+        :param number:
+        :return: Dict of the path, byte range, days, winner and the roles and names by seat of the game.
+        """
+        entry = self.games[number]
+        players = [seat for seat in range(MAX_PLAYERS) if entry["roles"][seat]]
+        return {"path": self.files[entry["file"]]["path"], "start": int(entry["start"]), "stop": int(entry["stop"]),
+                "days": int(entry["days"]), "winner": WINNERS[entry["winner"] - 1] if entry["winner"] else None,
+                "roles": {seat + 1: ROLES[entry["roles"][seat] - 1] for seat in players},
+                "names": {seat + 1: self.names[entry["names"][seat]] for seat in players
+                          if entry["names"][seat] >= 0}}
+
+    def find(self, role=None, seat=None, name=None, winner=None, players=None):
+        """
+        Games matching all the given conditions, for instance find(role="SEER", name="ROLTK01") or find(seat=3,
+        winner="WEREWOLF").
+        :param role: With seat or name, the role of that agent, else any agent with that role.
+        :param seat: 1 based index of the agent.
+        :param name: Name of the agent.
+        :param winner: Winning team.
+        :param players: Number of players.
+        :return: Sorted array of the game numbers.
+        """
+        games = self.games
+        mask = np.ones(len(games), dtype=bool)
+        if players is not None:
+            mask &= games["players"] == players
+        if winner is not None:
+            mask &= games["winner"] == WINNERS.index(winner) + 1
+        # Seats the conditions apply to, per game.
+        seats = np.ones((len(games), MAX_PLAYERS), dtype=bool)
+        if seat is not None:
+            seats[:, np.arange(MAX_PLAYERS) != seat - 1] = False
+        if name is not None:
+            seats &= games["names"] == self.name_ids.get(name, -2)
+        if role is not None:
+            seats &= games["roles"] == ROLES.index(role) + 1
+        if seat is not None or name is not None or role is not None:
+            mask &= seats.any(axis=1)
+        return np.flatnonzero(mask)
+
+    def _map(self, file_id):
+        log_map = self._maps.get(file_id)
+        if log_map is None:
+            entry = self.files[file_id]
+            if os.stat(entry["path"]).st_mtime_ns != entry["mtime"]:
+                raise ValueError(entry["path"] + " changed since the index was built")
+            with open(entry["path"], 'rb') as log_file:
+                log_map = self._maps[file_id] = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return log_map
+
+    def rows(self, number, types=None, days=None):
+        """
+        Decode a game, only the lines of the requested types and days are parsed.
+        :param number: Number of the game.
+        :param types: Row types of read_log to return (talk, vote, identify...), None for all.
+        :param days: Day or days to return, None for all.
+        :return: Generator of the (day, type, idx, turn, agent, text) rows of the game.
+        """
+        entry = self.games[number]
+        data = self._map(int(entry["file"]))[int(entry["start"]):int(entry["stop"])]
+        if isinstance(types, str):
+            types = (types,)
+        if isinstance(days, int):
+            days = (days,)
+        raw_types = None if types is None else frozenset(raw for row_type in types for raw in RAW_TYPES[row_type])
+        day_set = None if days is None else frozenset(str(day).encode('utf-8') for day in days)
+
+        lines = []
+        for line in data.splitlines():
+            day, _, rest = line.partition(b",")
+            row_type = rest[:rest.find(b",")]
+            if row_type == b"status":
+                # Only the roles of day 0 are rows, they are needed for identify on any day.
+                if day != b"0":
+                    continue
+            elif day_set is not None and day not in day_set:
+                continue
+            if raw_types is not None and row_type not in raw_types:
+                continue
+            lines.append(line.decode('utf-8'))
+        for row in log_rows(csv.reader(lines, delimiter=',')):
+            if (types is None or row[1] in types) and (days is None or row[0] in days):
+                yield row
+
+    def dataframe(self, numbers, types=None, days=None):
+        """
+        :param numbers: Number of a game, or several numbers.
+        :param types: See rows.
+        :param days: See rows.
+        :return: DataFrame of read_log for a single game, with an extra game column in front for several.
+        """
+        import pandas as pd
+        single = isinstance(numbers, (int, np.integer))
+        columns = ([] if single else ["game"]) + list(LOG_COLUMNS)
+        data = {name: [] for name in columns}
+        appends = [data[name].append for name in columns]
+        for number in ([numbers] if single else numbers):
+            prefix = () if single else (int(number),)
+            for row in self.rows(number, types, days):
+                for append, value in zip(appends, prefix + row):
+                    append(value)
+        return pd.DataFrame(data, columns=columns)
+
+    def close(self):
+        for log_map in self._maps.values():
+            log_map.close()
+        self._maps = {}
+
+
+def load_index(index_dir):
+    """
+    :param index_dir:
+    :return: The GameIndex of the directory, None if there is no index there.
+    """
+    if not os.path.exists(os.path.join(index_dir, FILES_NAME)):
+        return None
+    return GameIndex(index_dir)
+
+
+if __name__ == "__main__":
+    # Build an index and compare its queries with read_log,
+    # usage: python -m aiwolfpy.game_index index_dir log_dir_or_file [...] [-w workers]
+    import argparse
+    import time
+    from .read_log import read_log
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('index_dir')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('-w', type=int, action='store', dest='workers', default=None)
+    input_args = parser.parse_args()
+
+    begin = time.perf_counter()
+    index = build_index(input_args.paths, input_args.index_dir, input_args.workers)
+    print("build: {0:.3f}s, {1} games in {2} files".format(time.perf_counter() - begin, len(index), len(index.files)))
+
+    begin = time.perf_counter()
+    votes = sum(1 for number in range(len(index)) for _ in index.rows(number, "vote", 3))
+    print("index, day 3 votes: {0:.3f}s, {1} votes".format(time.perf_counter() - begin, votes))
+
+    begin = time.perf_counter()
+    votes = 0
+    for entry in index.files:
+        log = read_log(entry["path"])
+        votes += int(((log["type"] == "vote") & (log["day"] == 3)).sum())
+    print("read_log, day 3 votes: {0:.3f}s, {1} votes".format(time.perf_counter() - begin, votes))
+
+    if index.names:
+        begin = time.perf_counter()
+        games = index.find(role="SEER", name=index.names[0])
+        frame = index.dataframe(games, "divine")
+        print("index, divines of {0} as SEER: {1:.3f}s, {2} games, {3} rows".format(
+            index.names[0], time.perf_counter() - begin, len(games), len(frame)))
+    index.close()
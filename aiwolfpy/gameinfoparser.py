@@ -1,6 +1,66 @@
 from __future__ import print_function, division 
-import pandas as pd
+from collections import namedtuple
 import json
+try:
+    import pandas as pd
+except ImportError:
+    # pandas is only needed for the DataFrame adapters.
+    pd = None
+
+DIFF_COLUMNS = ("day", "type", "idx", "turn", "agent", "text")
+
+# A single row of the game log.
+DiffRow = namedtuple("DiffRow", DIFF_COLUMNS)
+
+
+class GameDiff(object):
+    """
+    Rows added to the game log since the previous diff.
+    This is a view over the columns held by GameInfoParser, building it costs nothing and iterating it
+    costs only the number of new rows. to_dataframe() gives the same DataFrame get_gamedf_diff returns.
+    """
+
+    __slots__ = ("_columns", "_start", "_stop")
+
+    def __init__(self, columns, start, stop):
+        """
+        :param columns: Dict of column name to list, the parser's pd_dict.
+        :param start: First row of the diff.
+        :param stop: End of the diff (exclusive).
+        """
+        self._columns = columns
+        self._start = start
+        self._stop = stop
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __iter__(self):
+        if self._stop == self._start:
+            return iter(())
+        columns = self._columns
+        start, stop = self._start, self._stop
+        return map(DiffRow._make, zip(*[columns[name][start:stop] for name in DIFF_COLUMNS]))
+
+    def __getitem__(self, name):
+        """
+        :param name: Column name.
+        :return: List with the values of the column in this diff.
+        """
+        return self._columns[name][self._start:self._stop]
+
+    def rows(self):
+        return list(self)
+
+    def to_dataframe(self):
+        return pd.DataFrame({name: self[name] for name in DIFF_COLUMNS})
+
+    def to_string(self):
+        lines = ["\t".join(DIFF_COLUMNS)]
+        for row in self:
+            lines.append("\t".join(str(value) for value in row))
+        return "\n".join(lines)
+
 
 class GameInfoParser(object):
     
@@ -34,16 +94,16 @@ class GameInfoParser(object):
         return pd.DataFrame(self.pd_dict)
         
     def get_gamedf_diff(self):
-        ret_df = pd.DataFrame({
-            "day":self.pd_dict["day"][self.rows_returned:], 
-            "type":self.pd_dict["type"][self.rows_returned:], 
-            "idx":self.pd_dict["idx"][self.rows_returned:], 
-            "turn":self.pd_dict["turn"][self.rows_returned:], 
-            "agent":self.pd_dict["agent"][self.rows_returned:], 
-            "text":self.pd_dict["text"][self.rows_returned:]
-        })
+        return self.get_game_diff().to_dataframe()
+
+    def get_game_diff(self):
+        """
+        Same rows as get_gamedf_diff, without building a DataFrame.
+        :return: GameDiff of the rows added since the previous diff.
+        """
+        ret_diff = GameDiff(self.pd_dict, self.rows_returned, len(self.pd_dict["day"]))
         self.rows_returned = len(self.pd_dict["day"])
-        return ret_df
+        return ret_diff
         
         
                 
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+Latency
+
+Per request timings of a session. Every request is split to phases:
+decode (json of the packet, the mean of the packets received together,
+see PacketReader.decode_time), diff (GameInfoParser update and diff build),
+update (agent.update), decision (the agent call answering the request) and
+send. The timings are kept in HDR style histograms per request type and
+phase, the total of every request is compared against the timeLimit of
+the game.
+"""
+
+from __future__ import print_function, division
+import signal
+import weakref
+
+PHASES = ("decode", "diff", "update", "decision", "send")
+
+# Values below 2 ** SUB_BUCKET_BITS microseconds are exact, above it every power of two is split
+# to 2 ** (SUB_BUCKET_BITS - 1) buckets, so the relative error is below 2 ** -(SUB_BUCKET_BITS - 1).
+SUB_BUCKET_BITS = 7
+
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+
+HALF_SUB_BUCKET_COUNT = SUB_BUCKET_COUNT >> 1
+
+PERCENTILES = (50, 90, 99)
+
+# Recorders that print their summary on the summary signal.
+_recorders = weakref.WeakSet()
+
+
+class LatencyHistogram(object):
+    """
+    Log-linear histogram of durations in microseconds, recording is a couple of integer operations
+    and the memory grows with the log of the largest value.
+    """
+
+    def __init__(self):
+        self.counts = []
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    @staticmethod
+    def _index(value):
+        if value < SUB_BUCKET_COUNT:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS
+        return SUB_BUCKET_COUNT + (shift - 1) * HALF_SUB_BUCKET_COUNT + (value >> shift) - HALF_SUB_BUCKET_COUNT
+
+    @staticmethod
+    def _highest_value(index):
+        """
+        :param index:
+        :return: Highest value that falls in the bucket with the given index.
+        """
+        if index < SUB_BUCKET_COUNT:
+            return index
+        shift, offset = divmod(index - SUB_BUCKET_COUNT, HALF_SUB_BUCKET_COUNT)
+        shift += 1
+        return ((offset + HALF_SUB_BUCKET_COUNT + 1) << shift) - 1
+
+    def record(self, seconds):
+        value = int(seconds * 1000000)
+        index = self._index(value)
+        if index >= len(self.counts):
+            self.counts += [0] * (index + 1 - len(self.counts))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def percentile(self, percentile):
+        """
+        :param percentile: Between 0 and 100.
+        :return: The value (microseconds) that the given percent of the records are equal or below to.
+        """
+        if self.count == 0:
+            return 0
+        wanted = max(1, int(round(self.count * percentile / 100.0)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted:
+                return min(self._highest_value(index), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def merge(self, other):
+        """
+        Add the records of another histogram to this one.
+        :param other:
+        :return:
+        """
+        if len(other.counts) > len(self.counts):
+            self.counts += [0] * (len(other.counts) - len(self.counts))
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+
+class LatencyRecorder(object):
+    """
+    Timings of a single session. The session adds the phases of the current request as they end and
+    finishes the request once its response was sent (or right away when it has none).
+    """
+
+    def __init__(self, name="", trace_path=None, output=print):
+        """
+        :param name: Name of the session in the summary.
+        :param trace_path: If given, every game writes a trace line per request to this path, "{game}" in it is
+        replaced by the number of the game (otherwise the number is appended).
+        :param output: Function the summary is given to.
+        """
+        self.name = name
+        self.trace_path = trace_path
+        self.output = output
+        self.time_limit = None
+        self.histograms = {}
+        self.over_limit = {}
+        self.games = 0
+        self._request = None
+        self._day = None
+        self._phases = dict.fromkeys(PHASES, 0.0)
+        self._trace = None
+        _recorders.add(self)
+
+    def new_game(self, time_limit=None):
+        """
+        :param time_limit: timeLimit of the game setting, in milliseconds.
+        :return:
+        """
+        self.close_trace()
+        self.games += 1
+        self.time_limit = time_limit / 1000.0 if time_limit else None
+        if self.trace_path is not None:
+            path = self.trace_path.format(game=self.games) if "{game}" in self.trace_path else \
+                self.trace_path + "." + str(self.games)
+            self._trace = open(path, 'w')
+            self._trace.write("day,request," + ",".join(phase + "_us" for phase in PHASES) + ",total_us\n")
+
+    def start(self, request, day=None):
+        """
+        Called by the session when it starts handling a request, phases added before it (decode) belong to it.
+        :param request:
+        :param day:
+        :return:
+        """
+        if self._request is not None:
+            self.finish()
+        self._request = request
+        self._day = day
+
+    def add(self, phase, seconds):
+        self._phases[phase] += seconds
+
+    def add_handled(self, seconds):
+        """
+        :param seconds: Time the session spent handling the request, whatever wasn't spent on the diff and the
+        update was spent on the decision.
+        :return:
+        """
+        phases = self._phases
+        phases["decision"] += max(0.0, seconds - phases["diff"] - phases["update"])
+
+    def finish(self):
+        """
+        Record the phases of the current request.
+        :return:
+        """
+        request = self._request
+        if request is None:
+            return
+        phases = self._phases
+        total = 0.0
+        for phase in PHASES:
+            seconds = phases[phase]
+            total += seconds
+            key = (request, phase)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram()
+            histogram.record(seconds)
+
+        key = (request, "total")
+        if key not in self.histograms:
+            self.histograms[key] = LatencyHistogram()
+        self.histograms[key].record(total)
+        if self.time_limit is not None and total > self.time_limit:
+            self.over_limit[request] = self.over_limit.get(request, 0) + 1
+
+        if self._trace is not None:
+            self._trace.write(str(self._day) + "," + request + "," +
+                              ",".join(str(int(phases[phase] * 1000000)) for phase in PHASES) + "," +
+                              str(int(total * 1000000)) + "\n")
+
+        self._request = None
+        self._phases = dict.fromkeys(PHASES, 0.0)
+
+    def merge(self, other):
+        """
+        Add the finished requests of another recorder (of another session or process) to this one.
+        :param other:
+        :return:
+        """
+        for key, histogram in other.histograms.items():
+            if key not in self.histograms:
+                self.histograms[key] = LatencyHistogram()
+            self.histograms[key].merge(histogram)
+        for request, count in other.over_limit.items():
+            self.over_limit[request] = self.over_limit.get(request, 0) + count
+        self.games += other.games
+        if self.time_limit is None:
+            self.time_limit = other.time_limit
+
+    def __getstate__(self):
+        # Only the statistics are sent between processes, not the trace file and the output function.
+        state = dict(self.__dict__)
+        state['_trace'] = None
+        state['output'] = print
+        return state
+
+    def close_trace(self):
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+    def summary(self):
+        """
+        :return: Table of the timings per request type and phase, in milliseconds.
+        """
+        lines = ["Latency of " + str(self.name) + " over " + str(self.games) + " games, time limit: " +
+                 ("{0:.0f}ms".format(self.time_limit * 1000) if self.time_limit is not None else "none"),
+                 "{0:<26}{1:>8}{2:>10}".format("request/phase", "count", "mean") +
+                 "".join("{0:>10}".format("p" + str(p)) for p in PERCENTILES) + "{0:>10}{1:>8}".format("max", "over")]
+        for request in sorted(set(request for request, _ in self.histograms)):
+            for phase in PHASES + ("total",):
+                histogram = self.histograms.get((request, phase))
+                if histogram is None or (phase != "total" and histogram.max == 0):
+                    continue
+                over = str(self.over_limit.get(request, 0)) if phase == "total" else ""
+                lines.append("{0:<26}{1:>8}{2:>10.3f}".format(request + "/" + phase, histogram.count,
+                                                               histogram.mean() / 1000.0) +
+                             "".join("{0:>10.3f}".format(histogram.percentile(p) / 1000.0) for p in PERCENTILES) +
+                             "{0:>10.3f}{1:>8}".format(histogram.max / 1000.0, over))
+        return "\n".join(lines)
+
+    def dump(self):
+        self.output(self.summary())
+
+
+def dump_all(*args):
+    """
+    Print the summary of every live recorder, used as a signal handler.
+    :return:
+    """
+    for recorder in list(_recorders):
+        recorder.dump()
+
+
+def install_signal_handler(signum=None):
+    """
+    Dump the summaries of all the recorders when the process gets the given signal (SIGUSR1 by default).
+    Must be called from the main thread, does nothing on platforms without the signal.
+    :param signum:
+    :return:
+    """
+    if signum is None:
+        signum = getattr(signal, "SIGUSR1", None)
+    if signum is not None:
+        signal.signal(signum, dump_all)
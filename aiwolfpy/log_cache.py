@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+LogCache
+
+Columnar binary cache of AIWolf log corpora. build_cache parses the log
+files on a process pool (each file streamed with iter_log) and stores the
+rows of all of them as one .npy file per column, the texts interned in a
+single table and a manifest of the files with their mtimes and row ranges.
+Every build writes its arrays under names suffixed with a new build id and
+then atomically replaces the manifest, which names the build it describes,
+so a crashed build never mixes new arrays with the old manifest.
+Files that didn't change since the cache was built are taken from the old
+cache instead of being parsed again. load_cache maps the columns with
+np.load(mmap_mode='r'), so loading a corpus costs a few file opens.
+"""
+
+from __future__ import print_function, division
+import json
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .read_log import iter_log, LOG_COLUMNS
+
+CACHE_VERSION = 2
+
+MANIFEST_NAME = "manifest.json"
+
+# Row types, the type column holds their index.
+LOG_TYPES = ("initialize", "talk", "whisper", "vote", "attack_vote", "divine", "execute", "identify", "guard",
+             "attack", "dead", "finish")
+
+LOG_TYPE_CODES = {name: code for code, name in enumerate(LOG_TYPES)}
+
+COLUMN_DTYPES = {"day": np.int16, "type": np.uint8, "idx": np.int32, "turn": np.int16, "agent": np.int16,
+                 "text": np.int32}
+
+
+# Arrays of a build besides the columns.
+TEXT_ARRAYS = ("text_offsets", "text_blob")
+
+
+def _mtime(path):
+    return os.stat(path).st_mtime_ns
+
+
+def _array_path(cache_dir, name, build):
+    """
+    :param cache_dir:
+    :param name: Name of a column or of one of the TEXT_ARRAYS.
+    :param build: Id of the build the array belongs to.
+    :return:
+    """
+    return os.path.join(cache_dir, name + "." + build + ".npy")
+
+
+def log_files(paths, extensions=(".log",)):
+    """
+    :param paths: Log files and directories, directories are searched recursively for .log files.
+    :param extensions: Extensions of the files taken from the directories.
+    :return: Sorted absolute paths of the log files.
+    """
+    extensions = tuple(extensions)
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files += [os.path.join(root, name) for name in names if name.endswith(extensions)]
+        else:
+            files.append(path)
+    return sorted(set(os.path.abspath(path) for path in files))
+
+
+class TextTable(object):
+    """
+    Interned texts, every distinct text gets the next id.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.texts = []
+
+    def intern(self, text):
+        text_id = self.ids.get(text)
+        if text_id is None:
+            text_id = self.ids[text] = len(self.texts)
+            self.texts.append(text)
+        return text_id
+
+    def intern_all(self, texts):
+        """
+        :param texts:
+        :return: Array of the ids of the given texts.
+        """
+        intern = self.intern
+        return np.fromiter((intern(text) for text in texts), dtype=np.int32, count=len(texts))
+
+    def save(self, cache_dir, build):
+        encoded = [text.encode('utf-8') for text in self.texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in encoded], out=offsets[1:])
+        np.save(_array_path(cache_dir, "text_offsets", build), offsets)
+        np.save(_array_path(cache_dir, "text_blob", build), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+
+def parse_log(path):
+    """
+    Parse a single log into columns, runs in the worker processes.
+    :param path:
+    :return: Path, mtime, dict of column name to array (text holds ids into the returned texts) and the texts.
+    """
+    mtime = _mtime(path)
+    table = TextTable()
+    columns = {name: [] for name in LOG_COLUMNS}
+    appends = [columns[name].append for name in LOG_COLUMNS]
+    for day, row_type, idx, turn, agent, text in iter_log(path):
+        for append, value in zip(appends, (day, LOG_TYPE_CODES[row_type], int(idx), turn, agent,
+                                            table.intern(text))):
+            append(value)
+    arrays = {name: np.asarray(values, dtype=COLUMN_DTYPES[name]) for name, values in columns.items()}
+    return path, mtime, arrays, table.texts
+
+
+class LogCorpus(object):
+    """
+    A loaded cache: memory mapped columns of the rows of all the files, use rows/dataframe to get the rows of a
+    single file in the schema of read_log.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        with open(os.path.join(cache_dir, MANIFEST_NAME)) as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest.get("version") != CACHE_VERSION:
+            raise ValueError("Unsupported cache version: " + str(manifest.get("version")))
+        self.build = manifest["build"]
+        self.files = manifest["files"]
+        self.file_index = {entry["path"]: i for i, entry in enumerate(self.files)}
+        self.columns = {name: np.load(_array_path(cache_dir, name, self.build), mmap_mode='r')
+                        for name in LOG_COLUMNS}
+        self._text_offsets = np.load(_array_path(cache_dir, "text_offsets", self.build), mmap_mode='r')
+        self._text_blob = np.load(_array_path(cache_dir, "text_blob", self.build), mmap_mode='r')
+        self._text_cache = {}
+
+    def __len__(self):
+        return len(self.columns["day"])
+
+    def num_texts(self):
+        return len(self._text_offsets) - 1
+
+    def text(self, text_id):
+        text = self._text_cache.get(text_id)
+        if text is None:
+            text = self._text_cache[text_id] = \
+                bytes(self._text_blob[self._text_offsets[text_id]:self._text_offsets[text_id + 1]]).decode('utf-8')
+        return text
+
+    def row_range(self, path):
+        entry = self.files[self.file_index[os.path.abspath(path)]]
+        return entry["start"], entry["stop"]
+
+    def rows(self, path):
+        """
+        :param path:
+        :return: Generator of the (day, type, idx, turn, agent, text) rows of the given file.
+        """
+        start, stop = self.row_range(path)
+        columns = [self.columns[name][start:stop].tolist() for name in LOG_COLUMNS]
+        columns[1] = [LOG_TYPES[code] for code in columns[1]]
+        columns[5] = [self.text(text_id) for text_id in columns[5]]
+        return zip(*columns)
+
+    def dataframe(self, path):
+        """
+        :param path:
+        :return: The DataFrame read_log returns for the file.
+        """
+        import pandas as pd
+        start, stop = self.row_range(path)
+        data = {name: np.asarray(self.columns[name][start:stop], dtype=np.int64) for name in LOG_COLUMNS}
+        data["type"] = [LOG_TYPES[code] for code in self.columns["type"][start:stop]]
+        data["text"] = [self.text(text_id) for text_id in self.columns["text"][start:stop]]
+        return pd.DataFrame(data, columns=list(LOG_COLUMNS))
+
+
+def load_cache(cache_dir):
+    """
+    :param cache_dir:
+    :return: The LogCorpus of the cache, None if there is no cache there.
+    """
+    if not os.path.exists(os.path.join(cache_dir, MANIFEST_NAME)):
+        return None
+    return LogCorpus(cache_dir)
+
+
+def build_cache(paths, cache_dir, workers=None, chunksize=8):
+    """
+    Bring the cache up to date with the given logs, only new and modified files are parsed.
+    :param paths: Log files and directories (see log_files).
+    :param cache_dir: Directory of the cache, created if needed.
+    :param workers: Number of parsing processes, 1 parses in this process.
+    :param chunksize: Files handed to a worker at a time.
+    :return: The LogCorpus of the updated cache and the number of files that were parsed.
+    """
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    files = log_files(paths)
+    try:
+        old = load_cache(cache_dir)
+    except (ValueError, KeyError, OSError):
+        old = None
+    old_entries = {} if old is None else {entry["path"]: entry for entry in old.files}
+    to_parse = [path for path in files
+                if path not in old_entries or old_entries[path]["mtime"] != _mtime(path)]
+
+    table = TextTable()
+    parts = {}
+    if old is not None:
+        old_to_new = np.full(old.num_texts(), -1, dtype=np.int32)
+        for path in files:
+            entry = old_entries.get(path)
+            if entry is None or path in to_parse:
+                continue
+            start, stop = entry["start"], entry["stop"]
+            arrays = {name: np.array(old.columns[name][start:stop]) for name in LOG_COLUMNS}
+            text_ids = arrays["text"]
+            for text_id in np.unique(text_ids):
+                if old_to_new[text_id] == -1:
+                    old_to_new[text_id] = table.intern(old.text(int(text_id)))
+            arrays["text"] = old_to_new[text_ids]
+            parts[path] = (entry["mtime"], arrays)
+        # The arrays of the old build are removed below, release their maps first.
+        old = None
+
+    if workers == 1 or len(to_parse) < 2:
+        results = map(parse_log, to_parse)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(parse_log, to_parse, chunksize=chunksize)
+    try:
+        for path, mtime, arrays, texts in results:
+            arrays["text"] = table.intern_all(texts)[arrays["text"]] if len(texts) else arrays["text"]
+            parts[path] = (mtime, arrays)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    manifest_files = []
+    start = 0
+    for path in files:
+        mtime, arrays = parts[path]
+        stop = start + len(arrays["day"])
+        manifest_files.append({"path": path, "mtime": mtime, "start": start, "stop": stop})
+        start = stop
+
+    # The arrays of the build are written under names no manifest refers to yet, the build only takes effect
+    # when the manifest is replaced, so a failed build leaves the old cache intact.
+    build = uuid.uuid4().hex
+    for name in LOG_COLUMNS:
+        column = np.concatenate([parts[path][1][name] for path in files]) if files else \
+            np.zeros(0, dtype=COLUMN_DTYPES[name])
+        np.save(_array_path(cache_dir, name, build), column.astype(COLUMN_DTYPES[name], copy=False))
+    table.save(cache_dir, build)
+    manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+    with open(manifest_path + "." + build, 'w') as manifest_file:
+        json.dump({"version": CACHE_VERSION, "build": build, "files": manifest_files}, manifest_file)
+        manifest_file.flush()
+        os.fsync(manifest_file.fileno())
+    os.replace(manifest_path + "." + build, manifest_path)
+    _remove_old_builds(cache_dir, build)
+    return LogCorpus(cache_dir), len(to_parse)
+
+
+def _remove_old_builds(cache_dir, build):
+    """
+    Remove the arrays of the other builds (older ones and ones that failed before replacing the manifest).
+    :param cache_dir:
+    :param build: Id of the current build.
+    :return:
+    """
+    current = set(os.path.basename(_array_path(cache_dir, name, build)) for name in LOG_COLUMNS + TEXT_ARRAYS)
+    prefixes = tuple(name + "." for name in LOG_COLUMNS + TEXT_ARRAYS) + ("tmp.", MANIFEST_NAME + ".")
+    for name in os.listdir(cache_dir):
+        if name in current or not name.startswith(prefixes) or \
+                not (name.endswith(".npy") or name.startswith(MANIFEST_NAME + ".")):
+            continue
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except OSError:
+            # Still mapped by a reader on systems that don't allow removing mapped files, left to the next build.
+            pass
+
+
+if __name__ == "__main__":
+    # Build or update a cache and compare loading it with read_log,
+    # usage: python -m aiwolfpy.log_cache cache_dir log_dir_or_file [...] [-w workers]
+    import argparse
+    import time
+    from .read_log import read_log
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('cache_dir')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('-w', type=int, action='store', dest='workers', default=None)
+    input_args = parser.parse_args()
+
+    begin = time.perf_counter()
+    corpus, parsed = build_cache(input_args.paths, input_args.cache_dir, input_args.workers)
+    print("build: {0:.3f}s, {1} files ({2} parsed), {3} rows, {4} texts".format(
+        time.perf_counter() - begin, len(corpus.files), parsed, len(corpus), corpus.num_texts()))
+
+    begin = time.perf_counter()
+    corpus = load_cache(input_args.cache_dir)
+    talks = int(np.count_nonzero(corpus.columns["type"] == LOG_TYPE_CODES["talk"]))
+    print("load + count talks: {0:.3f}s, {1} talks".format(time.perf_counter() - begin, talks))
+
+    begin = time.perf_counter()
+    talks = sum(int((read_log(entry["path"])["type"] == "talk").sum()) for entry in corpus.files)
+    print("read_log + count talks: {0:.3f}s, {1} talks".format(time.perf_counter() - begin, talks))
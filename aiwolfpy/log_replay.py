@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+LogReplay
+
+Rebuilds the requests a single seat got during a logged game, from the
+rows of read_log (or GameIndex/LogCorpus rows), and hands them to an agent
+through a ParsedSession, without a server. The utterances, votes and night
+actions are the ones of the log, the answers of the agent are ignored, so
+every replay of a game sends the same packets and can be used to measure
+the agent on real traffic.
+"""
+
+from __future__ import print_function, division
+from .game_engine import GameEngine, game_setting, ROLES, OVER, _discard
+from .latency import LatencyRecorder
+from .read_log import iter_log
+from .tcpipclient_parsed import ParsedSession
+
+
+def _last_word(text):
+    return text.rsplit(' ', 1)[-1]
+
+
+def log_roles(rows):
+    """
+    :param rows: Rows of read_log.
+    :return: Dict of seat to role, from the initialize rows.
+    """
+    return {int(row[2]): _last_word(row[5]) for row in rows if row[1] == 'initialize'}
+
+
+def script_packets(script, seat):
+    """
+    :param script: Iterable of (seat, packet), as read by mock_server.read_script.
+    :param seat:
+    :return: The packets of the given seat.
+    """
+    return [packet for packet_seat, packet in script if packet_seat == seat]
+
+
+def replay_packets(packets, session):
+    """
+    Hand recorded packets to a session.
+    :param packets:
+    :param session: A ParsedSession, or anything with its handle method.
+    :return: Number of packets.
+    """
+    count = 0
+    for packet in packets:
+        session.handle(packet)
+        count += 1
+    return count
+
+
+class LogReplay(GameEngine):
+    """
+    Replay of a logged game to one seat. The state of the game follows the rows of the log, the packets are
+    built by the GameEngine, so they are the ones the engine would have sent the seat in that game.
+    """
+
+    def __init__(self, rows, seat, agent=None, session=None, setting=None, measure=False, latency=None):
+        """
+        :param rows: Rows of read_log of a single game, a log path or a DataFrame of read_log.
+        :param seat: 1 based index of the replayed agent.
+        :param agent: Agent of the seat, AgentContainer or anything with the same interface.
+        :param session: Instead of agent, the session the packets are handed to.
+        :param setting: gameSetting, the default one for the roles of the log if not given.
+        :param measure: Time the requests of the seat, see result()['latency'].
+        :param latency: LatencyRecorder of the session, its requests are finished once answered (implies measure).
+        """
+        if isinstance(rows, str):
+            rows = iter_log(rows)
+        elif hasattr(rows, 'itertuples'):
+            rows = rows.itertuples(index=False, name=None)
+        self.rows = [tuple(row) for row in rows]
+        roles = log_roles(self.rows)
+        if setting is None:
+            role_num_map = dict.fromkeys(ROLES, 0)
+            for role in roles.values():
+                role_num_map[role] += 1
+            setting = game_setting(len(roles), 0, roleNumMap=role_num_map)
+        GameEngine.__init__(self, setting=setting, roles=[roles[idx] for idx in sorted(roles)],
+                            sessions=[None] * len(roles))
+        if seat not in self.sessions:
+            raise ValueError("No seat " + str(seat) + " in a game of " + str(len(roles)))
+        self.seat = seat
+        # Names of the other seats aren't in the rows, they are only used by the status lines of the engine's log.
+        self.names = dict.fromkeys(self.seats)
+        if latency is None and measure:
+            latency = LatencyRecorder(seat, output=_discard)
+        if latency is not None:
+            self.recorders = {seat: latency}
+        if session is None:
+            session = ParsedSession(agent, latency=latency)
+        self.sessions[seat] = session
+        self.requests = 0
+
+    def _send(self, idx, request, game_info=None, setting=None):
+        # Only the replayed seat has a session, the others are played by the log.
+        if idx != self.seat:
+            return None
+        self.requests += 1
+        return GameEngine._send(self, idx, request, game_info, setting)
+
+    def _utter(self, row, request, utterances, remain):
+        """
+        A talk or whisper of the log, the seat is asked for it first when it is the speaker.
+        :return:
+        """
+        day, _, idx, turn, agent, text = row
+        if agent == self.seat and remain.get(agent, 0) > 0:
+            self._send(agent, request, self._game_info(agent))
+        if text != OVER and agent in remain:
+            remain[agent] -= 1
+        utterances.append({'idx': idx, 'day': day, 'turn': turn, 'agent': agent, 'text': text})
+
+    def _finish_day(self):
+        self._send(self.seat, 'DAILY_FINISH', self._game_info(self.seat))
+        self._last_votes = self._latest_votes = []
+        self._last_executed = self._latest_executed = None
+
+    def run(self):
+        """
+        Replay the game to its end.
+        :return: The result of the game, see GameEngine.result.
+        """
+        seat = self.seat
+        self.names[seat] = self._send(seat, 'NAME')
+        self._send(seat, 'INITIALIZE', self._game_info(seat), self.setting)
+        self._start_day()
+        self._daily_initialize()
+        finished = False
+        votes = []
+        latest_votes = []
+        attack_votes = []
+        latest_attack_votes = []
+        for row in self.rows:
+            day, row_type, idx, turn, agent, text = row
+            if row_type == 'initialize':
+                continue
+            if day != self.day:
+                if not finished:
+                    self._finish_day()
+                self.day = day
+                self._start_day()
+                self._daily_initialize()
+                finished = False
+                votes, latest_votes, attack_votes, latest_attack_votes = [], [], [], []
+            if row_type == 'talk':
+                self._utter(row, 'TALK', self._talks, self._remain_talk)
+                continue
+            if not finished:
+                # The talks of the day are over once anything else happens.
+                self._finish_day()
+                finished = True
+
+            if row_type == 'whisper':
+                if self.roles[seat] == "WEREWOLF":
+                    self._utter(row, 'WHISPER', self._whispers, self._remain_whisper)
+                else:
+                    self._whispers.append({'idx': idx, 'day': day, 'turn': turn, 'agent': agent, 'text': text})
+            elif row_type == 'vote':
+                if idx == seat:
+                    self._send(seat, 'VOTE', self._game_info(seat, latestVoteList=latest_votes))
+                votes.append({'day': day, 'agent': idx, 'target': agent})
+                if len(votes) == len(self.alive):
+                    latest_votes, votes = votes, []
+            elif row_type == 'execute':
+                self.alive.discard(agent)
+                self.deaths[agent] = day
+                self._last_votes = self._latest_votes = latest_votes
+                self._last_executed = self._latest_executed = agent
+            elif row_type == 'identify':
+                medium = self._alive_with("MEDIUM")
+                if medium:
+                    self._medium_result = {'day': day, 'agent': medium[0], 'target': agent,
+                                           'result': _last_word(text)}
+            elif row_type == 'divine':
+                if idx == seat:
+                    self._send(seat, 'DIVINE', self._game_info(seat))
+                self._divine_result = {'day': day, 'agent': idx, 'target': agent, 'result': _last_word(text)}
+            elif row_type == 'guard':
+                if idx == seat:
+                    self._send(seat, 'GUARD', self._game_info(seat))
+                self._guarded = agent
+            elif row_type == 'attack_vote':
+                if idx == seat:
+                    self._send(seat, 'ATTACK', self._game_info(seat, latestAttackVoteList=latest_attack_votes))
+                attack_votes.append({'day': day, 'agent': idx, 'target': agent})
+                if len(attack_votes) == len(self.wolves()):
+                    latest_attack_votes, attack_votes = attack_votes, []
+                    self._last_attack_votes = latest_attack_votes
+            elif row_type == 'attack':
+                self._attacked = agent
+            elif row_type == 'dead':
+                self.alive.discard(agent)
+                self.deaths[agent] = day
+                self._dead = [agent]
+        if not finished:
+            self._finish_day()
+
+        self.winner = self._check_winner()
+        roles = {str(idx): role for idx, role in self.roles.items()}
+        self._send(seat, 'FINISH', self._game_info(seat, roleMap=roles))
+        return self.result()
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+MockServer
+
+Stand-in for aiwolf-server.jar on localhost, for end to end tests of the
+clients (connect, connect_parse, multi_agent.py). It speaks the JSON wire
+protocol: one packet per line, a response line for NAME, ROLE, TALK,
+WHISPER, VOTE, ATTACK, DIVINE and GUARD. The games are played by the
+GameEngine or replayed from a script, the response time of every request
+is measured at the socket, and the packets can be padded, split into small
+segments or coalesced to stress the framing of the clients.
+"""
+
+from __future__ import print_function, division
+import argparse
+import json
+import socket
+import time
+from .game_engine import GameEngine, game_setting
+from .latency import LatencyHistogram, PERCENTILES
+
+# Requests the client answers with a line.
+RESPONSE_REQUESTS = frozenset(["NAME", "ROLE", "TALK", "WHISPER", "VOTE", "ATTACK", "DIVINE", "GUARD"])
+
+
+class RemoteSeat(object):
+    """
+    A client connected to the server, used by the GameEngine as the session of a seat.
+    """
+
+    def __init__(self, conn, split=0, split_delay=0.0005, coalesce=False, pad=0):
+        """
+        :param conn: Connected socket of the client.
+        :param split: If positive, packets are sent in segments of at most this many bytes.
+        :param split_delay: Pause between the segments of a split packet, so they don't get merged again.
+        :param coalesce: Hold the packets that have no response and send them together with the next packet.
+        :param pad: Number of spaces added after every packet (before its newline), to make it large.
+        """
+        self.conn = conn
+        self.conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.split = split
+        self.split_delay = split_delay
+        self.coalesce = coalesce
+        self.pad = pad
+        self.histograms = {}
+        self.bytes_sent = 0
+        self._pending = bytearray()
+        self._received = bytearray()
+
+    def _send(self, data):
+        self.bytes_sent += len(data)
+        if self.split <= 0:
+            self.conn.sendall(data)
+            return
+        for start in range(0, len(data), self.split):
+            if start and self.split_delay:
+                # Only between segments, the response is timed from the last one.
+                time.sleep(self.split_delay)
+            self.conn.sendall(data[start:start + self.split])
+
+    def _read_line(self):
+        while True:
+            end = self._received.find(b'\n')
+            if end != -1:
+                line = bytes(self._received[:end])
+                del self._received[:end + 1]
+                return line.decode('utf-8').rstrip('\r')
+            data = self.conn.recv(8192)
+            if not data:
+                raise ConnectionError("Client closed the connection")
+            self._received += data
+
+    def handle(self, packet):
+        """
+        Send a packet and wait for its response.
+        :param packet:
+        :return: The response line, None if the request has none.
+        """
+        request = packet['request']
+        data = (json.dumps(packet, separators=(',', ':')) + ' ' * self.pad + '\n').encode('utf-8')
+        if self.coalesce and request not in RESPONSE_REQUESTS and request != 'FINISH':
+            self._pending += data
+            return None
+        if self._pending:
+            data = bytes(self._pending) + data
+            del self._pending[:]
+        self._send(data)
+        if request not in RESPONSE_REQUESTS:
+            return None
+        # Timed from the last byte of the packet, the time the client had to answer.
+        start = time.perf_counter()
+        response = self._read_line()
+        histogram = self.histograms.get(request)
+        if histogram is None:
+            histogram = self.histograms[request] = LatencyHistogram()
+        histogram.record(time.perf_counter() - start)
+        return response
+
+    def close(self):
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+
+class MockServer(object):
+    """
+    Listens on localhost, waits for the clients of all the seats and plays games with them.
+    """
+
+    def __init__(self, port=10000, players=5, host='127.0.0.1', **seat_options):
+        """
+        :param port: Port to listen on, 0 picks a free port (see self.port).
+        :param players: Number of seats, the server waits for this many clients.
+        :param host:
+        :param seat_options: Options of the RemoteSeat of every client (split, coalesce, pad...).
+        """
+        self.players = players
+        self.seat_options = seat_options
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((host, port))
+        self.listener.listen(players)
+        self.port = self.listener.getsockname()[1]
+        self.seats = []
+
+    def accept(self, timeout=None):
+        """
+        Wait until all the seats are connected.
+        :param timeout: Seconds to wait for each client, None to wait forever.
+        :return:
+        """
+        self.listener.settimeout(timeout)
+        while len(self.seats) < self.players:
+            conn, _ = self.listener.accept()
+            conn.settimeout(None)
+            self.seats.append(RemoteSeat(conn, **self.seat_options))
+
+    def play(self, games=1, seed=0, setting=None, log_dir=None):
+        """
+        Play games with the rule engine, game i uses seed + i.
+        :param games:
+        :param seed:
+        :param setting: gameSetting overrides, by their keys.
+        :param log_dir: If given the games are written there in the log format of the server.
+        :return: The results of the games.
+        """
+        self.accept()
+        results = []
+        for game in range(games):
+            log_path = None if log_dir is None else "{0}/{1:05d}.log".format(log_dir, game)
+            engine = GameEngine(setting=game_setting(self.players, seed + game, **(setting or {})),
+                                log_path=log_path, sessions=self.seats)
+            results.append(engine.run())
+        return results
+
+    def replay(self, script):
+        """
+        Send scripted packets, for instance ones recorded from the real server.
+        :param script: Iterable of (seat, packet), seat is the 1 based index of the client.
+        :return: List of (seat, request, response) of the requests that have a response.
+        """
+        self.accept()
+        responses = []
+        for seat, packet in script:
+            response = self.seats[seat - 1].handle(packet)
+            if packet['request'] in RESPONSE_REQUESTS:
+                responses.append((seat, packet['request'], response))
+        return responses
+
+    def summary(self):
+        """
+        :return: Table of the response times of all the seats per request type, in milliseconds.
+        """
+        merged = {}
+        for seat in self.seats:
+            for request, histogram in seat.histograms.items():
+                if request not in merged:
+                    merged[request] = LatencyHistogram()
+                merged[request].merge(histogram)
+        lines = ["Response times of {0} clients, {1} bytes sent".format(
+                     len(self.seats), sum(seat.bytes_sent for seat in self.seats)),
+                 "{0:<12}{1:>8}{2:>10}".format("request", "count", "mean") +
+                 "".join("{0:>10}".format("p" + str(p)) for p in PERCENTILES) + "{0:>10}".format("max")]
+        for request in sorted(merged):
+            histogram = merged[request]
+            lines.append("{0:<12}{1:>8}{2:>10.3f}".format(request, histogram.count, histogram.mean() / 1000.0) +
+                         "".join("{0:>10.3f}".format(histogram.percentile(p) / 1000.0) for p in PERCENTILES) +
+                         "{0:>10.3f}".format(histogram.max / 1000.0))
+        return "\n".join(lines)
+
+    def close(self):
+        for seat in self.seats:
+            seat.close()
+        self.seats = []
+        self.listener.close()
+
+
+def read_script(path):
+    """
+    :param path: JSON lines file, every line is [seat, packet].
+    :return: List of (seat, packet).
+    """
+    with open(path) as script_file:
+        return [tuple(json.loads(line)) for line in script_file if line.strip()]
+
+
+if __name__ == "__main__":
+    # usage: python -m aiwolfpy.mock_server -p 10000 -n 5 -g 10 [-s script.jsonl] [--split 64] [--coalesce] [--pad 100000]
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-p', type=int, action='store', dest='port', default=10000)
+    parser.add_argument('-n', type=int, action='store', dest='players', default=5, choices=(5, 15))
+    parser.add_argument('-g', type=int, action='store', dest='games', default=1)
+    parser.add_argument('-S', type=int, action='store', dest='seed', default=0)
+    parser.add_argument('-t', type=int, action='store', dest='time_limit', default=1000,
+                        help="timeLimit of the game setting, in milliseconds.")
+    parser.add_argument('-s', type=str, action='store', dest='script', default=None,
+                        help="Replay this script instead of playing games.")
+    parser.add_argument('-L', type=str, action='store', dest='log_dir', default=None)
+    parser.add_argument('--split', type=int, action='store', dest='split', default=0,
+                        help="Send the packets in segments of at most this many bytes.")
+    parser.add_argument('--coalesce', action='store_true', dest='coalesce',
+                        help="Send the packets that have no response together with the next packet.")
+    parser.add_argument('--pad', type=int, action='store', dest='pad', default=0,
+                        help="Spaces added to every packet.")
+    input_args = parser.parse_args()
+
+    script = None
+    players = input_args.players
+    if input_args.script is not None:
+        # The script decides the number of seats.
+        script = read_script(input_args.script)
+        players = max(seat for seat, _ in script)
+    server = MockServer(input_args.port, players, split=input_args.split,
+                        coalesce=input_args.coalesce, pad=input_args.pad)
+    print("Waiting for {0} clients on port {1}".format(players, server.port))
+    try:
+        if script is not None:
+            server.replay(script)
+        else:
+            for result in server.play(input_args.games, input_args.seed, {'timeLimit': input_args.time_limit},
+                                      input_args.log_dir):
+                print("Game over on day {0}, winner: {1}".format(result['days'], result['winner']))
+        print(server.summary())
+    finally:
+        server.close()
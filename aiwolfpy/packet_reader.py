@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+PacketReader
+
+Frames the newline delimited JSON packets sent by the AIWolf server.
+Received bytes are kept in one reusable bytearray, packets are cut on
+newline boundaries and every packet is decoded exactly once.
+"""
+
+from __future__ import print_function, division
+import json
+import time
+
+
+class PacketReader(object):
+
+    def __init__(self, sock=None, recv_size=8192):
+        """
+        :param sock: Connected socket to read from, can be None if the bytes are pushed with feed().
+        :param recv_size: Number of bytes requested from the socket on each recv.
+        """
+        self._sock = sock
+        self._recv_size = recv_size
+        self._buffer = bytearray()
+        # Everything before this offset was already searched for a newline.
+        self._scanned = 0
+        # Mean seconds spent decoding a packet in the last packets() call that returned packets: the packets of a
+        # call are decoded together, so each of them is charged an equal share and the shares add up to the total.
+        self.decode_time = 0.0
+
+    def feed(self, data):
+        """
+        Append received bytes to the buffer.
+        :param data:
+        :return:
+        """
+        self._buffer += data
+
+    def pending(self):
+        """
+        :return: Number of buffered bytes that don't form a full packet yet.
+        """
+        return len(self._buffer)
+
+    def packets(self, try_unterminated=False):
+        """
+        Decode all the complete packets currently held in the buffer.
+        :param try_unterminated: Also try to decode a leftover that isn't terminated by a newline.
+        :return: List of decoded packets (dicts), possibly empty. decode_time is set to the per packet mean of the
+        time the call took.
+        """
+        begin = time.perf_counter()
+        buffer = self._buffer
+        result = []
+        start = 0
+        end = buffer.find(b'\n', self._scanned)
+        while end != -1:
+            if end > start:
+                packet = bytes(buffer[start:end])
+                # Whitespace between packets, left for instance after an unterminated packet was decoded.
+                if not packet.isspace():
+                    result.append(json.loads(packet))
+            start = end + 1
+            end = buffer.find(b'\n', start)
+
+        if start > 0:
+            del buffer[:start]
+        self._scanned = len(buffer)
+
+        # The server terminates every packet with a newline, but in case it didn't we give a leftover that looks
+        # like a full object a single try instead of waiting for a newline that never comes.
+        if try_unterminated and len(buffer) > 0 and buffer.rstrip()[-1:] == b'}':
+            try:
+                result.append(json.loads(bytes(buffer)))
+                del buffer[:]
+                self._scanned = 0
+            except ValueError:
+                pass
+
+        if result:
+            self.decode_time = (time.perf_counter() - begin) / len(result)
+        return result
+
+    def read_packets(self):
+        """
+        Receive once from the socket and return the packets completed by it.
+        :return: List of packets, None when the connection was closed by the server.
+        """
+        data = self._sock.recv(self._recv_size)
+        if not data:
+            return None
+        self.feed(data)
+        # A short read means the server flushed everything it had, only then the leftover may be a full packet.
+        return self.packets(try_unterminated=len(data) < self._recv_size)
+
+    def __iter__(self):
+        while True:
+            packets = self.read_packets()
+            if packets is None:
+                return
+            for packet in packets:
+                yield packet
+
+
+def _legacy_frame(chunks):
+    """
+    The string concatenation framing that was used by connect/connect_parse, kept for the benchmark.
+    :param chunks:
+    :return:
+    """
+    packets = []
+    line = ''
+    for chunk in chunks:
+        line_recv = chunk.decode('utf-8')
+        buffer_flg = 1
+        while buffer_flg == 1:
+            line += line_recv
+            if '}\n{' in line:
+                (line, line_recv) = line.split("\n", 1)
+                buffer_flg = 1
+            else:
+                buffer_flg = 0
+            try:
+                obj_recv = json.loads(line)
+                line = ''
+            except ValueError:
+                break
+            packets.append(obj_recv)
+    return packets
+
+
+def _sample_packets(num_players=15, max_talk_turn=20):
+    """
+    Build DAILY_FINISH like packets with a full day of talk history, used when no recorded packets are given.
+    :param num_players:
+    :param max_talk_turn:
+    :return:
+    """
+    packets = []
+    for day in range(1, 6):
+        talk_history = [{"idx": turn * num_players + agent - 1, "day": day, "turn": turn, "agent": agent,
+                         "text": "REQUEST ANY (VOTE Agent[{0:02d}])".format((agent + turn) % num_players + 1)}
+                        for turn in range(max_talk_turn) for agent in range(1, num_players + 1)]
+        packets.append({"request": "DAILY_FINISH", "gameInfo": {"day": day, "agent": 1}, "gameSetting": None,
+                        "talkHistory": talk_history, "whisperHistory": []})
+    return packets
+
+
+if __name__ == "__main__":
+    # Micro-benchmark of the framing, usage: python -m aiwolfpy.packet_reader [recorded_packets.jsonl]
+    import sys
+
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'rb') as recorded:
+            stream = b''.join(line.rstrip(b'\r\n') + b'\n' for line in recorded if line.strip())
+    else:
+        stream = b''.join((json.dumps(p, separators=(',', ':')) + '\n').encode('utf-8') for p in _sample_packets())
+
+    chunks = [stream[i:i + 8192] for i in range(0, len(stream), 8192)]
+    repeat = 5
+
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        legacy = _legacy_frame(chunks)
+    legacy_time = (time.perf_counter() - begin) / repeat
+
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        reader = PacketReader()
+        framed = []
+        for chunk in chunks:
+            reader.feed(chunk)
+            framed += reader.packets()
+    reader_time = (time.perf_counter() - begin) / repeat
+
+    print("bytes: {0}, chunks: {1}, packets: {2}/{3}".format(len(stream), len(chunks), len(framed), len(legacy)))
+    print("legacy framing: {0:.4f}s, PacketReader: {1:.4f}s".format(legacy_time, reader_time))
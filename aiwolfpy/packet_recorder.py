@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+PacketRecorder
+
+Records the packets a session receives and the responses it sends, with
+their time.monotonic_ns timestamps, to a compact append-only file. The
+records are buffered and written in frames, every frame is compressed on
+its own (zlib or lzma) and written with its length, so a recording that
+was cut by a crash is readable up to its last complete frame, and the
+recordings of several runs can be appended to the same file (a cut frame
+is dropped before appending). A frame is written at least at the end of
+every game. Frames are compressed and written by a writer thread and are
+only started before a packet is received, never while it is answered, so
+the recording doesn't delay the responses or add to their recorded times.
+
+File: MAGIC, version byte, codec byte, then frames of
+<compressed length: uint32><record count: uint32><compressed JSON lines>,
+every line is [timestamp_ns, kind, payload], kind RECEIVED with the packet
+or SENT with the response line.
+"""
+
+from __future__ import print_function, division
+import json
+import lzma
+import os
+import random
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+MAGIC = b"AWPR"
+
+FORMAT_VERSION = 1
+
+CODECS = ("zlib", "lzma")
+
+HEADER = struct.Struct("<4sBB")
+
+FRAME_HEADER = struct.Struct("<II")
+
+RECEIVED = 0
+
+SENT = 1
+
+# Records buffered before a frame is written, whatever the game is at.
+FRAME_RECORDS = 256
+
+
+def seed_random(seed):
+    """
+    Seed the random and numpy.random modules the agents draw from, so a game can be played again with the same
+    choices.
+    :param seed: randomSeed of the game setting, None leaves the modules alone.
+    :return:
+    """
+    if seed is None:
+        return
+    random.seed(seed)
+    np.random.seed(int(seed) % (1 << 32))
+
+
+def _compress(codec, data):
+    return zlib.compress(data, 6) if codec == "zlib" else lzma.compress(data, preset=6)
+
+
+def _decompress(codec, data):
+    return zlib.decompress(data) if codec == "zlib" else lzma.decompress(data)
+
+
+class PacketRecorder(object):
+    """
+    Writes the records of a session, see the module doc for the format.
+    """
+
+    def __init__(self, path, codec="zlib", frame_records=FRAME_RECORDS):
+        """
+        :param path: File to append to, created with the given codec if it doesn't exist.
+        :param codec: zlib or lzma, an existing file keeps its own codec.
+        :param frame_records: Records buffered before a frame is written.
+        """
+        if codec not in CODECS:
+            raise ValueError("Unknown codec: " + str(codec))
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'r+b') as record_file:
+                codec = _read_header(record_file)
+                # A frame cut by a crash would hide every frame appended after it.
+                record_file.truncate(_complete_length(record_file, codec))
+        self.path = path
+        self.codec = codec
+        self.frame_records = frame_records
+        self.records = 0
+        self._lines = []
+        self._writes = []
+        self._writer = ThreadPoolExecutor(max_workers=1)
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, FORMAT_VERSION, CODECS.index(codec)))
+            self._file.flush()
+
+    def _add(self, kind, payload):
+        # The payload is encoded before the time is taken, so the response times don't include the recording.
+        encoded = json.dumps(payload, separators=(',', ':'))
+        self._lines.append("[" + str(time.monotonic_ns()) + "," + str(kind) + "," + encoded + "]")
+        self.records += 1
+
+    def received(self, packet):
+        # A full frame is handed over before the packet is timed, not between the packet and its response.
+        if len(self._lines) >= self.frame_records:
+            self.flush()
+        self._add(RECEIVED, packet)
+        if packet.get('request') == 'FINISH':
+            self.flush()
+
+    def sent(self, response):
+        self._add(SENT, response)
+
+    def _write(self, lines):
+        data = _compress(self.codec, "\n".join(lines).encode('utf-8'))
+        self._file.write(FRAME_HEADER.pack(len(data), len(lines)) + data)
+        self._file.flush()
+
+    def flush(self):
+        """
+        Hand the buffered records to the writer thread as a frame.
+        :return:
+        """
+        # The errors of the finished writes are raised here.
+        while self._writes and self._writes[0].done():
+            self._writes.pop(0).result()
+        if not self._lines:
+            return
+        self._writes.append(self._writer.submit(self._write, self._lines))
+        self._lines = []
+
+    def close(self):
+        """
+        Write the buffered records and wait for the writer thread.
+        :return:
+        """
+        if self._file is not None:
+            self.flush()
+            self._writer.shutdown(wait=True)
+            writes, self._writes = self._writes, []
+            try:
+                for write in writes:
+                    write.result()
+            finally:
+                self._file.close()
+                self._file = None
+
+
+def _read_header(record_file):
+    header = record_file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError("Not a packet recording")
+    magic, version, codec = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("Not a packet recording")
+    if version != FORMAT_VERSION:
+        raise ValueError("Unsupported recording version: " + str(version))
+    return CODECS[codec]
+
+
+def _complete_length(record_file, codec):
+    """
+    :param record_file: File positioned after the header.
+    :param codec:
+    :return: Offset of the end of the last complete frame.
+    """
+    end = record_file.tell()
+    for _ in _read_frames(record_file, codec):
+        end = record_file.tell()
+    return end
+
+
+def _read_frames(record_file, codec):
+    # Stops at the first frame that is cut or doesn't decompress.
+    while True:
+        frame_header = record_file.read(FRAME_HEADER.size)
+        if len(frame_header) < FRAME_HEADER.size:
+            return
+        size, _ = FRAME_HEADER.unpack(frame_header)
+        data = record_file.read(size)
+        if len(data) < size:
+            return
+        try:
+            yield _decompress(codec, data)
+        except (zlib.error, lzma.LZMAError):
+            return
+
+
+def read_records(path):
+    """
+    :param path:
+    :return: Generator of the (timestamp_ns, kind, payload) records of a recording, it ends at the first frame that
+    is cut or damaged.
+    """
+    with open(path, 'rb') as record_file:
+        codec = _read_header(record_file)
+        for data in _read_frames(record_file, codec):
+            for line in data.decode('utf-8').split("\n"):
+                yield tuple(json.loads(line))
+
+
+def read_exchanges(path):
+    """
+    Pair every received packet with the response sent for it.
+    :param path:
+    :return: Generator of (packet, response, seconds), the response is None for the requests without one and
+    seconds is the time from receiving the packet to sending its response.
+    """
+    pending = None
+    for timestamp, kind, payload in read_records(path):
+        if kind == RECEIVED:
+            if pending is not None:
+                yield pending[0], None, 0.0
+            pending = (payload, timestamp)
+        elif pending is not None:
+            yield pending[0], payload, (timestamp - pending[1]) / 1e9
+            pending = None
+    if pending is not None:
+        yield pending[0], None, 0.0
+
+
+if __name__ == "__main__":
+    # Size of a recording per codec, usage: python -m aiwolfpy.packet_recorder recording [...]
+    import sys
+
+    for recording in sys.argv[1:]:
+        records = list(read_records(recording))
+        raw = sum(len(json.dumps(record, separators=(',', ':'))) + 1 for record in records)
+        print("{0}: {1} records, {2} bytes of JSON lines, {3} bytes on disk".format(
+            recording, len(records), raw, os.path.getsize(recording)))
+        for codec in CODECS:
+            copy = recording + "." + codec
+            if os.path.exists(copy):
+                os.remove(copy)
+            begin = time.perf_counter()
+            recorder = PacketRecorder(copy, codec)
+            for _, kind, payload in records:
+                if kind == RECEIVED:
+                    recorder.received(payload)
+                else:
+                    recorder.sent(payload)
+            recorder.close()
+            print("  {0}: {1} bytes, written in {2:.3f}s".format(codec, os.path.getsize(copy),
+                                                                  time.perf_counter() - begin))
+            os.remove(copy)
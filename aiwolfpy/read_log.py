@@ -1,112 +1,77 @@
 import csv
 import pandas as pd
 
-def read_log(log_path):
-    
+# Columns of the rows of a log, in the order iter_log yields them.
+LOG_COLUMNS = ("day", "type", "idx", "turn", "agent", "text")
+
+
+def _agent_string(agent):
+    return "{0:02d}".format(int(agent))
+
+
+def iter_log(log_path):
+    """
+    Stream the rows of a log file, one (day, type, idx, turn, agent, text) tuple at a time.
+    These are the rows of the DataFrame read_log returns, without holding the whole log in memory.
+    :param log_path:
+    :return:
+    """
     with open(log_path, newline='') as csvfile:
-        log_reader = csv.reader(csvfile, delimiter=',')
-        agent_ = []
-        day_ = []
-        type_ = []
-        idx_ = []
-        turn_ = []
-        text_ = []
+        for row in log_rows(csv.reader(csvfile, delimiter=',')):
+            yield row
+
 
-        # for medium result
-        medium = 0
-        for row in log_reader:
-            if row[1] == "status" and int(row[0]) == 0:
-                agent_.append(int(row[2])), 
-                day_.append(int(row[0])), 
-                type_.append('initialize'), 
-                idx_.append(int(row[2])), 
-                turn_.append(0), 
-                text_.append('COMINGOUT Agent[' + "{0:02d}".format(int(row[2])) + '] ' + row[3])
+def log_rows(log_reader):
+    """
+    Convert the split lines of a log (lists of fields, as csv.reader gives them) to the rows of read_log.
+    :param log_reader:
+    :return:
+    """
+    # for medium result
+    medium = 0
+    for row in log_reader:
+        row_type = row[1]
+        if row_type == "status":
+            if int(row[0]) == 0:
+                yield (int(row[0]), 'initialize', int(row[2]), 0, int(row[2]),
+                       'COMINGOUT Agent[' + _agent_string(row[2]) + '] ' + row[3])
                 # medium
                 if row[3] == "MEDIUM":
                     medium = row[2]
-            elif row[1] == "status":
-                pass
-            elif row[1] == "talk":
-                agent_.append(int(row[4])), 
-                day_.append(int(row[0])), 
-                type_.append('talk'), 
-                idx_.append(int(row[2])), 
-                turn_.append(int(row[3])), 
-                text_.append(row[5])
-            elif row[1] == "whisper":
-                agent_.append(int(row[4])), 
-                day_.append(int(row[0])), 
-                type_.append('whisper'), 
-                idx_.append(int(row[2])), 
-                turn_.append(int(row[3])), 
-                text_.append(row[5])
-            elif row[1] == "vote":
-                agent_.append(int(row[3])), 
-                day_.append(int(row[0])), 
-                type_.append('vote'), 
-                idx_.append(int(row[2])), 
-                turn_.append(0), 
-                text_.append('VOTE Agent[' + "{0:02d}".format(int(row[3])) + ']')
-            elif row[1] == "attackVote":
-                agent_.append(int(row[3])), 
-                day_.append(int(row[0])), 
-                type_.append('attack_vote'), 
-                idx_.append(int(row[2])), 
-                turn_.append(0), 
-                text_.append('ATTACK Agent[' + "{0:02d}".format(int(row[3])) + ']')
-            elif row[1] == "divine":
-                agent_.append(int(row[3])), 
-                day_.append(int(row[0])), 
-                type_.append('divine'), 
-                idx_.append(int(row[2])), 
-                turn_.append(0), 
-                text_.append('DIVINED Agent[' + "{0:02d}".format(int(row[3])) + '] ' + row[4])
-            elif row[1] == "execute":
-                # for all
-                agent_.append(int(row[2])), 
-                day_.append(int(row[0])), 
-                type_.append('execute'), 
-                idx_.append(0), 
-                turn_.append(0), 
-                text_.append('Over')
-                # for medium
-                res = 'HUMAN'
-                if row[3] == 'WEREWOLF':
-                    res = 'WEREWOLF'
-                agent_.append(int(row[2])), 
-                day_.append(int(row[0])), 
-                type_.append('identify'), 
-                idx_.append(medium), 
-                turn_.append(0), 
-                text_.append('IDENTIFIED Agent[' + "{0:02d}".format(int(row[2])) + '] ' + res)
-            elif row[1] == "guard":
-                agent_.append(int(row[3])), 
-                day_.append(int(row[0])), 
-                type_.append('guard'), 
-                idx_.append(int(row[2])), 
-                turn_.append(0), 
-                text_.append('GUARDED Agent[' + "{0:02d}".format(int(row[3])) + ']')
-            elif row[1] == "attack":
-                agent_.append(int(row[2])), 
-                day_.append(int(row[0])), 
-                type_.append('attack'), 
-                idx_.append(0), 
-                turn_.append(0), 
-                text_.append('ATTACK Agent[' + "{0:02d}".format(int(row[2])) + ']')
-                if row[3] == 'true':
-                    # dead
-                    agent_.append(int(row[2])), 
-                    day_.append(int(row[0])), 
-                    type_.append('dead'), 
-                    idx_.append(0), 
-                    turn_.append(0), 
-                    text_.append('Over')
-            elif row[1] == "result":
-                pass
-            else:
-                pass
+        elif row_type == "talk":
+            yield (int(row[0]), 'talk', int(row[2]), int(row[3]), int(row[4]), row[5])
+        elif row_type == "whisper":
+            yield (int(row[0]), 'whisper', int(row[2]), int(row[3]), int(row[4]), row[5])
+        elif row_type == "vote":
+            yield (int(row[0]), 'vote', int(row[2]), 0, int(row[3]), 'VOTE Agent[' + _agent_string(row[3]) + ']')
+        elif row_type == "attackVote":
+            yield (int(row[0]), 'attack_vote', int(row[2]), 0, int(row[3]),
+                   'ATTACK Agent[' + _agent_string(row[3]) + ']')
+        elif row_type == "divine":
+            yield (int(row[0]), 'divine', int(row[2]), 0, int(row[3]),
+                   'DIVINED Agent[' + _agent_string(row[3]) + '] ' + row[4])
+        elif row_type == "execute":
+            # for all
+            yield (int(row[0]), 'execute', 0, 0, int(row[2]), 'Over')
+            # for medium
+            res = 'HUMAN'
+            if row[3] == 'WEREWOLF':
+                res = 'WEREWOLF'
+            yield (int(row[0]), 'identify', medium, 0, int(row[2]),
+                   'IDENTIFIED Agent[' + _agent_string(row[2]) + '] ' + res)
+        elif row_type == "guard":
+            yield (int(row[0]), 'guard', int(row[2]), 0, int(row[3]), 'GUARDED Agent[' + _agent_string(row[3]) + ']')
+        elif row_type == "attack":
+            yield (int(row[0]), 'attack', 0, 0, int(row[2]), 'ATTACK Agent[' + _agent_string(row[2]) + ']')
+            if row[3] == 'true':
+                # dead
+                yield (int(row[0]), 'dead', 0, 0, int(row[2]), 'Over')
 
 
-    return pd.DataFrame({"day":day_, "type":type_, "idx":idx_, "turn":turn_, "agent":agent_, "text":text_})
-    
\ No newline at end of file
+def read_log(log_path):
+    columns = {name: [] for name in LOG_COLUMNS}
+    appends = [columns[name].append for name in LOG_COLUMNS]
+    for row in iter_log(log_path):
+        for append, value in zip(appends, row):
+            append(value)
+    return pd.DataFrame(columns)
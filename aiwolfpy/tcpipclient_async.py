@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+TcpIpClient_async
+
+Hosts several seats in one process. Every seat has its own connection and its own ParsedSession,
+all connections are served by one asyncio event loop and the agent calls run on a small thread pool
+so a slow talk() of one seat doesn't stall the other seats.
+"""
+
+from __future__ import print_function, division
+import argparse
+import asyncio
+import errno
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from .latency import LatencyRecorder
+from .packet_reader import PacketReader
+from .packet_recorder import PacketRecorder
+from .tcpipclient_parsed import ParsedSession
+
+
+async def _run_seat(session, host, port, executor, recv_size=8192):
+    """
+    Serve a single seat until the server closes its connection.
+    :param session: ParsedSession of the seat.
+    :param host:
+    :param port:
+    :param executor: Executor the requests of the seat are handled on.
+    :param recv_size: Number of bytes read from the connection each time.
+    :return:
+    """
+    loop = asyncio.get_running_loop()
+    stream_reader, writer = await asyncio.open_connection(host, port)
+    reader = PacketReader()
+    try:
+        while True:
+            data = await stream_reader.read(recv_size)
+            if not data:
+                break
+            reader.feed(data)
+            # Requests of one seat are handled in order, only different seats run concurrently.
+            for obj_recv in reader.packets(try_unterminated=len(data) < recv_size):
+                latency = session.latency
+                if latency is not None:
+                    latency.add("decode", reader.decode_time)
+                response = await loop.run_in_executor(executor, session.handle, obj_recv)
+                if response is not None:
+                    sent = time.perf_counter()
+                    writer.write((response + '\n').encode('utf-8'))
+                    await writer.drain()
+                    if latency is not None:
+                        latency.add("send", time.perf_counter() - sent)
+                        latency.finish()
+    except ConnectionResetError:
+        # expected error, connection reset by server
+        pass
+    except OSError as e:
+        if e.errno != errno.ECONNRESET:
+            raise
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+
+async def connect_parse_async(agents, host='127.0.0.1', port=10000, roles=None, max_workers=4, use_dataframe=False,
+                              measure=False, trace_path=None, output=print, record_path=None, codec='zlib'):
+    """
+    Connect every agent as a separate seat and serve all of them until the games are over.
+    :param agents: List of agents, each one gets its own connection.
+    :param host:
+    :param port:
+    :param roles: Role requested by each agent, 'none' when not given.
+    :param max_workers: Number of threads the agent calls are run on.
+    :param use_dataframe: Give the agents pandas DataFrames instead of GameDiff objects.
+    :param measure: Time the requests of every seat, see LatencyRecorder.
+    :param trace_path: Trace file of the timings, "{seat}" in it is replaced by the seat number. Implies measure.
+    :param output: Function the latency summaries are given to.
+    :param record_path: Recording of the packets and responses of every seat, "{seat}" in it is replaced by the
+    seat number (otherwise the number is appended).
+    :param codec: Compression of new recordings, zlib or lzma.
+    :return: Dict of the seats that failed to the exception that stopped them, every failure is also given to
+    output with its traceback. A failed seat doesn't stop the other seats.
+    """
+    if roles is None:
+        roles = ['none'] * len(agents)
+    sessions = []
+    for seat, (agent, role) in enumerate(zip(agents, roles), 1):
+        latency = None
+        if measure or trace_path:
+            seat_trace = trace_path.replace("{seat}", str(seat)) if trace_path else None
+            latency = LatencyRecorder(agent.getName(), seat_trace, output)
+        recorder = None
+        if record_path:
+            seat_record = record_path.replace("{seat}", str(seat)) if "{seat}" in record_path else \
+                record_path + "." + str(seat)
+            recorder = PacketRecorder(seat_record, codec)
+        sessions.append(ParsedSession(agent, role, use_dataframe, latency, recorder, seed=recorder is not None))
+    failures = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = await asyncio.gather(*[_run_seat(session, host, port, executor) for session in sessions],
+                                           return_exceptions=True)
+        for seat, (agent, result) in enumerate(zip(agents, results), 1):
+            if isinstance(result, BaseException):
+                failures[seat] = result
+                output("Seat {0} ({1}) failed:\n{2}".format(seat, agent.getName(), "".join(
+                    traceback.format_exception(type(result), result, result.__traceback__))))
+    finally:
+        for session in sessions:
+            if session.recorder is not None:
+                session.recorder.close()
+    return failures
+
+
+def run_agents(agents, host='127.0.0.1', port=10000, roles=None, max_workers=4, use_dataframe=False,
+               measure=False, trace_path=None, output=print, record_path=None, codec='zlib'):
+    """
+    Blocking version of connect_parse_async.
+    """
+    return asyncio.run(connect_parse_async(agents, host, port, roles, max_workers, use_dataframe, measure, trace_path,
+                                    output, record_path, codec))
+
+
+def parse_args():
+    # parse Args
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('-p', type=int, action='store', dest='port', default=10000)
+    parser.add_argument('-h', type=str, action='store', dest='hostname', default="127.0.0.1")
+    parser.add_argument('-n', type=int, action='store', dest='seats', default=5)
+    parser.add_argument('-r', type=str, action='store', dest='roles', default='',
+                        help="Comma separated roles, one per seat.")
+    parser.add_argument('-w', type=int, action='store', dest='workers', default=4)
+    parser.add_argument('-q', action='store_true', dest='quiet',
+                        help="Don't print, write the prints of the agents to the file given with -o.")
+    parser.add_argument('-o', type=str, action='store', dest='console_file', default=None)
+    parser.add_argument('-l', type=str, action='store', dest='log_level', default='INFO',
+                        help="Level of the log files of the agents: DEBUG, INFO, WARNING, ERROR or OFF.")
+    parser.add_argument('-m', action='store_true', dest='measure',
+                        help="Time every request, the summaries are printed at the end of each game and on SIGUSR1.")
+    parser.add_argument('-T', type=str, action='store', dest='trace', default=None,
+                        help="Trace file of the timings, {seat} and {game} are replaced. Implies -m.")
+    parser.add_argument('-s', action='store_true', dest='speculate',
+                        help="Compute the likely next talk/vote/guard answers between the requests.")
+    parser.add_argument('-R', type=str, action='store', dest='record', default=None,
+                        help="Recording of the packets and responses of every seat, {seat} is replaced.")
+    parser.add_argument('-z', type=str, action='store', dest='codec', default='zlib', choices=('zlib', 'lzma'),
+                        help="Compression of new recordings.")
+    return parser.parse_args()
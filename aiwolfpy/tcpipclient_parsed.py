@@ -6,182 +6,220 @@ TcpIpClient_parsed
 Date:2017/06/18
 """
 
-from __future__ import print_function, division 
+from __future__ import print_function, division
 import argparse
 import socket
 from socket import error as SocketError
 import errno
 import json
+import time
+from .packet_reader import PacketReader
+from .latency import LatencyRecorder, install_signal_handler
+from .packet_recorder import PacketRecorder, seed_random
 from .gameinfoparser import GameInfoParser
 
-def connect_parse(agent):
+BASE_INFO_KEYS = ["day", "remainTalkMap", "remainWhisperMap", "statusMap"]
+
+
+def _target(agent_idx):
+    return json.dumps({'agentIdx': int(agent_idx)}, separators=(',', ':'))
+
+
+class ParsedSession(object):
+    """
+    Protocol state of a single connection to the server: the agent it drives, the GameInfoParser
+    that builds its diffs and the base_info it is given. Used by connect_parse and by every other
+    client that needs to answer the server's requests the same way.
+    The agent receives its diffs as a GameDiff, use_dataframe gives it pandas DataFrames instead.
+    With a LatencyRecorder the diff, update and decision phases of every request are timed, the client
+    adds the decode and send phases and finishes requests that have a response once it was sent.
+    With a PacketRecorder every packet and response is recorded. With seed the random modules are seeded from
+    the randomSeed of every game, so a recorded game can be replayed with the same choices (see replay_recording.py).
+    """
+
+    def __init__(self, agent, role='none', use_dataframe=False, latency=None, recorder=None, seed=False):
+        self.agent = agent
+        self.role = role
+        self.use_dataframe = use_dataframe
+        self.latency = latency
+        self.recorder = recorder
+        self.seed = seed
+        # parser
+        self.parser = GameInfoParser()
+        # base_info
+        self.base_info = dict()
+
+    def _update(self, game_info, talk_history, whisper_history, request):
+        # update
+        for k in BASE_INFO_KEYS:
+            if k in game_info.keys():
+                self.base_info[k] = game_info[k]
+        if self.latency is None:
+            self.parser.update(game_info, talk_history, whisper_history, request)
+            self.agent.update(self.base_info, self._diff(), request)
+            return
+
+        begin = time.perf_counter()
+        self.parser.update(game_info, talk_history, whisper_history, request)
+        diff = self._diff()
+        updated = time.perf_counter()
+        self.agent.update(self.base_info, diff, request)
+        self.latency.add("diff", updated - begin)
+        self.latency.add("update", time.perf_counter() - updated)
+
+    def _diff(self):
+        if self.use_dataframe:
+            return self.parser.get_gamedf_diff()
+        return self.parser.get_game_diff()
+
+    def handle(self, obj_recv):
+        """
+        Run the request held in a packet received from the server.
+        :param obj_recv: Decoded packet.
+        :return: The line that has to be sent back (without the newline), None if the request has no response.
+        """
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.received(obj_recv)
+        latency = self.latency
+        if latency is None:
+            response = self._handle(obj_recv)
+            if recorder is not None and response is not None:
+                recorder.sent(response)
+            return response
+
+        request = obj_recv['request']
+        latency.start(request, (obj_recv['gameInfo'] or {}).get('day'))
+        begin = time.perf_counter()
+        response = self._handle(obj_recv)
+        latency.add_handled(time.perf_counter() - begin)
+        if recorder is not None and response is not None:
+            recorder.sent(response)
+        if response is None:
+            latency.finish()
+        if request == 'FINISH':
+            latency.close_trace()
+            latency.dump()
+        return response
+
+    def _handle(self, obj_recv):
+        # make game_info
+        game_info = obj_recv['gameInfo']
+        if game_info is None:
+            game_info = dict()
+        # talk_history and whisper_history
+        talk_history = obj_recv['talkHistory']
+        if talk_history is None:
+            talk_history = []
+        whisper_history = obj_recv['whisperHistory']
+        if whisper_history is None:
+            whisper_history = []
+        # request must exist
+        request = obj_recv['request']
+        agent = self.agent
+
+        # run requested
+        if request == 'NAME':
+            return agent.getName()
+        elif request == 'ROLE':
+            return self.role
+        elif request == 'INITIALIZE':
+            # game_setting
+            game_setting = obj_recv['gameSetting']
+            # base_info
+            self.base_info = dict()
+            self.base_info['agentIdx'] = game_info['agent']
+            self.base_info['myRole'] = game_info["roleMap"][str(game_info['agent'])]
+            self.base_info["roleMap"] = game_info["roleMap"]
+            for k in BASE_INFO_KEYS:
+                if k in game_info.keys():
+                    self.base_info[k] = game_info[k]
+            if self.latency is not None:
+                self.latency.new_game(game_setting.get('timeLimit'))
+            if self.seed:
+                seed_random(game_setting.get('randomSeed'))
+            # parser
+            self.parser.initialize(game_info, game_setting)
+            agent.initialize(self.base_info, self._diff(), game_setting)
+        elif request == 'DAILY_INITIALIZE':
+            self._update(game_info, talk_history, whisper_history, request)
+            # call
+            agent.dayStart()
+        elif request == 'DAILY_FINISH':
+            self._update(game_info, talk_history, whisper_history, request)
+        elif request == 'FINISH':
+            self._update(game_info, talk_history, whisper_history, request)
+            # call
+            agent.finish()
+        elif request == 'VOTE':
+            self._update(game_info, talk_history, whisper_history, request)
+            return _target(agent.vote())
+        elif request == 'ATTACK':
+            self._update(game_info, talk_history, whisper_history, request)
+            return _target(agent.attack())
+        elif request == 'GUARD':
+            self._update(game_info, talk_history, whisper_history, request)
+            return _target(agent.guard())
+        elif request == 'DIVINE':
+            self._update(game_info, talk_history, whisper_history, request)
+            return _target(agent.divine())
+        elif request == 'TALK':
+            self._update(game_info, talk_history, whisper_history, request)
+            return agent.talk()
+        elif request == 'WHISPER':
+            self._update(game_info, talk_history, whisper_history, request)
+            return agent.whisper()
+        return None
+
+
+def connect_parse(agent, use_dataframe=False):
     # parse Args
     parser = argparse.ArgumentParser(add_help=False)
     parser.add_argument('-p', type=int, action='store', dest='port', default=10000)
     parser.add_argument('-h', type=str, action='store', dest='hostname', default="127.0.0.1")
     parser.add_argument('-r', type=str, action='store', dest='role', default='none')
+    parser.add_argument('-m', action='store_true', dest='measure',
+                        help="Time every request, the summary is printed at the end of each game and on SIGUSR1.")
+    parser.add_argument('-T', type=str, action='store', dest='trace', default=None,
+                        help="Trace file of the timings of each game, implies -m.")
+    parser.add_argument('-R', type=str, action='store', dest='record', default=None,
+                        help="Append the received packets and the responses to this recording.")
+    parser.add_argument('-z', type=str, action='store', dest='codec', default='zlib', choices=('zlib', 'lzma'),
+                        help="Compression of a new recording.")
     input_args = parser.parse_args()
     aiwolf_host = input_args.hostname
     aiwolf_port = input_args.port
     aiwolf_role = input_args.role
+    latency = None
+    if input_args.measure or input_args.trace:
+        latency = LatencyRecorder(agent.getName(), input_args.trace)
+        install_signal_handler()
+    recorder = None
+    if input_args.record is not None:
+        recorder = PacketRecorder(input_args.record, input_args.codec)
     # socket
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     # connect
     sock.connect((aiwolf_host, aiwolf_port))
-    # parser
-    parser = GameInfoParser()
-    # base_info
-    line = ''
-    while True:
-        try:
-            # l01:recieve 8KB
-            line_recv = sock.recv(8192).decode('utf-8')
-            if line_recv == '':
-                break
-            buffer_flg = 1
-            while buffer_flg == 1:
-                # l02:there's more json
-                line += line_recv
-                if '}\n{' in line:
-                    # 2 jsons recieved, goto l02 after l03
-                    (line, line_recv) = line.split("\n", 1)
-                    buffer_flg = 1
-                else:
-                    # at most 1 json recieved, goto l01 after l03
-                    buffer_flg = 0
-                # parse json
-                try:
-                    # is this valid json?
-                    obj_recv = json.loads(line)
-                    # ok, goto l03
-                    line = ''
-                except ValueError:
-                    # if not, there's more to read, goto l01 now
-                    break
-                # l03 make game_info
-                # print(obj_recv)
-                game_info = obj_recv['gameInfo']
-                if game_info is None:
-                    game_info = dict()
-                # talk_history and whisper_history
-                talk_history = obj_recv['talkHistory']
-                if talk_history is None:
-                    talk_history = []
-                whisper_history = obj_recv['whisperHistory']
-                if whisper_history is None:
-                    whisper_history = []
-                # request must exist
-                # print(obj_recv['request'])
-                request = obj_recv['request']
-                
-                # run requested
-                if request == 'NAME':
-                    sock.send((agent.getName() + '\n').encode('utf-8'))
-                elif request == 'ROLE':
-                    sock.send((aiwolf_role+'\n').encode('utf-8'))
-                elif request == 'INITIALIZE':
-                    # game_setting
-                    game_setting = obj_recv['gameSetting']
-                    # base_info
-                    base_info = dict()
-                    base_info['agentIdx'] = game_info['agent']
-                    base_info['myRole'] =  game_info["roleMap"][str(game_info['agent'])]
-                    base_info["roleMap"] = game_info["roleMap"]
-                    # update
-                    for k in ["day", "remainTalkMap", "remainWhisperMap", "statusMap"]:
-                        if k in game_info.keys():
-                            base_info[k] =  game_info[k]
-                    # parser
-                    parser.initialize(game_info, game_setting)
-                    agent.initialize(base_info, parser.get_gamedf_diff(), game_setting)
-                elif request == 'DAILY_INITIALIZE':
-                    # update
-                    for k in ["day", "remainTalkMap", "remainWhisperMap", "statusMap"]:
-                        if k in game_info.keys():
-                            base_info[k] =  game_info[k]
-                    parser.update(game_info, talk_history, whisper_history, request)
-                    agent.update(base_info, parser.get_gamedf_diff(), request)
-                    # call
-                    agent.dayStart()
-                elif request == 'DAILY_FINISH':
-                    # update
-                    for k in ["day", "remainTalkMap", "remainWhisperMap", "statusMap"]:
-                        if k in game_info.keys():
-                            base_info[k] =  game_info[k]
-                    parser.update(game_info, talk_history, whisper_history, request)
-                    agent.update(base_info, parser.get_gamedf_diff(), request)
-                elif request == 'FINISH':
-                    # update
-                    for k in ["day", "remainTalkMap", "remainWhisperMap", "statusMap"]:
-                        if k in game_info.keys():
-                            base_info[k] =  game_info[k]
-                    parser.update(game_info, talk_history, whisper_history, request)
-                    agent.update(base_info, parser.get_gamedf_diff(), request)
-                    # call
-                    agent.finish()
-                elif request == 'VOTE':
-                    # update
-                    for k in ["day", "remainTalkMap", "remainWhisperMap", "statusMap"]:
-                        if k in game_info.keys():
-                            base_info[k] =  game_info[k]
-                    #print("INSIDE tcpip-VOTE")
-                    parser.update(game_info, talk_history, whisper_history, request)
-                    agent.update(base_info, parser.get_gamedf_diff(), request)
-                    # call
-                    sock.send((json.dumps({'agentIdx':int(agent.vote())}, separators=(',', ':')) + '\n').encode('utf-8'))
-                elif request == 'ATTACK':
-                    # update
-                    for k in ["day", "remainTalkMap", "remainWhisperMap", "statusMap"]:
-                        if k in game_info.keys():
-                            base_info[k] =  game_info[k]
-                    parser.update(game_info, talk_history, whisper_history, request)
-                    agent.update(base_info, parser.get_gamedf_diff(), request)
-                    # call
-                    sock.send((json.dumps({'agentIdx':int(agent.attack())}, separators=(',', ':')) + '\n').encode('utf-8'))
-                elif request == 'GUARD':
-                    # update
-                    for k in ["day", "remainTalkMap", "remainWhisperMap", "statusMap"]:
-                        if k in game_info.keys():
-                            base_info[k] =  game_info[k]
-                    parser.update(game_info, talk_history, whisper_history, request)
-                    agent.update(base_info, parser.get_gamedf_diff(), request)
-                    # call
-                    sock.send((json.dumps({'agentIdx':int(agent.guard())}, separators=(',', ':')) + '\n').encode('utf-8'))
-                elif request == 'DIVINE':
-                    # update
-                    for k in ["day", "remainTalkMap", "remainWhisperMap", "statusMap"]:
-                        if k in game_info.keys():
-                            base_info[k] =  game_info[k]
-                    #print("INSIDE tcpip-DIVINE")
-                    parser.update(game_info, talk_history, whisper_history, request)
-                    agent.update(base_info, parser.get_gamedf_diff(), request)
-                    # call
-                    sock.send((json.dumps({'agentIdx':int(agent.divine())}, separators=(',', ':')) + '\n').encode('utf-8'))
-                elif request == 'TALK':
-                    # update
-                    for k in ["day", "remainTalkMap", "remainWhisperMap", "statusMap"]:
-                        if k in game_info.keys():
-                            base_info[k] =  game_info[k]
-                    #print("INSIDE tcpip-TALK")
-                    parser.update(game_info, talk_history, whisper_history, request)
-                    agent.update(base_info, parser.get_gamedf_diff(), request)
-                    # call
-                    sock.send((agent.talk() + '\n').encode('utf-8'))
-                elif request == 'WHISPER':
-                    # update
-                    for k in ["day", "remainTalkMap", "remainWhisperMap", "statusMap"]:
-                        if k in game_info.keys():
-                            base_info[k] =  game_info[k]
-                    parser.update(game_info, talk_history, whisper_history, request)
-                    agent.update(base_info, parser.get_gamedf_diff(), request)
-                    # call
-                    sock.send((agent.whisper() + '\n').encode('utf-8'))
-        except SocketError as e:
-            if e.errno != errno.ECONNRESET:
-                raise
-            else:
-                # expected error, connection reset by server
-                pass
-            # close connection
-            sock.close()
-            break
+    session = ParsedSession(agent, aiwolf_role, use_dataframe, latency, recorder, seed=recorder is not None)
+    reader = PacketReader(sock)
+    try:
+        for obj_recv in reader:
+            if latency is not None:
+                latency.add("decode", reader.decode_time)
+            response = session.handle(obj_recv)
+            if response is not None:
+                sent = time.perf_counter()
+                sock.send((response + '\n').encode('utf-8'))
+                if latency is not None:
+                    latency.add("send", time.perf_counter() - sent)
+                    latency.finish()
+    except SocketError as e:
+        if e.errno != errno.ECONNRESET:
+            raise
+        # expected error, connection reset by server
+    finally:
+        if recorder is not None:
+            recorder.close()
+    # close connection
+    sock.close()
@@ -0,0 +1,31 @@
+from aiwolfpy.tcpipclient_async import run_agents, parse_args
+from agents.agent_container import AgentContainer
+from aiwolfpy.latency import install_signal_handler
+from agents.logger import Logger, configure_console, level_from_name, console, INFO, ERROR
+
+"""
+Hosts several seats of our agent in a single process, usage:
+python multi_agent.py -h 127.0.0.1 -p 10000 -n 15 [-r SEER,WEREWOLF,...] [-w 4] [-q [-o console.txt]] [-l DEBUG]
+    [-m] [-T trace_{seat}_{game}.csv] [-s] [-R seat_{seat}.rec [-z lzma]]
+"""
+
+
+if __name__ == "__main__":
+    input_args = parse_args()
+    Logger.default_level = level_from_name(input_args.log_level)
+    configure_console(silent=input_args.quiet, file_name=input_args.console_file)
+    roles = input_args.roles.split(",") if input_args.roles else None
+    if roles is not None:
+        roles += ['none'] * (input_args.seats - len(roles))
+    agents = [AgentContainer(name="ROLTK{0:02d}".format(seat), speculate=input_args.speculate) for seat in range(1, input_args.seats + 1)]
+    if input_args.measure or input_args.trace:
+        install_signal_handler()
+    failures = run_agents(agents, input_args.hostname, input_args.port, roles, input_args.workers,
+                          measure=input_args.measure, trace_path=input_args.trace,
+                          output=lambda summary: console(summary, level=INFO), record_path=input_args.record,
+                          codec=input_args.codec)
+    if failures:
+        console("Failed seats: %s", sorted(failures), level=ERROR)
+    for agent in agents:
+        agent.close()
+    Logger.flush()
@@ -0,0 +1,211 @@
+import argparse
+import time
+import tracemalloc
+from aiwolfpy.latency import LatencyHistogram, LatencyRecorder, PERCENTILES
+from aiwolfpy.log_cache import log_files
+from aiwolfpy.log_replay import LogReplay, log_roles, script_packets, replay_packets
+from aiwolfpy.mock_server import read_script
+from aiwolfpy.packet_recorder import read_exchanges
+from aiwolfpy.read_log import iter_log
+from aiwolfpy.tcpipclient_parsed import ParsedSession
+from agents.agent_container import AgentContainer
+from agents.logger import Logger, configure_console, level_from_name
+
+"""
+Replays logged games (or packet scripts recorded from the server) into our agent without a server and reports
+the time and memory every request costs, every seat of every game by default, usage:
+python replay_bench.py logs/ [game.log script.jsonl seat.rec ...] [-s 1,3] [-r 3] [-a] [-v] [-l OFF]
+"""
+
+
+# Files replay_sources takes from directories.
+SOURCE_EXTENSIONS = (".log", ".jsonl", ".rec")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('paths', nargs='+',
+                        help="Logs, directories of logs, .jsonl packet scripts (see mock_server.read_script) and "
+                             ".rec recordings (see packet_recorder).")
+    parser.add_argument('-s', type=str, action='store', dest='seats', default=None,
+                        help="Comma separated seats to replay, all the seats of every game by default.")
+    parser.add_argument('-r', type=int, action='store', dest='repeat', default=1,
+                        help="Replay every seat this many times.")
+    parser.add_argument('-a', action='store_true', dest='allocations',
+                        help="Trace the memory allocated by every request, slows the agent down.")
+    parser.add_argument('-x', action='store_true', dest='speculate', help="Let the agents speculate.")
+    parser.add_argument('-v', action='store_true', dest='verbose', help="Print a line per replayed game.")
+    parser.add_argument('-l', type=str, action='store', dest='log_level', default='OFF',
+                        help="Level of the log files of the agents: DEBUG, INFO, WARNING, ERROR or OFF.")
+    return parser.parse_args()
+
+
+def _discard(summary):
+    pass
+
+
+class AllocationRecorder(object):
+    """
+    Memory allocated by the requests of the replays, per request type: the peak of the memory traced while the
+    request ran above the memory traced when it started, and the memory it left allocated.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.peak_total = {}
+        self.peak_max = {}
+        self.retained = {}
+
+    def record(self, request, peak, retained):
+        self.counts[request] = self.counts.get(request, 0) + 1
+        self.peak_total[request] = self.peak_total.get(request, 0) + peak
+        self.peak_max[request] = max(self.peak_max.get(request, 0), peak)
+        self.retained[request] = self.retained.get(request, 0) + retained
+
+    def summary(self):
+        lines = ["Allocations per request, in KB",
+                 "{0:<18}{1:>8}{2:>12}{3:>12}{4:>14}".format("request", "count", "mean peak", "max peak",
+                                                             "retained")]
+        for request in sorted(self.counts):
+            count = self.counts[request]
+            lines.append("{0:<18}{1:>8}{2:>12.1f}{3:>12.1f}{4:>14.1f}".format(
+                request, count, self.peak_total[request] / count / 1024.0, self.peak_max[request] / 1024.0,
+                self.retained[request] / 1024.0))
+        return "\n".join(lines)
+
+
+class AllocationSession(object):
+    """
+    Session that traces the allocations of every request handled by the session it wraps.
+    """
+
+    def __init__(self, session, recorder):
+        self.session = session
+        self.recorder = recorder
+
+    def handle(self, packet):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        response = self.session.handle(packet)
+        current, peak = tracemalloc.get_traced_memory()
+        self.recorder.record(packet['request'], peak - before, current - before)
+        return response
+
+
+def replay_sources(paths):
+    """
+    :param paths: Logs, directories, packet scripts and recordings, directories are searched recursively for all
+    three.
+    :return: List of (path, seat to role or None, kind) of every game, kind is 'log', 'script' or 'recording'.
+    """
+    sources = []
+    for path in log_files(paths, SOURCE_EXTENSIONS):
+        if path.endswith(".jsonl"):
+            sources.append((path, None, 'script'))
+        elif path.endswith(".rec"):
+            sources.append((path, None, 'recording'))
+        else:
+            sources.append((path, log_roles(iter_log(path)), 'log'))
+    if not sources:
+        raise ValueError("No logs, packet scripts or recordings in: " + ", ".join(paths))
+    return sources
+
+
+class ReplayReport(object):
+    """
+    Results of a benchmark run: the request timings of all the replays, the wall time of every replayed game
+    and when traced the allocations.
+    """
+
+    def __init__(self, allocations=None):
+        self.latency = LatencyRecorder("replay", output=_discard)
+        self.wall = LatencyHistogram()
+        self.allocations = allocations
+        self.replays = 0
+        self.requests = 0
+        self.elapsed = 0.0
+
+    def add(self, recorder, wall, requests):
+        self.latency.merge(recorder)
+        self.wall.record(wall)
+        self.replays += 1
+        self.requests += requests
+        self.elapsed += wall
+
+    def summary(self):
+        lines = ["{0} replays, {1} requests in {2:.3f}s ({3:.1f} replays/s)".format(
+                     self.replays, self.requests, self.elapsed, self.replays / self.elapsed if self.elapsed else 0),
+                 "Wall time per replayed game (ms): mean {0:.3f}, ".format(self.wall.mean() / 1000.0) +
+                 ", ".join("p{0} {1:.3f}".format(p, self.wall.percentile(p) / 1000.0) for p in PERCENTILES) +
+                 ", max {0:.3f}".format(self.wall.max / 1000.0),
+                 self.latency.summary()]
+        if self.allocations is not None:
+            lines.append(self.allocations.summary())
+        return "\n".join(lines)
+
+
+def run_benchmark(paths, seats=None, repeat=1, allocations=False, speculate=False, output=print, verbose=False):
+    """
+    Replay every chosen seat of every game. The agents draw from the generator of their GameContext, seeded with the
+    randomSeed of the game and the seat, so a benchmark can be repeated.
+    :param paths: Logs, directories, packet scripts and recordings.
+    :param seats: Seats to replay, None for all the seats of every game.
+    :param repeat: Number of replays of every seat.
+    :param allocations: Trace the allocations of the requests.
+    :param speculate: Let the agents speculate.
+    :param output: Function the report lines are given to.
+    :param verbose: Output a line per replay.
+    :return: The ReplayReport.
+    """
+    report = ReplayReport(AllocationRecorder() if allocations else None)
+    agents = {}
+    if allocations:
+        tracemalloc.start()
+    try:
+        for path, roles, kind in replay_sources(paths):
+            script = None
+            if kind == 'script':
+                script = read_script(path)
+            elif kind == 'recording':
+                # A recording holds the packets of a single seat.
+                script = [(1, packet) for packet, _, _ in read_exchanges(path)]
+            game_seats = sorted(roles) if roles is not None else sorted(set(seat for seat, _ in script))
+            rows = list(iter_log(path)) if kind == 'log' else None
+            for seat in game_seats:
+                if seats is not None and seat not in seats:
+                    continue
+                if seat not in agents:
+                    agents[seat] = AgentContainer(name="ROLTK{0:02d}".format(seat), speculate=speculate)
+                for _ in range(repeat):
+                    recorder = LatencyRecorder(seat, output=_discard)
+                    session = ParsedSession(agents[seat], latency=recorder)
+                    if allocations:
+                        session = AllocationSession(session, report.allocations)
+                    begin = time.perf_counter()
+                    if kind == 'log':
+                        replay = LogReplay(rows, seat, session=session, latency=recorder)
+                        replay.run()
+                        requests = replay.requests
+                    else:
+                        requests = replay_packets(script_packets(script, seat), session)
+                    wall = time.perf_counter() - begin
+                    report.add(recorder, wall, requests)
+                    if verbose:
+                        output("{0} seat {1} ({2}): {3} requests, {4:.3f}ms".format(
+                            path, seat, roles[seat] if roles else kind, requests, wall * 1000))
+    finally:
+        if allocations:
+            tracemalloc.stop()
+        for agent in agents.values():
+            agent.close()
+    output(report.summary())
+    return report
+
+
+if __name__ == "__main__":
+    input_args = parse_args()
+    Logger.default_level = level_from_name(input_args.log_level)
+    configure_console(silent=True)
+    run_benchmark(input_args.paths, None if input_args.seats is None else
+                  set(int(seat) for seat in input_args.seats.split(",")),
+                  input_args.repeat, input_args.allocations, input_args.speculate, verbose=input_args.verbose)
@@ -0,0 +1,134 @@
+import argparse
+import time
+from aiwolfpy.latency import LatencyHistogram, PERCENTILES
+from aiwolfpy.packet_recorder import PacketRecorder, read_exchanges
+from aiwolfpy.tcpipclient_parsed import ParsedSession
+from agents.agent_container import AgentContainer
+from agents.logger import Logger, configure_console, level_from_name
+
+"""
+Replays a recording of a seat (made with -R by connect_parse or multi_agent.py) into the agent of this tree, which
+seeds its choices from the recorded randomSeed of every game, and compares the responses and response times with the
+recorded ones, usage:
+python replay_recording.py seat.rec [-o replay.rec] [-t 0.2] [-n 20] [-l OFF]
+The recording made with -o can be replayed by another build in turn.
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('recording')
+    parser.add_argument('-o', type=str, action='store', dest='output', default=None,
+                        help="Record the replay to this file.")
+    parser.add_argument('-t', type=float, action='store', dest='threshold', default=0.2,
+                        help="Relative slowdown of a percentile reported as a regression.")
+    parser.add_argument('-M', type=float, action='store', dest='min_ms', default=1.0,
+                        help="Slowdowns below this many milliseconds are never regressions.")
+    parser.add_argument('-n', type=int, action='store', dest='shown', default=20,
+                        help="Number of divergences printed.")
+    parser.add_argument('-l', type=str, action='store', dest='log_level', default='OFF',
+                        help="Level of the log files of the agent: DEBUG, INFO, WARNING, ERROR or OFF.")
+    return parser.parse_args()
+
+
+class ReplayComparison(object):
+    """
+    Differences between a recording and its replay: the requests answered differently and the response times of
+    both per request type.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.games = 0
+        self.divergences = []
+        self.recorded = {}
+        self.replayed = {}
+
+    def add(self, packet, recorded, replayed, recorded_seconds, replayed_seconds):
+        request = packet['request']
+        if request == 'INITIALIZE':
+            self.games += 1
+        self.requests += 1
+        if recorded != replayed:
+            day = (packet.get('gameInfo') or {}).get('day')
+            self.divergences.append((self.requests, self.games, day, request, recorded, replayed))
+        if recorded is None:
+            return
+        for histograms, seconds in ((self.recorded, recorded_seconds), (self.replayed, replayed_seconds)):
+            if request not in histograms:
+                histograms[request] = LatencyHistogram()
+            histograms[request].record(seconds)
+
+    def regressions(self, threshold=0.2, min_ms=1.0):
+        """
+        :param threshold: Relative slowdown that counts.
+        :param min_ms: Absolute slowdown that counts, in milliseconds.
+        :return: List of (request, percentile, recorded ms, replayed ms) that got slower.
+        """
+        result = []
+        for request in sorted(self.recorded):
+            for p in PERCENTILES:
+                recorded = self.recorded[request].percentile(p) / 1000.0
+                replayed = self.replayed[request].percentile(p) / 1000.0
+                if replayed > recorded * (1 + threshold) and replayed - recorded >= min_ms:
+                    result.append((request, p, recorded, replayed))
+        return result
+
+    def summary(self, shown=20, threshold=0.2, min_ms=1.0):
+        lines = ["{0} requests of {1} games, {2} divergent responses".format(
+            self.requests, self.games, len(self.divergences))]
+        for number, game, day, request, recorded, replayed in self.divergences[:shown]:
+            lines.append("  #{0} game {1} day {2} {3}: recorded {4!r}, replayed {5!r}".format(
+                number, game, day, request, recorded, replayed))
+        if len(self.divergences) > shown:
+            lines.append("  ... " + str(len(self.divergences) - shown) + " more")
+        lines.append("Response times in milliseconds, recorded / replayed")
+        lines.append("{0:<12}{1:>8}".format("request", "count") +
+                     "".join("{0:>20}".format("p" + str(p)) for p in PERCENTILES))
+        for request in sorted(self.recorded):
+            recorded, replayed = self.recorded[request], self.replayed[request]
+            lines.append("{0:<12}{1:>8}".format(request, recorded.count) +
+                         "".join("{0:>20}".format("{0:.3f} / {1:.3f}".format(recorded.percentile(p) / 1000.0,
+                                                                           replayed.percentile(p) / 1000.0))
+                                 for p in PERCENTILES))
+        regressions = self.regressions(threshold, min_ms)
+        lines.append(str(len(regressions)) + " timing regressions" + (":" if regressions else ""))
+        for request, p, recorded, replayed in regressions:
+            lines.append("  {0} p{1}: {2:.3f}ms -> {3:.3f}ms".format(request, p, recorded, replayed))
+        return "\n".join(lines)
+
+
+def replay_recording(path, agent, output_path=None):
+    """
+    Hand the recorded packets to the agent, the random modules are seeded from the randomSeed of every game too, for
+    agents that draw from them. The packets sent after a divergent response are still the recorded ones.
+    :param path: Recording.
+    :param agent: Agent of the replay, AgentContainer or anything with the same interface.
+    :param output_path: If given the replay is recorded there.
+    :return: The ReplayComparison.
+    """
+    recorder = PacketRecorder(output_path) if output_path is not None else None
+    session = ParsedSession(agent, recorder=recorder, seed=True)
+    comparison = ReplayComparison()
+    try:
+        for packet, recorded, recorded_seconds in read_exchanges(path):
+            begin = time.perf_counter()
+            replayed = session.handle(packet)
+            comparison.add(packet, recorded, replayed, recorded_seconds, time.perf_counter() - begin)
+    finally:
+        if recorder is not None:
+            recorder.close()
+    return comparison
+
+
+if __name__ == "__main__":
+    input_args = parse_args()
+    Logger.default_level = level_from_name(input_args.log_level)
+    configure_console(silent=True)
+    # The agent gets the recorded name, so NAME doesn't diverge.
+    name = next((response for packet, response, _ in read_exchanges(input_args.recording)
+                 if packet['request'] == 'NAME'), None)
+    agent = AgentContainer(name=name) if name else AgentContainer()
+    result = replay_recording(input_args.recording, agent, input_args.output)
+    agent.close()
+    print(result.summary(input_args.shown, input_args.threshold, input_args.min_ms))
@@ -0,0 +1,73 @@
+import argparse
+import os
+import time
+from aiwolfpy.game_engine import GameEngine, game_setting, team_of
+from agents.agent_container import AgentContainer
+from agents.logger import Logger, configure_console, level_from_name
+
+"""
+Plays games between seats of our agent with the in-process game engine, without the AIWolf server, usage:
+python self_play.py -n 15 -g 100 [-S 1] [-L logs] [-q [-o console.txt]] [-l DEBUG]
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, action='store', dest='players', default=5, choices=(5, 15))
+    parser.add_argument('-g', type=int, action='store', dest='games', default=1)
+    parser.add_argument('-S', type=int, action='store', dest='seed', default=0,
+                        help="Seed of the first game, game i uses seed + i.")
+    parser.add_argument('-L', type=str, action='store', dest='log_dir', default=None,
+                        help="Directory the games are written to, in the log format of the server.")
+    parser.add_argument('-q', action='store_true', dest='quiet',
+                        help="Don't print, write the prints of the agents to the file given with -o.")
+    parser.add_argument('-o', type=str, action='store', dest='console_file', default=None)
+    parser.add_argument('-l', type=str, action='store', dest='log_level', default='INFO',
+                        help="Level of the log files of the agents: DEBUG, INFO, WARNING, ERROR or OFF.")
+    return parser.parse_args()
+
+
+def play(players, games, seed=0, log_dir=None):
+    """
+    :param players:
+    :param games:
+    :param seed:
+    :param log_dir:
+    :return: The results of the games, see GameEngine.result.
+    """
+    agents = [AgentContainer(name="ROLTK{0:02d}".format(seat)) for seat in range(1, players + 1)]
+    results = []
+    for game in range(games):
+        log_path = None if log_dir is None else os.path.join(log_dir, "{0:05d}.log".format(game))
+        engine = GameEngine(agents, game_setting(players, seed + game), log_path=log_path)
+        results.append(engine.run())
+    for agent in agents:
+        agent.close()
+    return results
+
+
+if __name__ == "__main__":
+    input_args = parse_args()
+    Logger.default_level = level_from_name(input_args.log_level)
+    configure_console(silent=input_args.quiet, file_name=input_args.console_file)
+    if input_args.log_dir is not None and not os.path.isdir(input_args.log_dir):
+        os.makedirs(input_args.log_dir)
+
+    start = time.perf_counter()
+    results = play(input_args.players, input_args.games, input_args.seed, input_args.log_dir)
+    elapsed = time.perf_counter() - start
+
+    wins = {}
+    for result in results:
+        wins[result['winner']] = wins.get(result['winner'], 0) + 1
+    role_wins = {}
+    for result in results:
+        for role in result['roles'].values():
+            games_won = role_wins.setdefault(role, [0, 0])
+            games_won[0] += team_of(role) == result['winner']
+            games_won[1] += 1
+    print("{0} games in {1:.1f}s ({2:.0f} games/hour), winners: {3}".format(len(results), elapsed,
+                                                                          len(results) / elapsed * 3600, wins))
+    for role, (won, played) in sorted(role_wins.items()):
+        print("{0:<10} won {1}/{2}".format(role, won, played))
+    Logger.flush()
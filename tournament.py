@@ -0,0 +1,152 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from aiwolfpy.game_engine import GameEngine, game_setting, team_of
+from aiwolfpy.latency import LatencyRecorder
+from agents.agent_container import AgentContainer
+from agents.logger import Logger, configure_console, level_from_name
+
+"""
+Plays many self-play games in parallel, every worker process runs whole games with the in-process game engine
+and the results are aggregated as they arrive, usage:
+python tournament.py -n 5,15 -g 1000 [-w 8] [-S 1] [-m] [-L logs] [-p 100] [-l OFF]
+"""
+
+# Agents of the worker process per table size, reused between games (every game initializes them again).
+_tables = {}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=str, action='store', dest='tables', default='5',
+                        help="Comma separated table sizes (5 or 15), every table plays the given number of games.")
+    parser.add_argument('-g', type=int, action='store', dest='games', default=100)
+    parser.add_argument('-w', type=int, action='store', dest='workers', default=os.cpu_count())
+    parser.add_argument('-S', type=int, action='store', dest='seed', default=0,
+                        help="Seed of the first game of every table, game i uses seed + i.")
+    parser.add_argument('-m', action='store_true', dest='measure', help="Time the requests of every game.")
+    parser.add_argument('-L', type=str, action='store', dest='log_dir', default=None,
+                        help="Directory the games are written to, in the log format of the server.")
+    parser.add_argument('-p', type=int, action='store', dest='progress', default=100,
+                        help="Print the report every this many games, 0 prints it only at the end.")
+    parser.add_argument('-l', type=str, action='store', dest='log_level', default='OFF',
+                        help="Level of the log files of the agents: DEBUG, INFO, WARNING, ERROR or OFF.")
+    return parser.parse_args()
+
+
+def init_worker(log_level):
+    Logger.default_level = log_level
+    configure_console(silent=True)
+
+
+def play_game(players, seed, measure=False, log_dir=None):
+    """
+    Play a single game in the worker process.
+    :param players: Size of the table.
+    :param seed: Seed of the game.
+    :param measure:
+    :param log_dir:
+    :return: The result of the game (see GameEngine.result) with its table and seed.
+    """
+    agents = _tables.get(players)
+    if agents is None:
+        agents = _tables[players] = [AgentContainer(name="ROLTK{0:02d}".format(seat))
+                                     for seat in range(1, players + 1)]
+    log_path = None if log_dir is None else os.path.join(log_dir, "{0:02d}_{1:07d}.log".format(players, seed))
+    result = GameEngine(agents, game_setting(players, seed), log_path=log_path, measure=measure).run()
+    result['table'] = players
+    result['seed'] = seed
+    return result
+
+
+class TournamentReport(object):
+    """
+    Aggregated results of the games of a tournament, per table size.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.wins = {}
+        self.days = {}
+        self.role_games = {}
+        self.role_wins = {}
+        self.role_days = {}
+        self.errors = 0
+        self.latency = LatencyRecorder("tournament")
+
+    def add(self, result):
+        table = result['table']
+        self.games += 1
+        wins = self.wins.setdefault(table, {})
+        wins[result['winner']] = wins.get(result['winner'], 0) + 1
+        self.days[table] = self.days.get(table, 0) + result['days']
+        for seat, role in result['roles'].items():
+            key = (table, role)
+            self.role_games[key] = self.role_games.get(key, 0) + 1
+            self.role_wins[key] = self.role_wins.get(key, 0) + (team_of(role) == result['winner'])
+            self.role_days[key] = self.role_days.get(key, 0) + result['deaths'].get(seat, result['days'])
+        if result['latency'] is not None:
+            self.latency.merge(result['latency'])
+
+    def summary(self, elapsed=None):
+        lines = [str(self.games) + " games" + ("" if not elapsed else
+                                               " in {0:.1f}s ({1:.0f} games/hour)".format(
+                                                   elapsed, self.games / elapsed * 3600)) +
+                 (", " + str(self.errors) + " failed" if self.errors else "")]
+        for table in sorted(self.wins):
+            games = sum(self.wins[table].values())
+            lines.append("Table of {0}: {1} games, mean {2:.2f} days, winners: {3}".format(
+                table, games, self.days[table] / games, self.wins[table]))
+            lines.append("{0:<12}{1:>8}{2:>10}{3:>16}".format("role", "games", "win rate", "days survived"))
+            for (role_table, role), games in sorted(self.role_games.items()):
+                if role_table == table:
+                    key = (table, role)
+                    lines.append("{0:<12}{1:>8}{2:>10.3f}{3:>16.2f}".format(role, games, self.role_wins[key] / games,
+                                                                         self.role_days[key] / games))
+        if self.latency.histograms:
+            lines.append(self.latency.summary())
+        return "\n".join(lines)
+
+
+def run_tournament(tables, games, workers=None, seed=0, measure=False, log_dir=None, progress=0,
+                   log_level=None, output=print):
+    """
+    :param tables: Table sizes, each one plays the given number of games.
+    :param games: Games per table.
+    :param workers: Number of processes.
+    :param seed: Game i of every table is played with seed + i, so a tournament can be repeated.
+    :param measure:
+    :param log_dir:
+    :param progress: Output the report every this many games, 0 for only at the end.
+    :param log_level: Level of the logs of the agents in the workers.
+    :param output: Function the reports are given to.
+    :return: The TournamentReport.
+    """
+    report = TournamentReport()
+    start = time.perf_counter()
+    level = Logger.default_level if log_level is None else log_level
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(level,)) as executor:
+        futures = [executor.submit(play_game, players, seed + game, measure, log_dir)
+                   for game in range(games) for players in tables]
+        for future in as_completed(futures):
+            try:
+                report.add(future.result())
+            except Exception as e:
+                report.errors += 1
+                output("Game failed: " + str(e))
+                continue
+            # Only a finished game moves the progress, so a failure never repeats the last report.
+            if progress and report.games % progress == 0:
+                output(report.summary(time.perf_counter() - start))
+    output(report.summary(time.perf_counter() - start))
+    return report
+
+
+if __name__ == "__main__":
+    input_args = parse_args()
+    if input_args.log_dir is not None and not os.path.isdir(input_args.log_dir):
+        os.makedirs(input_args.log_dir)
+    run_tournament([int(table) for table in input_args.tables.split(",")], input_args.games, input_args.workers,
+                   input_args.seed, input_args.measure, input_args.log_dir, input_args.progress,
+                   level_from_name(input_args.log_level))